@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+#
+#  benchmark.py
+"""
+Benchmark :func:`octocheese.core.copy_pypi_2_github` against local stand-ins for GitHub and PyPI.
+
+Usage:
+
+.. code-block:: bash
+
+	$ python -m benchmarks.benchmark --tags 1000 --files 40 --file-size 1024
+	$ python -m benchmarks.benchmark --latency 0.05 --bandwidth 10000000 --jobs 4 --release-jobs 4
+
+or with ``tox -e benchmark -- --tags 1000 --files 40``.
+
+The wall time, the number of requests to each server and the peak memory allocated by Python
+are reported, along with the summary and per-phase metrics of the run.
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import contextlib
+import io
+import json
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# 3rd party
+import click
+from consolekit import click_command
+from consolekit.options import auto_default_option
+
+# this package
+from octocheese.core import copy_pypi_2_github
+from octocheese.metrics import Metrics
+from tests.servers import FakeGitHubServer, FakePyPIServer
+
+
+def run_benchmark(
+		tags: int = 100,
+		files: int = 4,
+		file_size: int = 1024,
+		existing: float = 0.0,
+		latency: float = 0.0,
+		bandwidth: Optional[float] = None,
+		jobs: int = 1,
+		release_jobs: int = 1,
+		backend: str = "rest",
+		) -> Dict[str, Any]:
+	"""
+	Run :func:`~.copy_pypi_2_github` once against freshly populated servers, and return the results.
+
+	:param tags: The number of tags, each with a release on PyPI.
+	:param files: The number of files in each release on PyPI.
+	:param file_size: The size of each file in bytes.
+	:param existing: The fraction of tags, starting from the oldest, which already have a complete release on GitHub.
+	:param latency: The time the servers wait before responding to each request, in seconds.
+	:param bandwidth: The maximum number of bytes per second the servers send or receive for each request.
+	:param jobs: The number of files to copy at once for each release.
+	:param release_jobs: The number of releases to process at once.
+	:param backend: The GitHub API used to list the repository's tags, releases and assets.
+	"""
+
+	versions = [f"0.{idx}.0" for idx in range(tags)]
+
+	with FakePyPIServer(latency, bandwidth) as pypi, FakeGitHubServer(latency, bandwidth) as github:
+		pypi.add_project("octocat", versions, files_per_version=files, file_size=file_size)
+		github.add_repo("octocat", "octocat", tags=[f"v{version}" for version in versions])
+
+		for version in versions[:int(tags * existing)]:
+			assets = {filename: file_size for filename in pypi.filenames("octocat", version)}
+			github.add_release("octocat", "octocat", f"v{version}", assets)
+
+		metrics = Metrics()
+		output = io.StringIO()
+
+		tracemalloc.start()
+		start = time.perf_counter()
+
+		with pypi.client(pool_size=jobs * release_jobs) as client:
+			with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+				summary = copy_pypi_2_github(
+						github.github(),
+						"octocat",
+						"octocat",
+						client=client,
+						jobs=jobs,
+						release_jobs=release_jobs,
+						backend=backend,  # type: ignore[arg-type]
+						metrics=metrics,
+						)
+
+		wall_time = time.perf_counter() - start
+		peak_memory = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+		return {
+				"wall_time": wall_time,
+				"peak_memory": peak_memory,
+				"requests": {"github": dict(github.requests), "pypi": dict(pypi.requests)},
+				"bytes_uploaded": github.bytes_received,
+				"summary": summary,
+				"metrics": metrics,
+				}
+
+
+@auto_default_option("--json", "json_file", type=click.STRING, help="Write the results to this file as JSON.")
+@auto_default_option(
+		"--backend",
+		type=click.Choice(["rest", "graphql"]),
+		help="The GitHub API used to list the repository's tags, releases and assets.",
+		)
+@auto_default_option("--release-jobs", type=click.IntRange(min=1), help="The number of releases to process at once.")
+@auto_default_option("--jobs", type=click.IntRange(min=1), help="The number of files to copy at once for each release.")
+@auto_default_option(
+		"--bandwidth",
+		type=click.FLOAT,
+		help="The maximum number of bytes per second sent or received for each request. Unlimited if not given.",
+		)
+@auto_default_option(
+		"--latency",
+		type=click.FLOAT,
+		help="The time to wait before responding to each request, in seconds.",
+		)
+@auto_default_option(
+		"--existing",
+		type=click.FloatRange(0, 1),
+		help="The fraction of tags which already have a complete release on GitHub.",
+		)
+@auto_default_option("--file-size", type=click.IntRange(min=0), help="The size of each file in bytes.")
+@auto_default_option("--files", type=click.IntRange(min=1), help="The number of files in each release.")
+@auto_default_option("--tags", type=click.IntRange(min=1), help="The number of tags and PyPI releases.")
+@click_command()
+def main(
+		tags: int = 100,
+		files: int = 4,
+		file_size: int = 1024,
+		existing: float = 0.0,
+		latency: float = 0.0,
+		bandwidth: Optional[float] = None,
+		jobs: int = 1,
+		release_jobs: int = 1,
+		backend: str = "rest",
+		json_file: Optional[str] = None,
+		) -> None:
+	"""
+	Benchmark OctoCheese against local stand-ins for GitHub and PyPI.
+	"""
+
+	results = run_benchmark(tags, files, file_size, existing, latency, bandwidth, jobs, release_jobs, backend)
+
+	click.echo(f"Wall time: {results['wall_time']:.2f} s")
+	click.echo(f"Peak memory: {results['peak_memory'] / 1024 / 1024:.1f} MiB")
+
+	for service, counts in results["requests"].items():
+		methods = ", ".join(f"{method} {count}" for method, count in sorted(counts.items()))
+		click.echo(f"{service} requests: {sum(counts.values())} ({methods})")
+
+	click.echo(results["summary"].format())
+	click.echo(results["metrics"].format())
+
+	if json_file:
+		with open(json_file, 'w', encoding="UTF-8") as fp:
+			json.dump({
+					"parameters": {
+							"tags": tags,
+							"files": files,
+							"file_size": file_size,
+							"existing": existing,
+							"latency": latency,
+							"bandwidth": bandwidth,
+							"jobs": jobs,
+							"release_jobs": release_jobs,
+							"backend": backend,
+							},
+					"wall_time": results["wall_time"],
+					"peak_memory": results["peak_memory"],
+					"requests": results["requests"],
+					"bytes_uploaded": results["bytes_uploaded"],
+					"summary": {
+							"releases": Counter(results["summary"].releases.values()),
+							"files": Counter(results["summary"].files.values()),
+							},
+					"metrics": results["metrics"].as_dict(),
+					}, fp, indent=2)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+#
+#  import_time.py
+"""
+Measure how long OctoCheese's entry points take to import, using ``python -X importtime``.
+
+Usage:
+
+.. code-block:: bash
+
+	$ python -m benchmarks.import_time
+	$ python -m benchmarks.import_time --runs 10 --top 20
+
+Each statement is run in a fresh interpreter, and the median over the runs is reported,
+along with the slowest modules imported by the final run.
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# 3rd party
+import click
+from consolekit import click_command
+from consolekit.options import auto_default_option
+
+#: The statements timed, which correspond to the ways OctoCheese is started.
+STATEMENTS = {
+		"import octocheese": "import octocheese",
+		"GitHub Action": "import octocheese.runner",
+		"octocheese --version": "import octocheese.__main__",
+		"octocheese (run)": "import octocheese.__main__; import octocheese.core",
+		"octocheese-batch": "import octocheese.batch",
+		}
+
+_IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure(statement: str) -> Tuple[float, List[Tuple[str, float]]]:
+	"""
+	Run the statement in a new interpreter and return the total import time in seconds,
+	and the cumulative import time of each top-level module in seconds.
+
+	:param statement:
+	"""
+
+	process = subprocess.run(
+			[sys.executable, "-X", "importtime", "-c", statement],
+			capture_output=True,
+			text=True,
+			check=True,
+			)
+
+	modules: Dict[str, float] = {}
+
+	for line in process.stderr.splitlines():
+		match = _IMPORT_TIME.match(line)
+		if match and not match.group(3):
+			modules[match.group(4)] = int(match.group(2)) / 1_000_000
+
+	return sum(modules.values()), sorted(modules.items(), key=lambda item: item[1], reverse=True)
+
+
+@auto_default_option("--top", type=click.IntRange(min=0), help="The number of slowest modules to list for each.")
+@auto_default_option("--runs", type=click.IntRange(min=1), help="The number of times to run each statement.")
+@click_command()
+def main(runs: int = 5, top: int = 5) -> None:
+	"""
+	Measure how long OctoCheese's entry points take to import.
+	"""
+
+	for name, statement in STATEMENTS.items():
+		results = [measure(statement) for _ in range(runs)]
+		click.echo(f"{name}: {statistics.median(total for total, _ in results) * 1000:.0f} ms")
+
+		for module, seconds in results[-1][1][:top]:
+			click.echo(f"  {module}: {seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+	main()
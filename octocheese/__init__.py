@@ -24,8 +24,12 @@ Copy PyPI Packages to GitHub Releases.
 #
 #
 
-# this package
-from octocheese.core import copy_pypi_2_github, update_github_release
+# stdlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+	# this package
+	from octocheese.core import copy_pypi_2_github, update_github_release
 
 __author__: str = "Dominic Davis-Foster"
 __copyright__: str = "2020-2021 Dominic Davis-Foster"
@@ -34,3 +38,19 @@ __version__: str = "0.7.0"
 __email__: str = "dominic@davis-foster.co.uk"
 
 __all__ = ["copy_pypi_2_github", "update_github_release"]
+
+
+def __getattr__(name: str) -> Any:
+	# Import octocheese.core, with the GitHub and PyPI clients, only when it is used,
+	# so the command line interface starts quickly.
+	if name in __all__:
+		# this package
+		from octocheese import core
+
+		return getattr(core, name)
+
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+	return sorted({*globals(), *__all__})
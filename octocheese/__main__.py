@@ -25,22 +25,43 @@ Entry points when running as a script.
 
 # stdlib
 import sys
-from typing import Union
+from typing import TYPE_CHECKING, Callable, Optional, Sequence, Union
 
 # 3rd party
 import click
-from apeye_core import URL
 from click import Context, Option
 from consolekit import click_command
 from consolekit.options import auto_default_option, flag_option, version_option
 from domdf_python_tools.secrets import Secret
-from github3_utils.click import token_option
+
+# this package
+from octocheese.runner import run
+
+if TYPE_CHECKING:
+	# 3rd party
+	from apeye_core import URL
 
 __all__ = ["main", "run", "token_var"]
 
 token_var = "GITHUB_TOKEN"
 
 
+def _token_option(envvar: str) -> Callable[[Callable], Callable]:
+	# As github3_utils.click.token_option, which imports all of github3 and so slows down --help and --version.
+
+	return click.option(
+			"-t",
+			"--token",
+			type=click.STRING,
+			help=(
+					"The token to authenticate with the GitHub API. "
+					f"Can also be provided via the '{envvar}' environment variable."
+					),
+			envvar=envvar,
+			required=True,
+			)
+
+
 def _version_callback(ctx: Context, param: Option, value: int) -> None:
 	# this package
 	from octocheese import __version__
@@ -58,6 +79,103 @@ def _version_callback(ctx: Context, param: Option, value: int) -> None:
 		help="Don't show information about OctoCheese at the bottom of the release message.",
 		)
 @flag_option("-T", "--traceback", help="Show the full traceback on error.")
+@flag_option(
+		"--dry-run",
+		help="Show what would be done, without downloading any files or making any changes on GitHub.",
+		)
+@auto_default_option(
+		"--metrics",
+		"metrics_file",
+		type=click.Path(dir_okay=False, writable=True),
+		help="Write timings and byte counts for each phase to this file, as JSON if it ends in .json or OpenMetrics.",
+		)
+@auto_default_option(
+		"--plan",
+		"plan_file",
+		type=click.Path(dir_okay=False, writable=True),
+		help="Write what would be done to this file as JSON. Implies --dry-run.",
+		)
+@flag_option(
+		"--graphql",
+		help="List tags, releases and assets with the GitHub GraphQL API, which needs fewer requests.",
+		)
+@flag_option(
+		"--force-edit",
+		help="Edit existing releases even if only the 'Last Updated' date in the message would change.",
+		)
+@auto_default_option(
+		"--max-writes",
+		type=click.IntRange(min=1),
+		help="The maximum number of concurrent requests which modify the repository. Unlimited if not given.",
+		)
+@auto_default_option(
+		"-J",
+		"--release-jobs",
+		type=click.IntRange(min=1),
+		help="The number of releases to process at once.",
+		show_default=True,
+		)
+@auto_default_option(
+		"-j",
+		"--jobs",
+		type=click.IntRange(min=1),
+		help="The number of files to copy from PyPI at once.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--file-cache-size",
+		type=click.IntRange(min=0),
+		help="The maximum size, in MiB, of the files downloaded from PyPI kept in --cache-dir. 0 disables the cache.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--cache-dir",
+		type=click.Path(file_okay=False, writable=True),
+		help="A directory to cache data from previous runs in. Unchanged projects are skipped.",
+		)
+@auto_default_option(
+		"--state-file",
+		type=click.Path(dir_okay=False, writable=True),
+		help="A JSON file recording the releases and files already copied. Those releases are skipped.",
+		)
+@auto_default_option(
+		"--retries",
+		type=click.IntRange(min=0),
+		help="The number of times to retry a failed download or upload.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--api-rate",
+		type=click.FloatRange(min=0.01),
+		help="The maximum average number of GitHub API requests per second. Unlimited if not given.",
+		)
+@auto_default_option(
+		"--pool-size",
+		type=click.IntRange(min=1),
+		help="The number of connections to keep open to PyPI. Defaults to the number of concurrent downloads.",
+		)
+@auto_default_option(
+		"--tag-prefix",
+		type=click.STRING,
+		help="Only process tags which are this prefix followed by a version number, such as 'octocheese-v1.2.3'.",
+		)
+@auto_default_option(
+		"--tag-pattern",
+		"tag_patterns",
+		type=click.STRING,
+		multiple=True,
+		help="A regular expression matching the tags to process, with a 'version' group. May be given more than once.",
+		)
+@flag_option(
+		"--recent-only",
+		help="Only process releases uploaded to PyPI within --max-age days. Older missing releases are not created.",
+		)
+@auto_default_option(
+		"--max-age",
+		type=click.FLOAT,
+		help="Leave releases on GitHub created more than this many days ago unchanged. -1 updates all releases.",
+		show_default=True,
+		)
 @auto_default_option(
 		"-n",
 		"--max-tags",
@@ -71,24 +189,42 @@ def _version_callback(ctx: Context, param: Option, value: int) -> None:
 		type=click.STRING,
 		help="The repository name (in the format <username>/<repository>) or the complete GitHub URL.",
 		)
-@token_option(token_var)
+@_token_option(token_var)
 @click.argument("pypi_name", type=click.STRING)
 @click_command()
 def main(
 		pypi_name: str,
 		token: str,
-		repo: Union[str, URL, None] = None,
+		repo: Union[str, "URL", None] = None,
 		no_self_promotion: bool = False,
 		max_tags: int = -1,
+		max_age: float = 7,
+		recent_only: bool = False,
+		tag_patterns: Sequence[str] = (),
+		tag_prefix: Optional[str] = None,
 		traceback: bool = False,
+		jobs: int = 1,
+		release_jobs: int = 1,
+		max_writes: Optional[int] = None,
+		pool_size: Optional[int] = None,
+		force_edit: bool = False,
+		cache_dir: Optional[str] = None,
+		file_cache_size: int = 1024,
+		state_file: Optional[str] = None,
+		graphql: bool = False,
+		api_rate: Optional[float] = None,
+		retries: int = 3,
+		dry_run: bool = False,
+		plan_file: Optional[str] = None,
+		metrics_file: Optional[str] = None,
 		) -> None:
 	"""
 	Copy PyPI Packages to GitHub Releases.
 	"""
 
 	# 3rd party
-	import click
 	import dulwich.errors
+	from apeye_core import URL
 	from consolekit.utils import abort
 	from dulwich.repo import Repo
 	from github3.exceptions import AuthenticationFailed
@@ -120,6 +256,24 @@ def main(
 				pypi_name,
 				self_promotion=not no_self_promotion,
 				max_tags=max_tags,
+				max_age=max_age,
+				recent_only=recent_only,
+				tag_patterns=tag_patterns,
+				tag_prefix=tag_prefix,
+				jobs=jobs,
+				release_jobs=release_jobs,
+				max_writes=max_writes,
+				pool_size=pool_size,
+				force_edit=force_edit,
+				cache_dir=cache_dir,
+				file_cache_size=file_cache_size,
+				state_file=state_file,
+				backend="graphql" if graphql else "rest",
+				api_rate=api_rate,
+				retries=retries,
+				dry_run=dry_run,
+				plan_file=plan_file,
+				metrics_file=metrics_file,
 				)
 	except AuthenticationFailed:
 		raise click.UsageError("Invalid credentials for GitHub REST API.")
@@ -130,57 +284,5 @@ def main(
 			raise abort(f"An error occurred: {e}")
 
 
-def run(
-		github_token: Secret,
-		github_username: str,
-		repo_name: str,
-		pypi_name: str,
-		self_promotion: bool = True,
-		max_tags: int = -1,
-		) -> None:
-	"""
-	Helper function for when running as script or action.
-
-	:param github_token: The token to authenticate with the GitHub API with.
-		See https://help.github.com/en/github/authenticating-to-github/creating-a-personal-access-token
-		for instructions on generating a token.
-	:param github_username: The username of the GitHub account that owns the repository.
-	:param repo_name: The name of the GitHub repository.
-	:param pypi_name: The name of the package on PyPI.
-	:param self_promotion: Show information about OctoCheese at the bottom of the release message.
-	:param max_tags: The maximum number of tags to process, starting with the most recent.
-		Set to ``-1`` to process all tags.
-
-	.. versionchanged:: 0.1.0
-
-		Added the ``self_promotion`` option.
-
-	.. versionchanged:: 0.3.0
-
-		Added the ``max_tags`` option.
-	"""
-
-	# 3rd party
-	from github3 import GitHub
-	from github3_utils import echo_rate_limit
-
-	# this package
-	from octocheese.core import copy_pypi_2_github
-
-	g = GitHub(token=github_token.value)
-
-	click.echo(f"Running for repo {github_username}/{repo_name}")
-
-	with echo_rate_limit(g, True):
-		copy_pypi_2_github(
-				g,
-				repo_name,
-				github_username,
-				pypi_name=pypi_name,
-				self_promotion=self_promotion,
-				max_tags=max_tags,
-				)
-
-
 if __name__ == "__main__":
 	sys.exit(main())
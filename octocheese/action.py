@@ -35,7 +35,7 @@ import click
 from domdf_python_tools.secrets import Secret
 
 # this package
-from octocheese.__main__ import run
+from octocheese.runner import run
 
 if __name__ == "__main__":
 	click.echo("[octocheese] Starting octocheese.")
@@ -44,7 +44,45 @@ if __name__ == "__main__":
 	github_username, repo_name = os.environ["GITHUB_REPOSITORY"].split('/')
 	pypi_name = os.environ["INPUT_PYPI_NAME"]
 	max_tags = int(os.environ.get("INPUT_MAX_TAGS", -1))
+	max_age = float(os.environ.get("INPUT_MAX_AGE") or 7)
+	recent_only = os.environ.get("INPUT_RECENT_ONLY", "false").lower() == "true"
+	tag_patterns = [os.environ["INPUT_TAG_PATTERN"]] if os.environ.get("INPUT_TAG_PATTERN") else []
+	tag_prefix = os.environ.get("INPUT_TAG_PREFIX") or None
+	jobs = int(os.environ.get("INPUT_JOBS", 1))
+	release_jobs = int(os.environ.get("INPUT_RELEASE_JOBS", 1))
+	max_writes = int(os.environ["INPUT_MAX_WRITES"]) if os.environ.get("INPUT_MAX_WRITES") else None
+	cache_dir = os.environ.get("INPUT_CACHE_DIR") or None
+	file_cache_size = int(os.environ.get("INPUT_FILE_CACHE_SIZE") or 1024)
+	state_file = os.environ.get("INPUT_STATE_FILE") or None
+	backend = os.environ.get("INPUT_BACKEND") or "rest"
+	api_rate = float(os.environ["INPUT_API_RATE"]) if os.environ.get("INPUT_API_RATE") else None
+	retries = int(os.environ.get("INPUT_RETRIES") or 3)
+	dry_run = os.environ.get("INPUT_DRY_RUN", "false").lower() == "true"
+	plan_file = os.environ.get("INPUT_PLAN_FILE") or None
+	metrics_file = os.environ.get("INPUT_METRICS_FILE") or None
 
-	run(gh_token, github_username, repo_name, pypi_name, max_tags=max_tags)
+	run(
+			gh_token,
+			github_username,
+			repo_name,
+			pypi_name,
+			max_tags=max_tags,
+			max_age=max_age,
+			recent_only=recent_only,
+			tag_patterns=tag_patterns,
+			tag_prefix=tag_prefix,
+			jobs=jobs,
+			release_jobs=release_jobs,
+			max_writes=max_writes,
+			cache_dir=cache_dir,
+			file_cache_size=file_cache_size,
+			state_file=state_file,
+			backend=backend,
+			api_rate=api_rate,
+			retries=retries,
+			dry_run=dry_run,
+			plan_file=plan_file,
+			metrics_file=metrics_file,
+			)
 
 	sys.exit(0)
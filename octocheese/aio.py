@@ -0,0 +1,999 @@
+#!/usr/bin/env python3
+#
+#  aio.py
+"""
+An :mod:`asyncio` implementation of OctoCheese, built on `httpx <https://www.python-httpx.org>`_.
+
+Every download, upload and API call is a task on a single event loop rather than a thread,
+so hundreds can be in flight at once.
+The number of connections to each service is limited by the connection pool of each client.
+
+This module requires the ``async`` extra to be installed.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import asyncio
+import datetime
+import hashlib
+from contextlib import suppress
+from functools import partial
+from typing import (
+		Any,
+		AsyncContextManager,
+		AsyncIterator,
+		Awaitable,
+		Callable,
+		Dict,
+		Iterable,
+		List,
+		Optional,
+		Sequence,
+		TypeVar,
+		Union
+		)
+
+# 3rd party
+import httpx
+from apeye_core import URL
+from domdf_python_tools.paths import PathPlus, TemporaryPathPlus
+from packaging.requirements import InvalidRequirement
+from packaging.version import InvalidVersion, Version
+from pypi_json import USER_AGENT, FileURL, ProjectMetadata
+
+# this package
+from octocheese.colours import OutputBuffer, error, info, success, warning
+from octocheese.core import (
+		DEFAULT_MAX_AGE,
+		UTCDateTime,
+		_asset_matches,
+		_format_age,
+		_message_fingerprint,
+		_release_changed,
+		_update_state,
+		_UpdateWindow,
+		make_release_message
+		)
+from octocheese.pypi import get_release_files
+from octocheese.state import SyncState
+from octocheese.summary import SyncSummary
+from octocheese.tags import VersionIndex
+from octocheese.transfer import CHUNK_SIZE
+
+__all__ = [
+		"DEFAULT_MAX_CONNECTIONS",
+		"AsyncGitHub",
+		"AsyncRelease",
+		"AsyncAsset",
+		"make_async_client",
+		"fetch_pypi_metadata",
+		"fetch_pypi_releases",
+		"download_file_async",
+		"update_github_release_async",
+		"copy_pypi_2_github_async",
+		]
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+#: The default maximum number of connections to each service.
+DEFAULT_MAX_CONNECTIONS: int = 100
+
+
+class _Unlimited:
+	"""
+	Asynchronous context manager which does nothing, for when writes are not limited.
+	"""
+
+	async def __aenter__(self) -> None:
+		return None
+
+	async def __aexit__(self, *args) -> None:
+		return None
+
+
+def make_async_client(max_connections: int = DEFAULT_MAX_CONNECTIONS, **kwargs) -> httpx.AsyncClient:
+	"""
+	Create an HTTP client whose connections are kept alive and reused between requests.
+
+	Requests beyond ``max_connections`` wait for a free connection rather than timing out.
+
+	:param max_connections: The maximum number of connections to keep open at once.
+	:param kwargs: Additional keyword arguments for :class:`httpx.AsyncClient`.
+	"""
+
+	kwargs.setdefault("headers", {"User-Agent": USER_AGENT})
+
+	return httpx.AsyncClient(
+			limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+			timeout=httpx.Timeout(30.0, pool=None),
+			follow_redirects=True,
+			**kwargs,
+			)
+
+
+class AsyncAsset:
+	"""
+	An asset of a release on GitHub, as returned by the REST API.
+
+	:param data: The JSON representation of the asset.
+	"""
+
+	def __init__(self, data: Dict[str, Any]):
+		self.data = data
+
+	def __repr__(self) -> str:
+		return f"<{self.__class__.__name__} [{self.name}]>"
+
+	@property
+	def name(self) -> str:
+		"""
+		The name of the asset.
+		"""
+
+		return self.data["name"]
+
+	@property
+	def size(self) -> Optional[int]:
+		"""
+		The size of the asset in bytes.
+		"""
+
+		return self.data.get("size")
+
+	@property
+	def state(self) -> str:
+		"""
+		The state of the asset. Assets whose upload did not finish are in the ``starter`` state.
+		"""
+
+		return self.data.get("state", "uploaded")
+
+	@property
+	def digest(self) -> Optional[str]:
+		"""
+		The checksum GitHub lists for the asset, such as ``sha256:<hexdigest>``, if any.
+		"""
+
+		return self.data.get("digest")
+
+
+class AsyncRelease:
+	"""
+	A release on GitHub, as returned by the REST API.
+
+	:param data: The JSON representation of the release.
+	"""
+
+	def __init__(self, data: Dict[str, Any]):
+		self.data = data
+
+	def __repr__(self) -> str:
+		return f"<{self.__class__.__name__} [{self.name}]>"
+
+	@property
+	def tag_name(self) -> str:
+		"""
+		The name of the tag the release is for.
+		"""
+
+		return self.data["tag_name"]
+
+	@property
+	def name(self) -> Optional[str]:
+		"""
+		The name of the release.
+		"""
+
+		return self.data.get("name")
+
+	@property
+	def body(self) -> Optional[str]:
+		"""
+		The release message.
+		"""
+
+		return self.data.get("body")
+
+	@property
+	def prerelease(self) -> bool:
+		"""
+		Whether the release is marked as a prerelease.
+		"""
+
+		return bool(self.data.get("prerelease"))
+
+	@property
+	def draft(self) -> bool:
+		"""
+		Whether the release is a draft.
+		"""
+
+		return bool(self.data.get("draft"))
+
+	@property
+	def created_at(self) -> datetime.datetime:
+		"""
+		The time the release was created.
+		"""
+
+		return datetime.datetime.fromisoformat(self.data["created_at"].replace('Z', "+00:00"))
+
+	@property
+	def assets(self) -> List[AsyncAsset]:
+		"""
+		The release's assets.
+		"""
+
+		return [AsyncAsset(asset) for asset in self.data.get("assets", ())]
+
+	@property
+	def asset_names(self) -> List[str]:
+		"""
+		The names of the release's assets.
+		"""
+
+		return [asset.name for asset in self.assets]
+
+	@property
+	def upload_url(self) -> str:
+		"""
+		The URL to upload assets to.
+		"""
+
+		return self.data["upload_url"].split('{', 1)[0]
+
+
+class AsyncGitHub:
+	"""
+	A minimal client for the GitHub REST API.
+
+	Rate limited requests are retried after the time given in the ``Retry-After`` header.
+
+	:param token: The token to authenticate with the GitHub API with.
+	:param client: The HTTP client to make requests with.
+		If :py:obj:`None` a new client is created with :func:`~.make_async_client`.
+	:param base_url: The URL of the GitHub REST API.
+	:param max_retries_on_limit: The number of times to retry a request which was rate limited.
+	"""
+
+	def __init__(
+			self,
+			token: str,
+			client: Optional[httpx.AsyncClient] = None,
+			base_url: str = "https://api.github.com",
+			max_retries_on_limit: int = 5,
+			):
+		self.client = client or make_async_client()
+		self.base_url = base_url.rstrip('/')
+		self.max_retries_on_limit = max_retries_on_limit
+		self._headers = {
+				"Authorization": f"token {token}",
+				"Accept": "application/vnd.github.v3+json",
+				}
+
+	async def __aenter__(self) -> "AsyncGitHub":
+		return self
+
+	async def __aexit__(self, *args) -> None:
+		await self.aclose()
+
+	async def aclose(self) -> None:
+		"""
+		Close the underlying HTTP client.
+		"""
+
+		await self.client.aclose()
+
+	async def request(
+			self,
+			method: str,
+			url: str,
+			content_factory: Optional[Callable[[], Any]] = None,
+			**kwargs,
+			) -> httpx.Response:
+		"""
+		Make a request to the GitHub API.
+
+		:param method:
+		:param url: The URL to request, or a path relative to :attr:`~.AsyncGitHub.base_url`.
+		:param content_factory: A function returning the body of the request, called again for each retry.
+		:param kwargs: Additional keyword arguments for :meth:`httpx.AsyncClient.request`.
+
+		:raises httpx.HTTPStatusError: If the response is an error other than ``404 Not Found``.
+		"""
+
+		if not url.startswith("https://") and not url.startswith("http://"):
+			url = f"{self.base_url}/{url.lstrip('/')}"
+
+		headers = {**self._headers, **kwargs.pop("headers", {})}
+		attempt = 0
+
+		while True:
+			if content_factory is not None:
+				kwargs["content"] = content_factory()
+
+			response = await self.client.request(method, url, headers=headers, **kwargs)
+			retry_after = response.headers.get("Retry-After")
+
+			if response.status_code in {403, 429} and retry_after and attempt < self.max_retries_on_limit:
+				warning(f"GitHub rate limit reached. Retrying in {retry_after} seconds.")
+				await asyncio.sleep(float(retry_after))
+				attempt += 1
+				continue
+
+			if response.status_code != 404:
+				response.raise_for_status()
+
+			return response
+
+	async def _paginate(self, url: str, number: int = -1) -> AsyncIterator[Dict[str, Any]]:
+		next_url: Optional[str] = url
+		params: Optional[Dict[str, int]] = {"per_page": 100}
+		count = 0
+
+		while next_url is not None:
+			response = await self.request("GET", next_url, params=params)
+			response.raise_for_status()
+
+			for item in response.json():
+				yield item
+				count += 1
+				if count == number:
+					return
+
+			next_url = response.links.get("next", {}).get("url")
+			params = None  # The "next" link already includes the parameters
+
+	async def tags(
+			self,
+			owner: str,
+			repo: str,
+			number: int = -1,
+			stop: Optional[Callable[[str], bool]] = None,
+			) -> List[str]:
+		"""
+		Returns the names of the repository's tags, starting with the most recent.
+
+		:param owner:
+		:param repo:
+		:param number: The maximum number of tags to return. Set to ``-1`` to return all tags.
+		:param stop: Called with each tag name. Once it returns :py:obj:`True` no more tags are listed.
+		"""
+
+		tags = []
+
+		async for tag in self._paginate(f"repos/{owner}/{repo}/tags", number):
+			tags.append(tag["name"])
+			if stop is not None and stop(tag["name"]):
+				break
+
+		return tags
+
+	async def releases(self, owner: str, repo: str) -> Dict[str, AsyncRelease]:
+		"""
+		Returns a mapping of tag names to the repository's published releases, including their assets.
+
+		:param owner:
+		:param repo:
+		"""
+
+		releases = {}
+
+		async for data in self._paginate(f"repos/{owner}/{repo}/releases"):
+			release = AsyncRelease(data)
+			if not release.draft:
+				releases[release.tag_name] = release
+
+		return releases
+
+	async def release_from_tag(self, owner: str, repo: str, tag_name: str) -> Optional[AsyncRelease]:
+		"""
+		Returns the release for the given tag, or :py:obj:`None` if there is no release.
+
+		:param owner:
+		:param repo:
+		:param tag_name:
+		"""
+
+		response = await self.request("GET", f"repos/{owner}/{repo}/releases/tags/{tag_name}")
+
+		if response.status_code == 404:
+			return None
+
+		return AsyncRelease(response.json())
+
+	async def create_release(
+			self,
+			owner: str,
+			repo: str,
+			tag_name: str,
+			name: str,
+			body: str,
+			prerelease: bool = False,
+			) -> AsyncRelease:
+		"""
+		Create a release for the given tag.
+
+		:param owner:
+		:param repo:
+		:param tag_name:
+		:param name:
+		:param body:
+		:param prerelease:
+		"""
+
+		response = await self.request(
+				"POST",
+				f"repos/{owner}/{repo}/releases",
+				json={"tag_name": tag_name, "name": name, "body": body, "prerelease": prerelease},
+				)
+		response.raise_for_status()
+
+		return AsyncRelease(response.json())
+
+	async def edit_release(self, release: AsyncRelease, name: str, body: str, prerelease: bool) -> AsyncRelease:
+		"""
+		Edit the release.
+
+		:param release:
+		:param name:
+		:param body:
+		:param prerelease:
+
+		:returns: The updated release.
+		"""
+
+		response = await self.request(
+				"PATCH",
+				release.data["url"],
+				json={"name": name, "body": body, "prerelease": prerelease},
+				)
+		response.raise_for_status()
+
+		return AsyncRelease(response.json())
+
+	async def delete_asset(self, asset: AsyncAsset) -> None:
+		"""
+		Delete the asset.
+
+		:param asset:
+		"""
+
+		response = await self.request("DELETE", asset.data["url"])
+		response.raise_for_status()
+
+	async def upload_asset(self, release: AsyncRelease, filename: PathPlus, name: Optional[str] = None) -> Dict[str, Any]:
+		"""
+		Upload the given file to the release.
+
+		The request body is streamed from the file rather than being read into memory first.
+
+		:param release:
+		:param filename:
+		:param name: The name of the asset. Defaults to the name of the file.
+
+		:returns: The JSON representation of the new asset.
+		"""
+
+		response = await self.request(
+				"POST",
+				release.upload_url,
+				content_factory=partial(_read_chunks, filename),
+				params={"name": name or filename.name},
+				headers={"Content-Type": "application/binary", "Content-Length": str(filename.stat().st_size)},
+				)
+		response.raise_for_status()
+
+		return response.json()
+
+
+async def _read_chunks(filename: PathPlus) -> AsyncIterator[bytes]:
+	with filename.open("rb") as fp:
+		while True:
+			chunk = fp.read(CHUNK_SIZE)
+			if not chunk:
+				break
+			yield chunk
+
+
+async def fetch_pypi_metadata(
+		client: httpx.AsyncClient,
+		pypi_name: str,
+		endpoint: str = "https://pypi.org/pypi",
+		) -> ProjectMetadata:
+	"""
+	Returns the project's metadata from the PyPI JSON API.
+
+	:param client:
+	:param pypi_name: The name of the project on PyPI.
+	:param endpoint: The URL of the PyPI JSON API.
+
+	:raises:
+
+		* :exc:`packaging.requirements.InvalidRequirement` if the project cannot be found on PyPI.
+		* :exc:`httpx.HTTPStatusError` if an error occurs when communicating with PyPI.
+	"""
+
+	response = await client.get(f"{endpoint.rstrip('/')}/{pypi_name}/json")
+
+	if response.status_code == 404:
+		raise InvalidRequirement(f"No such project {pypi_name!r}")
+
+	response.raise_for_status()
+
+	return ProjectMetadata(**response.json())
+
+
+async def fetch_pypi_releases(
+		client: httpx.AsyncClient,
+		pypi_name: str,
+		endpoint: str = "https://pypi.org/pypi",
+		) -> Dict[str, List[FileURL]]:
+	"""
+	Returns a mapping of the project's versions to their files.
+
+	Each file is given as for :func:`~.get_release_files`, with its URL, its sha256 checksum and its size.
+
+	:param client:
+	:param pypi_name: The name of the project on PyPI.
+	:param endpoint: The URL of the PyPI JSON API.
+
+	:raises:
+
+		* :exc:`packaging.requirements.InvalidRequirement` if the project cannot be found on PyPI.
+		* :exc:`httpx.HTTPStatusError` if an error occurs when communicating with PyPI.
+	"""
+
+	return get_release_files(await fetch_pypi_metadata(client, pypi_name, endpoint))
+
+
+async def download_file_async(
+		client: httpx.AsyncClient,
+		url: Union[str, URL],
+		destination: PathPlus,
+		checksum: Optional[str] = None,
+		) -> str:
+	"""
+	Download the file with the given URL from PyPI.
+
+	The asynchronous counterpart of :func:`~.download_file`.
+
+	:param client:
+	:param url:
+	:param destination: The file to write to.
+	:param checksum: The expected sha256 checksum of the file.
+		If given, and the checksum of the downloaded file differs, a :exc:`ValueError` is raised.
+
+	:returns: The sha256 checksum of the downloaded file.
+
+	:raises OSError: If the file cannot be downloaded.
+	"""
+
+	filename = URL(url).name
+	sha256 = hashlib.sha256()
+
+	async with client.stream("GET", str(url)) as response:
+		if response.status_code != 200:
+			raise OSError(f"Unable to download '{filename}' from PyPI.")
+
+		with destination.open("wb") as fp:
+			async for chunk in response.aiter_bytes(CHUNK_SIZE):
+				sha256.update(chunk)
+				fp.write(chunk)
+
+	digest = sha256.hexdigest()
+
+	if checksum is not None and digest != checksum.lower():
+		raise ValueError(f"The checksums for {filename} do not match!")
+
+	return digest
+
+
+async def _gather_in_order(func: Callable[[_T], Awaitable[_R]], items: Sequence[_T]) -> List[_R]:
+	"""
+	Await ``func`` for each of ``items`` concurrently.
+
+	The output of each call is buffered, and printed in the order of ``items``.
+	If a call raises an exception the others are cancelled.
+
+	:param func:
+	:param items:
+	"""
+
+	buffers = [OutputBuffer() for _ in items]
+
+	async def run(item: _T, buffer: OutputBuffer) -> _R:
+		with buffer:
+			return await func(item)
+
+	tasks = [asyncio.ensure_future(run(item, buffer)) for item, buffer in zip(items, buffers)]
+
+	try:
+		return list(await asyncio.gather(*tasks))
+	except BaseException:
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+		raise
+	finally:
+		for buffer in buffers:
+			buffer.flush()
+
+
+async def update_github_release_async(
+		github: AsyncGitHub,
+		owner: str,
+		repo: str,
+		tag_name: str,
+		pypi_name: str,
+		changelog: str = '',
+		self_promotion: bool = True,
+		file_urls: Iterable[Union[str, FileURL]] = (),
+		traceback: bool = False,
+		*,
+		pypi_client: httpx.AsyncClient,
+		write_limit: Optional[AsyncContextManager] = None,
+		summary: Optional[SyncSummary] = None,
+		force_edit: bool = False,
+		release_index: Optional[Dict[str, AsyncRelease]] = None,
+		max_age: Optional[datetime.timedelta] = DEFAULT_MAX_AGE,
+		version: Optional[str] = None,
+		) -> AsyncRelease:
+	"""
+	Update the release on GitHub, and copy the files from PyPI to it.
+
+	The asynchronous counterpart of :func:`~.update_github_release`.
+	All files are copied concurrently.
+
+	:param github:
+	:param owner: The username of the GitHub account that owns the repository.
+	:param repo: The name of the GitHub repository.
+	:param tag_name: The name of the tag to create the release for.
+	:param pypi_name: The name of the project on PyPI.
+	:param changelog:
+	:param self_promotion: Show information about OctoCheese at the bottom of the release message.
+	:param file_urls: The URLs of the files to copy, or mappings giving the URL, the sha256 checksum
+		and optionally the size of each file. Existing assets which do not match the size or checksum are replaced.
+	:param traceback: Raise an error if a file cannot be copied, rather than printing a message.
+	:param pypi_client: The client to download files from PyPI with.
+	:param write_limit: An asynchronous context manager entered around each request which modifies the repository,
+		such as an :class:`asyncio.Semaphore`.
+	:param summary: A :class:`~.SyncSummary` to record the outcome for the release and its files in.
+	:param force_edit: Edit the release even if its name, message and prerelease status would not change.
+	:param release_index: A mapping of tag names to the repository's existing releases.
+		If :py:obj:`None` the release is requested from GitHub.
+	:param max_age: Existing releases created longer ago than this are left unchanged.
+		If :py:obj:`None` existing releases are updated however old they are.
+	:param version: The version on PyPI the tag corresponds to.
+		Defaults to the tag name without any leading ``v``.
+
+	:returns: The release.
+	"""
+
+	if write_limit is None:
+		write_limit = _Unlimited()
+
+	if summary is None:
+		summary = SyncSummary()
+
+	if version is None:
+		version = tag_name.lstrip('v')
+
+	release_name = f"Version {version}"
+
+	message_maker = partial(
+			make_release_message,
+			pypi_name,
+			version,
+			changelog=changelog,
+			self_promotion=self_promotion,
+			)
+
+	prerelease: bool = False
+	with suppress(InvalidVersion):
+		prerelease = Version(version).is_prerelease
+
+	release: Optional[AsyncRelease]
+
+	if release_index is None:
+		release = await github.release_from_tag(owner, repo, tag_name)
+	else:
+		release = release_index.get(tag_name)
+
+	if release is not None:
+		created_at = release.created_at.astimezone(datetime.timezone.utc)
+
+		if max_age is not None and (UTCDateTime.utcnow() - max_age) > created_at:
+			info(f"Skipping tag {tag_name} as it is more than {_format_age(max_age)} old.")
+			summary.record_release(tag_name, "old")
+			return release
+
+		current_assets = {asset.name: asset for asset in release.assets}
+		body = message_maker(release_date=created_at)
+
+		if force_edit or _release_changed(release, release_name, body, prerelease):  # type: ignore[arg-type]
+			async with write_limit:
+				release = await github.edit_release(release, name=release_name, body=body, prerelease=prerelease)
+
+			summary.record_release(tag_name, "updated")
+		else:
+			summary.record_release(tag_name, "unchanged")
+
+	else:
+		async with write_limit:
+			release = await github.create_release(
+					owner,
+					repo,
+					tag_name=tag_name,
+					name=release_name,
+					body=message_maker(release_date=datetime.date.today()),
+					prerelease=prerelease,
+					)
+
+		current_assets = {}
+		summary.record_release(tag_name, "created")
+
+	file_urls = list(file_urls)
+	if not file_urls:
+		return release
+
+	with TemporaryPathPlus() as tmpdir:
+		await _gather_in_order(
+				partial(
+						_copy_file_async,
+						github,
+						release,
+						pypi_client=pypi_client,
+						tag_name=tag_name,
+						current_assets=current_assets,
+						tmpdir=tmpdir,
+						traceback=traceback,
+						write_limit=write_limit,
+						summary=summary,
+						),
+				file_urls,
+				)
+
+	return release
+
+
+async def _copy_file_async(
+		github: AsyncGitHub,
+		release: AsyncRelease,
+		pypi_url: Union[str, FileURL],
+		*,
+		pypi_client: httpx.AsyncClient,
+		tag_name: str,
+		current_assets: Dict[str, AsyncAsset],
+		tmpdir: PathPlus,
+		traceback: bool = False,
+		write_limit: AsyncContextManager,
+		summary: SyncSummary,
+		) -> None:
+	"""
+	Copy a single file from PyPI to the given release.
+
+	:param github:
+	:param release:
+	:param pypi_url: The URL of the file, or a mapping giving the URL, its sha256 checksum and its size.
+	:param pypi_client: The client to download the file from PyPI with.
+	:param tag_name:
+	:param current_assets: Mapping of the names of the release's existing assets to the assets.
+	:param tmpdir: The directory to download the file into.
+	:param traceback: Show the full traceback on error.
+	:param write_limit: An asynchronous context manager entered around the upload.
+	:param summary: A :class:`~.SyncSummary` to record the outcome in.
+	"""
+
+	if isinstance(pypi_url, dict):
+		checksum: Optional[str] = pypi_url["digest"]
+		size: Optional[int] = pypi_url.get("size")  # type: ignore[misc]
+		pypi_url = pypi_url["url"]
+	else:
+		checksum = size = None
+
+	filename = URL(pypi_url).name
+	existing = current_assets.get(filename)
+
+	if existing is not None:
+		if _asset_matches(existing, size, checksum):  # type: ignore[arg-type]
+			warning(f"File '{filename}' already exists for release '{tag_name}'. Skipping.")
+			summary.record_file(tag_name, filename, "exists", size)
+			return
+
+		warning(f"File '{filename}' for release '{tag_name}' does not match the file on PyPI. Replacing.")
+
+	downloaded_file = tmpdir / filename
+
+	try:
+		await download_file_async(pypi_client, pypi_url, downloaded_file, checksum)
+
+		success(f"Copying {filename} from PyPI to GitHub Releases.")
+		async with write_limit:
+			if existing is not None:
+				await github.delete_asset(existing)
+			await github.upload_asset(release, downloaded_file)
+
+		summary.record_file(tag_name, filename, "copied" if existing is None else "replaced", size)
+
+	except (OSError, httpx.HTTPError) as e:
+		summary.record_file(tag_name, filename, "failed")
+
+		if traceback:
+			raise
+		else:
+			error(f"{e} Skipping.")
+
+	finally:
+		if downloaded_file.exists():
+			downloaded_file.unlink()
+
+
+async def copy_pypi_2_github_async(
+		github: AsyncGitHub,
+		repo_name: str,
+		github_username: str,
+		*,
+		changelog: str = '',
+		pypi_name: Optional[str] = None,
+		self_promotion: bool = True,
+		max_tags: int = -1,
+		traceback: bool = False,
+		max_writes: Optional[int] = None,
+		pypi_client: Optional[httpx.AsyncClient] = None,
+		force_edit: bool = False,
+		state: Optional[SyncState] = None,
+		max_age: Optional[datetime.timedelta] = DEFAULT_MAX_AGE,
+		tag_patterns: Optional[Sequence[str]] = None,
+		recent_only: bool = False,
+		) -> SyncSummary:
+	"""
+	Copy the project's releases from PyPI to GitHub.
+
+	The asynchronous counterpart of :func:`~.copy_pypi_2_github`.
+	All releases, and all files, are processed concurrently, limited only by the connection pools
+	of ``github`` and ``pypi_client`` and by ``max_writes``.
+	The output for each release is printed in tag order.
+
+	:param github:
+	:param repo_name: The name of the GitHub repository.
+	:param github_username: The username of the GitHub account that owns the repository.
+	:param changelog:
+	:param pypi_name: The name of the project on PyPI.
+	:default pypi_name: The value of ``repo_name``.
+	:param self_promotion: Show information about OctoCheese at the bottom of the release message.
+	:param max_tags: The maximum number of tags to process, starting with the most recent.
+		Set to ``-1`` to process all tags.
+	:param traceback: Show the full traceback on error.
+	:param max_writes: The maximum number of requests which modify the repository to have in flight at once.
+		If :py:obj:`None` the number is not limited.
+	:param pypi_client: The client to obtain metadata and download files from PyPI with.
+		If :py:obj:`None` a new client is created with :func:`~.make_async_client`, and closed afterwards.
+	:param force_edit: Edit existing releases even if their name, message and prerelease status would not change.
+	:param state: A record of the releases and files copied by previous runs. See :func:`~.copy_pypi_2_github`.
+	:param max_age: The update window. Existing GitHub releases created longer ago than this are left unchanged.
+		If :py:obj:`None` existing releases are updated however old they are.
+	:param tag_patterns: Regular expressions matching the tags to process, each with a ``version`` group.
+		See :mod:`octocheese.tags`.
+	:param recent_only: Only process PyPI releases with a file uploaded within ``max_age``,
+		listing tags only until one has been found for each of them.
+
+	Tags are matched to releases on PyPI, and the update window applied, as for :func:`~.copy_pypi_2_github`.
+
+	:returns: A summary of the outcome for each release and file.
+	"""
+
+	repo_name = str(repo_name)
+	github_username = str(github_username)
+	pypi_name = str(pypi_name or repo_name)
+
+	summary = SyncSummary()
+	write_limit: AsyncContextManager = _Unlimited() if max_writes is None else asyncio.Semaphore(max_writes)
+	state_key = f"{github_username}/{repo_name}"
+
+	own_client = pypi_client is None
+	client = make_async_client() if pypi_client is None else pypi_client
+
+	try:
+		metadata, release_index = await asyncio.gather(
+				fetch_pypi_metadata(client, pypi_name),
+				github.releases(github_username, repo_name),
+				)
+
+		pypi_releases = get_release_files(metadata)
+		version_index = VersionIndex(pypi_releases, tag_patterns)
+		window: Optional[_UpdateWindow] = None
+
+		if max_age is not None and recent_only:
+			window = _UpdateWindow(metadata, max_age, version_index)
+
+			if not window.versions:
+				info(f"No releases of '{pypi_name}' were uploaded to PyPI in the last {_format_age(max_age)}.")
+				return summary
+
+		tags = await github.tags(github_username, repo_name, max_tags, stop=window)
+
+		# Tags matching none of the patterns belong to something else, such as another project in the repository
+		tags = [tag for tag in tags if version_index.parse_tag(tag) is not None]
+
+		async def process_tag(tag: str) -> None:
+			version = version_index.match(tag)
+			if version is None:
+				warning(f"No PyPI release found for tag '{tag}'. Skipping.")
+				summary.record_release(tag, "no-pypi")
+				return
+
+			if window is not None and version not in window.versions:
+				info(f"Skipping tag {tag} as it is more than {_format_age(window.max_age)} old.")
+				summary.record_release(tag, "old")
+				return
+
+			file_urls = pypi_releases[version]
+			fingerprint = _message_fingerprint(pypi_name, tag, changelog, self_promotion)
+
+			if state is not None and not force_edit:
+				if state.is_frozen(state_key, tag, max_age):
+					summary.record_release(tag, "old")
+					return
+
+				file_urls = state.unsynced_files(state_key, tag, file_urls)
+
+				if not file_urls and state.get_fingerprint(state_key, tag) == fingerprint:
+					summary.record_release(tag, "synced")
+					return
+
+			info(f"Processing release for {version}")
+
+			release = await update_github_release_async(
+					github,
+					github_username,
+					repo_name,
+					tag_name=tag,
+					pypi_name=pypi_name,
+					changelog=changelog,
+					self_promotion=self_promotion,
+					file_urls=file_urls,
+					traceback=traceback,
+					pypi_client=client,
+					write_limit=write_limit,
+					summary=summary,
+					force_edit=force_edit,
+					release_index=release_index,
+					max_age=max_age,
+					version=version,
+					)
+
+			if state is not None:
+				_update_state(state, state_key, tag, file_urls, fingerprint, summary, release.created_at)
+
+		try:
+			await _gather_in_order(process_tag, list(reversed(tags)))
+		finally:
+			if state is not None:
+				state.save()
+
+	finally:
+		if own_client:
+			await client.aclose()
+
+	return summary
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+#
+#  batch.py
+"""
+Copy several PyPI projects to GitHub in a single process.
+
+The projects are listed in a manifest, in TOML or JSON format:
+
+.. code-block:: toml
+
+	[defaults]
+	max_tags = 5
+
+	[projects]
+	octocheese = "domdfcoding/octocheese"
+
+	[projects.consolekit]
+	repo = "domdfcoding/consolekit"
+	self_promotion = false
+
+The options in ``[defaults]`` apply to every project, and may be overridden for each project.
+The supported options are
+``changelog``, ``self_promotion``, ``max_tags``, ``max_age``, ``recent_only``, ``tag_patterns``, ``jobs``,
+``release_jobs``, ``force_edit`` and ``backend``, which correspond to the arguments of :func:`~.copy_pypi_2_github`.
+``max_age`` is given in days, or ``-1`` to update all releases.
+``tag_prefix`` may be given instead of, or as well as, ``tag_patterns`` (see :func:`~.prefix_pattern`).
+
+When a cache directory is given, PyPI's changelog is checked once for the whole batch,
+and projects without any new events since the previous run are skipped without requesting their metadata.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import datetime
+import sys
+import threading
+import xmlrpc.client
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, List, NamedTuple, Optional
+
+# 3rd party
+import click
+import dom_toml
+import requests
+from consolekit import click_command
+from consolekit.options import auto_default_option, flag_option
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.secrets import Secret
+from domdf_python_tools.stringlist import StringList
+from domdf_python_tools.typing import PathLike
+from github3 import GitHub
+from github3_utils.click import token_option
+from pypi_json import PyPIJSON
+
+# this package
+from octocheese.colours import error, info, warning
+from octocheese.core import _map_in_order, _use_client, copy_pypi_2_github
+from octocheese.metrics import Metrics
+from octocheese.pypi import ChangeDetector, MetadataCache
+from octocheese.state import SyncState
+from octocheese.summary import SyncSummary
+from octocheese.tags import prefix_pattern
+from octocheese.transfer import DEFAULT_RETRY, FileCache, RetryPolicy
+
+__all__ = ["BatchProject", "BatchReport", "load_manifest", "run_batch", "main"]
+
+#: The options which may be given for each project in a manifest, and their types.
+_PROJECT_OPTIONS: Dict[str, type] = {
+		"changelog": str,
+		"self_promotion": bool,
+		"max_tags": int,
+		"max_age": float,
+		"recent_only": bool,
+		"tag_patterns": list,
+		"tag_prefix": str,
+		"jobs": int,
+		"release_jobs": int,
+		"force_edit": bool,
+		"backend": str,
+		}
+
+
+class BatchProject(NamedTuple):
+	"""
+	A project listed in a batch manifest.
+	"""
+
+	#: The name of the project on PyPI.
+	pypi_name: str
+
+	#: The username of the GitHub account that owns the repository.
+	github_username: str
+
+	#: The name of the GitHub repository.
+	repo_name: str
+
+	#: Keyword arguments for :func:`~.copy_pypi_2_github`.
+	options: Dict[str, Any]
+
+	@property
+	def repo(self) -> str:
+		"""
+		The repository, in the form ``<username>/<repository>``.
+		"""
+
+		return f"{self.github_username}/{self.repo_name}"
+
+
+def _parse_options(name: str, table: Dict[str, Any]) -> Dict[str, Any]:
+	options = {}
+
+	for key, value in table.items():
+		if key not in _PROJECT_OPTIONS:
+			raise ValueError(f"Unknown option {key!r} for {name}.")
+
+		expected = _PROJECT_OPTIONS[key]
+		if expected is float and isinstance(value, int) and not isinstance(value, bool):
+			value = float(value)
+
+		if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+			raise ValueError(f"Option {key!r} for {name} must be of type {expected.__name__}.")
+
+		if expected is list and not all(isinstance(item, str) for item in value):
+			raise ValueError(f"Option {key!r} for {name} must be a list of strings.")
+
+		if key == "max_age":
+			value = None if value < 0 else datetime.timedelta(days=value)
+
+		options[key] = value
+
+	if "tag_prefix" in options:
+		options["tag_patterns"] = [*options.get("tag_patterns", ()), prefix_pattern(options.pop("tag_prefix"))]
+
+	return options
+
+
+def load_manifest(filename: PathLike) -> List[BatchProject]:
+	"""
+	Load the projects from a batch manifest.
+
+	:param filename: The manifest, ending in ``.toml`` or ``.json``.
+
+	:raises ValueError: If the manifest is invalid.
+	"""
+
+	filename = PathPlus(filename)
+
+	if filename.suffix == ".toml":
+		data = dom_toml.load(filename)
+	elif filename.suffix == ".json":
+		data = filename.load_json()
+	else:
+		raise ValueError(f"Unsupported manifest format {filename.suffix!r}. Use '.toml' or '.json'.")
+
+	if not isinstance(data, dict) or not isinstance(data.get("projects"), dict):
+		raise ValueError("The manifest must contain a 'projects' table.")
+
+	defaults = _parse_options("[defaults]", data.get("defaults", {}))
+	projects = []
+
+	for pypi_name, entry in data["projects"].items():
+		if isinstance(entry, str):
+			entry = {"repo": entry}
+		elif not isinstance(entry, dict):
+			raise ValueError(f"The entry for {pypi_name} must be a string or a table.")
+		else:
+			entry = dict(entry)
+
+		repo = entry.pop("repo", None)
+		if not isinstance(repo, str) or repo.count('/') != 1:
+			raise ValueError(f"The repository for {pypi_name} must be given in the form '<username>/<repository>'.")
+
+		github_username, repo_name = repo.split('/')
+		options = {**defaults, **_parse_options(pypi_name, entry)}
+		projects.append(BatchProject(pypi_name, github_username, repo_name, options))
+
+	return projects
+
+
+class BatchReport:
+	"""
+	The outcome of each project in a batch.
+
+	The methods of this class may be called from several threads at once.
+	"""
+
+	#: Mapping of PyPI project names to the summary for that project, for projects which completed.
+	summaries: Dict[str, SyncSummary]
+
+	#: Mapping of PyPI project names to the error message, for projects which failed.
+	errors: Dict[str, str]
+
+	#: The PyPI project names of projects skipped because they had not changed on PyPI.
+	unchanged: List[str]
+
+	def __init__(self, projects: List[BatchProject]):
+		self._lock = threading.Lock()
+		self._projects = list(projects)
+		self.summaries = {}
+		self.errors = {}
+		self.unchanged = []
+
+	def record_summary(self, pypi_name: str, summary: SyncSummary) -> None:
+		"""
+		Record the summary for a project which completed.
+
+		:param pypi_name:
+		:param summary:
+		"""
+
+		with self._lock:
+			self.summaries[pypi_name] = summary
+
+	def record_error(self, pypi_name: str, message: str) -> None:
+		"""
+		Record the error for a project which failed.
+
+		:param pypi_name:
+		:param message:
+		"""
+
+		with self._lock:
+			self.errors[pypi_name] = message
+
+	def record_unchanged(self, pypi_name: str) -> None:
+		"""
+		Record that a project was skipped because it had not changed on PyPI.
+
+		:param pypi_name:
+		"""
+
+		with self._lock:
+			self.unchanged.append(pypi_name)
+
+	@property
+	def incomplete(self) -> List[str]:
+		"""
+		The PyPI project names of projects which failed, had files which could not be copied,
+		or have releases whose tags have not been pushed yet.
+		"""
+
+		with self._lock:
+			incomplete = [
+					name for name, summary in self.summaries.items() if summary.failed_files or summary.untagged
+					]
+			return [*self.errors, *incomplete]
+
+	def format(self) -> str:  # noqa: A003  # pylint: disable=redefined-builtin
+		"""
+		Returns the report as text, with the projects in manifest order.
+		"""
+
+		buf = StringList()
+		buf.indent_type = "  "
+
+		for project in self._projects:
+			buf.append(f"{project.pypi_name} ({project.repo}):")
+
+			with buf.with_indent_size(1):
+				if project.pypi_name in self.errors:
+					buf.append(f"Error: {self.errors[project.pypi_name]}")
+				elif project.pypi_name in self.summaries:
+					buf.extend(self.summaries[project.pypi_name].format().splitlines())
+				elif project.pypi_name in self.unchanged:
+					buf.append("Unchanged on PyPI")
+				else:
+					buf.append("Not processed")
+
+		totals = f"Projects: {len(self.summaries)} completed, {len(self.errors)} failed"
+		if self.unchanged:
+			totals += f", {len(self.unchanged)} unchanged"
+		buf.append(totals)
+
+		return str(buf)
+
+
+def run_batch(
+		g: GitHub,
+		projects: List[BatchProject],
+		*,
+		project_jobs: int = 1,
+		max_writes: Optional[int] = None,
+		client: Optional[PyPIJSON] = None,
+		metadata_cache: Optional[MetadataCache] = None,
+		change_detector: Optional[ChangeDetector] = None,
+		state: Optional[SyncState] = None,
+		file_cache: Optional[FileCache] = None,
+		retry: RetryPolicy = DEFAULT_RETRY,
+		metrics: Optional[Metrics] = None,
+		traceback: bool = False,
+		) -> BatchReport:
+	"""
+	Copy each of the projects from PyPI to GitHub.
+
+	One GitHub client and one PyPI client are shared between all projects,
+	and ``max_writes`` applies across all projects.
+	An error in one project is recorded in the report and the remaining projects are still processed.
+
+	:param g:
+	:param projects:
+	:param project_jobs: The number of projects to process at once.
+	:param max_writes: The maximum number of requests which modify repositories to have in flight at once.
+		If :py:obj:`None` the number is not limited.
+	:param client: The client to obtain metadata and download files from PyPI with.
+		If :py:obj:`None` a new client is created, and closed afterwards.
+	:param metadata_cache: A cache of the projects' metadata from PyPI. See :func:`~.copy_pypi_2_github`.
+	:param change_detector: Used to skip projects without any events in PyPI's changelog since the previous run,
+		without requesting their metadata. If the changelog cannot be obtained every project is processed.
+		Projects which failed, had files which could not be copied, or had releases on PyPI without a tag yet,
+		are processed again on the next run.
+	:param state: A record of the releases and files copied by previous runs. See :func:`~.copy_pypi_2_github`.
+	:param file_cache: A cache of files downloaded from PyPI,
+		so files mirrored to several repositories are only downloaded once.
+	:param retry: How to retry downloads from PyPI and uploads to GitHub which fail.
+	:param metrics: Records the time spent, bytes transferred and retries in each phase, across all projects.
+	:param traceback: Raise the first error rather than recording it in the report.
+	"""
+
+	report = BatchReport(projects)
+	write_limit: ContextManager = nullcontext() if max_writes is None else threading.BoundedSemaphore(max_writes)
+
+	pool_size = project_jobs * max(
+			(project.options.get("jobs", 1) * project.options.get("release_jobs", 1) for project in projects),
+			default=1,
+			)
+
+	with _use_client(client, pool_size) as client:
+
+		def process_project(project: BatchProject) -> None:
+			info(f"Running for {project.pypi_name} ({project.repo})")
+
+			try:
+				summary = copy_pypi_2_github(
+						g,
+						project.repo_name,
+						project.github_username,
+						pypi_name=project.pypi_name,
+						traceback=traceback,
+						client=client,
+						metadata_cache=metadata_cache,
+						state=state,
+						write_limit=write_limit,
+						file_cache=file_cache,
+						retry=retry,
+						metrics=metrics,
+						**project.options,
+						)
+			except Exception as e:
+				if traceback:
+					raise
+
+				error(f"An error occurred for {project.pypi_name}: {e}")
+				report.record_error(project.pypi_name, str(e))
+			else:
+				report.record_summary(project.pypi_name, summary)
+
+		changed = projects
+
+		if change_detector is not None:
+			try:
+				with metrics.time("changelog") if metrics else nullcontext():
+					changed_names = set(change_detector.fetch(client, [project.pypi_name for project in projects]))
+			except (requests.RequestException, xmlrpc.client.Error) as e:
+				if traceback:
+					raise
+
+				warning(f"Unable to obtain the changelog from PyPI: {e}. Processing all projects.")
+			else:
+				changed = [project for project in projects if project.pypi_name in changed_names]
+
+				for project in projects:
+					if project.pypi_name not in changed_names:
+						report.record_unchanged(project.pypi_name)
+
+		_map_in_order(process_project, changed, jobs=project_jobs)
+
+	if change_detector is not None:
+		# These are processed again even if PyPI is unchanged
+		change_detector.commit(retry=report.incomplete)
+
+	return report
+
+
+@flag_option("-T", "--traceback", help="Stop at the first error and show the full traceback.")
+@auto_default_option(
+		"--max-writes",
+		type=click.IntRange(min=1),
+		help="The maximum number of concurrent requests which modify repositories. Unlimited if not given.",
+		)
+@auto_default_option(
+		"-P",
+		"--project-jobs",
+		type=click.IntRange(min=1),
+		help="The number of projects to process at once.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--metrics",
+		"metrics_file",
+		type=click.Path(dir_okay=False, writable=True),
+		help="Write timings and byte counts for each phase to this file, as JSON if it ends in .json or OpenMetrics.",
+		)
+@auto_default_option(
+		"--retries",
+		type=click.IntRange(min=0),
+		help="The number of times to retry a failed download or upload.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--api-rate",
+		type=click.FloatRange(min=0.01),
+		help="The maximum average number of GitHub API requests per second. Unlimited if not given.",
+		)
+@auto_default_option(
+		"--state-file",
+		type=click.Path(dir_okay=False, writable=True),
+		help="A JSON file recording the releases and files already copied. Those releases are skipped.",
+		)
+@auto_default_option(
+		"--file-cache-size",
+		type=click.IntRange(min=0),
+		help="The maximum size, in MiB, of the files downloaded from PyPI kept in --cache-dir. 0 disables the cache.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--cache-dir",
+		type=click.Path(file_okay=False, writable=True),
+		help="A directory to cache data from previous runs in. Unchanged projects are skipped.",
+		)
+@token_option("GITHUB_TOKEN")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click_command()
+def main(
+		manifest: str,
+		token: str,
+		cache_dir: Optional[str] = None,
+		file_cache_size: int = 1024,
+		state_file: Optional[str] = None,
+		api_rate: Optional[float] = None,
+		retries: int = 3,
+		metrics_file: Optional[str] = None,
+		project_jobs: int = 1,
+		max_writes: Optional[int] = None,
+		traceback: bool = False,
+		) -> None:
+	"""
+	Copy several PyPI projects to GitHub Releases, as listed in MANIFEST.
+	"""
+
+	# 3rd party
+	from github3_utils import echo_rate_limit
+
+	# this package
+	from octocheese.ratelimit import install_rate_limiter
+
+	try:
+		projects = load_manifest(manifest)
+	except ValueError as e:
+		raise click.UsageError(str(e))
+
+	g = GitHub(token=Secret(token).value)
+	install_rate_limiter(g, rate=api_rate)
+
+	if cache_dir is None:
+		metadata_cache = None
+		change_detector = None
+		file_cache = None
+	else:
+		metadata_cache = MetadataCache(PathPlus(cache_dir) / "metadata")
+		change_detector = ChangeDetector(PathPlus(cache_dir) / "changelog.json")
+		file_cache = FileCache(PathPlus(cache_dir) / "files", file_cache_size * 1024 * 1024) if file_cache_size else None
+	state = None if state_file is None else SyncState(state_file)
+	metrics = Metrics()
+
+	with echo_rate_limit(g, True), metrics.time("total"):
+		report = run_batch(
+				g,
+				projects,
+				project_jobs=project_jobs,
+				max_writes=max_writes,
+				metadata_cache=metadata_cache,
+				change_detector=change_detector,
+				state=state,
+				file_cache=file_cache,
+				retry=RetryPolicy(retries=retries),
+				metrics=metrics,
+				traceback=traceback,
+				)
+
+	click.echo(report.format())
+	click.echo(metrics.format())
+
+	if metrics_file is not None:
+		metrics.dump(metrics_file)
+
+	if report.errors:
+		sys.exit(1)
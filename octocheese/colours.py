@@ -23,11 +23,33 @@ Functions for printing coloured text.
 #  MA 02110-1301, USA.
 #
 
+# stdlib
+from contextvars import ContextVar, Token
+from typing import Callable, List, Optional, Tuple, Type
+
 # 3rd party
-from consolekit.terminal_colours import Fore
+import click
 from domdf_python_tools.utils import stderr_writer
 
-__all__ = ["success", "warning", "error"]
+__all__ = ["success", "warning", "error", "info", "OutputBuffer"]
+
+# The same escape sequences as consolekit's ``Fore``, which is not imported as it takes a long time to import.
+_GREEN = "\033[32m"
+_YELLOW = "\033[33m"
+_RED = "\033[31m"
+_RESET = "\033[39m"
+
+# Each thread, and each asyncio task, sees its own stack of active buffers
+_buffers: "ContextVar[Tuple[OutputBuffer, ...]]" = ContextVar("_buffers", default=())
+
+
+def _write(writer: Callable[[str], None], text: str) -> None:
+	buffers = _buffers.get()
+
+	if buffers:
+		buffers[-1].append((writer, text))
+	else:
+		writer(text)
 
 
 def success(text: str) -> None:
@@ -37,7 +59,7 @@ def success(text: str) -> None:
 	:param text: The text to print.
 	"""
 
-	print(Fore.GREEN(text))
+	_write(print, f"{_GREEN}{text}{_RESET}")
 
 
 def warning(text: str) -> None:
@@ -47,7 +69,7 @@ def warning(text: str) -> None:
 	:param text: The text to print.
 	"""
 
-	stderr_writer(Fore.YELLOW(text))
+	_write(stderr_writer, f"{_YELLOW}{text}{_RESET}")
 
 
 def error(text: str) -> None:
@@ -57,4 +79,56 @@ def error(text: str) -> None:
 	:param text: The text to print.
 	"""
 
-	stderr_writer(Fore.RED(text))
+	_write(stderr_writer, f"{_RED}{text}{_RESET}")
+
+
+def info(text: str) -> None:
+	"""
+	Prints the given text to stdout.
+
+	:param text: The text to print.
+
+	.. versionadded:: 0.8.0
+	"""
+
+	_write(click.echo, text)
+
+
+class OutputBuffer(List[Tuple[Callable[[str], None], str]]):
+	"""
+	Holds back the output of :func:`~.success`, :func:`~.warning`, :func:`~.error` and :func:`~.info`.
+
+	While used as a context manager, text printed in the current thread or asyncio task is stored rather than printed.
+	Calling :meth:`~.OutputBuffer.flush` afterwards prints it in one go,
+	so the output of tasks run concurrently is not interleaved.
+
+	.. versionadded:: 0.8.0
+	"""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._tokens: List[Token] = []
+
+	def __enter__(self) -> "OutputBuffer":
+		self._tokens.append(_buffers.set(_buffers.get() + (self, )))
+		return self
+
+	def __exit__(
+			self,
+			exc_type: Optional[Type[BaseException]],
+			exc_val: Optional[BaseException],
+			exc_tb: object,
+			) -> None:
+		_buffers.reset(self._tokens.pop())
+
+	def flush(self) -> None:
+		"""
+		Print, and then discard, the buffered text.
+
+		If another :class:`~.OutputBuffer` is active in the calling thread or task the text is passed on to it instead.
+		"""
+
+		for writer, text in self:
+			_write(writer, text)
+
+		self.clear()
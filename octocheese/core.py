@@ -26,29 +26,177 @@ The main logic of octocheese.
 # stdlib
 import datetime
 import functools
-from contextlib import suppress
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext, suppress
 from functools import partial
-from typing import TYPE_CHECKING, Iterable, Optional, Union
+from typing import (
+		TYPE_CHECKING,
+		Callable,
+		ContextManager,
+		Dict,
+		Iterable,
+		Iterator,
+		List,
+		Mapping,
+		Optional,
+		Sequence,
+		Set,
+		TypeVar,
+		Union
+		)
 
 # 3rd party
-import click
 from apeye_core import URL
 from domdf_python_tools.paths import PathPlus, TemporaryPathPlus
 from domdf_python_tools.stringlist import StringList
 from github3 import GitHub
-from github3.exceptions import NotFoundError
+from github3.exceptions import NotFoundError, ServerError, TransportError
 from github3.repos import Repository
-from github3.repos.release import Release
+from github3.repos.release import Asset, Release
 from github3_utils.apps import make_footer_links
 from packaging.version import InvalidVersion, Version
-from pypi_json import FileURL, PyPIJSON
-from shippinglabel.checksum import check_sha256_hash
+from pypi_json import FileURL, ProjectMetadata, PyPIJSON
 from typing_extensions import Literal
 
 # this package
-from octocheese.colours import error, success, warning
+from octocheese.colours import OutputBuffer, error, info, success, warning
+from octocheese.graphql import fetch_inventory
+from octocheese.metrics import Metrics
+from octocheese.plan import SyncPlan
+from octocheese.pypi import (
+		DEFAULT_POOL_SIZE,
+		MetadataCache,
+		get_release_files,
+		get_release_times,
+		make_pypi_client
+		)
+from octocheese.state import SyncState
+from octocheese.summary import SyncSummary
+from octocheese.tags import VersionIndex
+from octocheese.transfer import DEFAULT_RETRY, FileCache, RetryPolicy, download_file, upload_file
+
+__all__ = ["DEFAULT_MAX_AGE", "update_github_release", "copy_pypi_2_github", "make_release_message", "index_releases"]
+
+#: The default age after which releases are no longer updated.
+DEFAULT_MAX_AGE = datetime.timedelta(days=7)
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+def _map_in_order(func: Callable[[_T], _R], items: Sequence[_T], jobs: int = 1) -> List[_R]:
+	"""
+	Call ``func`` for each of ``items``, using up to ``jobs`` worker threads.
+
+	Console output from each call is buffered and printed in the order of ``items``,
+	regardless of the order in which the calls complete.
+
+	If a call raises an exception the output of the preceding calls is printed,
+	outstanding calls are cancelled, and the exception is re-raised.
+
+	:param func:
+	:param items:
+	:param jobs: The maximum number of calls to make at once.
+
+	:return: The return values of ``func``, in the order of ``items``.
+	"""
+
+	if jobs <= 1 or len(items) <= 1:
+		return [func(item) for item in items]
+
+	def worker(item: _T, buffer: OutputBuffer) -> _R:
+		with buffer:
+			return func(item)
+
+	results: List[_R] = []
+	buffers = [OutputBuffer() for _ in items]
+
+	with ThreadPoolExecutor(max_workers=jobs) as executor:
+		futures = [executor.submit(worker, item, buffer) for item, buffer in zip(items, buffers)]
+
+		try:
+			for future, buffer in zip(futures, buffers):
+				try:
+					results.append(future.result())
+				finally:
+					buffer.flush()
+		except BaseException:
+			for future in futures:
+				future.cancel()
+			raise
+
+	return results
 
-__all__ = ["update_github_release", "copy_pypi_2_github", "make_release_message"]
+
+@contextmanager
+def _use_client(client: Optional[PyPIJSON], pool_size: int) -> Iterator[PyPIJSON]:
+	"""
+	Use the given PyPI client, or create (and afterwards close) a new one if it is :py:obj:`None`.
+	"""
+
+	if client is None:
+		with make_pypi_client(max(pool_size, DEFAULT_POOL_SIZE)) as new_client:
+			yield new_client
+	else:
+		yield client
+
+
+def index_releases(repo: Repository) -> Dict[str, Release]:
+	"""
+	Returns a mapping of tag names to the repository's published releases.
+
+	The releases are listed 100 at a time, and each listing includes the release's assets,
+	so the whole repository is indexed in a handful of requests.
+
+	:param repo:
+	"""
+
+	return {release.tag_name: release for release in repo.releases() if not release.draft}
+
+
+class _LazyReleaseIndex(Mapping[str, Release]):
+	"""
+	A mapping of tag names to releases which is only fetched from GitHub when first used.
+
+	:param repo:
+	:param metrics: Records the listing in the ``list-releases`` phase.
+	"""
+
+	def __init__(self, repo: Repository, metrics: Optional[Metrics] = None):
+		self._repo = repo
+		self._metrics = metrics or Metrics()
+		self._lock = threading.Lock()
+		self._index: Optional[Dict[str, Release]] = None
+
+	@property
+	def index(self) -> Dict[str, Release]:
+		with self._lock:
+			if self._index is None:
+				with self._metrics.time("list-releases"):
+					self._index = index_releases(self._repo)
+
+		return self._index
+
+	@property
+	def loaded(self) -> bool:
+		"""
+		Whether the releases have been fetched from GitHub.
+		"""
+
+		return self._index is not None
+
+	def __getitem__(self, tag_name: str) -> Release:
+		return self.index[tag_name]
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self.index)
+
+	def __len__(self) -> int:
+		return len(self.index)
 
 
 def update_github_release(
@@ -59,7 +207,19 @@ def update_github_release(
 		self_promotion: bool = True,
 		file_urls: Union[Iterable[str], Iterable[FileURL]] = (),
 		traceback: bool = False,
-		) -> Release:
+		jobs: int = 1,
+		write_limit: Optional[ContextManager] = None,
+		summary: Optional[SyncSummary] = None,
+		client: Optional[PyPIJSON] = None,
+		force_edit: bool = False,
+		release_index: Optional[Mapping[str, Release]] = None,
+		file_cache: Optional[FileCache] = None,
+		retry: RetryPolicy = DEFAULT_RETRY,
+		dry_run: bool = False,
+		metrics: Optional[Metrics] = None,
+		max_age: Optional[datetime.timedelta] = DEFAULT_MAX_AGE,
+		version: Optional[str] = None,
+		) -> Optional[Release]:
 	"""
 	Update the given release on GitHub with the new name, message, and files.
 
@@ -69,18 +229,64 @@ def update_github_release(
 	:param changelog: The changelog entry for the release.
 	:param self_promotion: Show information about OctoCheese at the bottom of the release message.
 	:param file_urls: The files to download from PyPI and add to the release.
-		Either the files URLs themselves, or mappings giving the URL and its sha256 checksum.
+		Either the files URLs themselves, or mappings giving the URL, its sha256 checksum,
+		and optionally its size in bytes (see :func:`~.get_release_files`).
+		Existing assets which do not match the size or checksum are replaced.
 	:param traceback: Show the full traceback on error.
+	:param jobs: The number of files to copy from PyPI at once.
+	:param write_limit: A context manager, such as a :class:`threading.BoundedSemaphore`,
+		entered around every request which modifies the repository on GitHub.
+		Used to limit the number of concurrent write requests across several releases.
+	:param summary: A :class:`~.SyncSummary` to record the outcome for the release and its files in.
+	:param client: The client to download files from PyPI with.
+		If :py:obj:`None` a new client is created, and closed afterwards.
+		See :func:`~.make_pypi_client`.
+	:param force_edit: Edit an existing release even if its name, message and prerelease status would not change.
+		By default the edit is skipped if the only difference is the date in the "Last Updated" comment.
+	:param release_index: A mapping of tag names to the repository's existing releases,
+		with the assets of each release in :attr:`Release.original_assets <github3.repos.release.Release.original_assets>`.
+		If given, the release and its assets are looked up in the mapping rather than requested from GitHub.
+		See :func:`~.index_releases`.
+	:param file_cache: A cache of files downloaded from PyPI.
+		Files with a known checksum are taken from the cache if possible, and added to it otherwise.
+	:param retry: How to retry downloads from PyPI and uploads to GitHub which fail.
+	:param dry_run: Record what would be done in ``summary``, without downloading any files
+		or making any changes on GitHub.
+	:param metrics: Records the time spent looking up and writing the release, and copying its files.
+		See :mod:`octocheese.metrics`.
+	:param max_age: Existing releases created longer ago than this are left unchanged.
+		If :py:obj:`None` existing releases are updated however old they are.
+	:param version: The version on PyPI the tag corresponds to.
+		Defaults to the tag name without any leading ``v``.
 
 	:return: The release, and a list of URLs for the current assets.
+		If ``dry_run`` is :py:obj:`True` and the release does not exist, :py:obj:`None`.
 
 	.. versionchanged:: 0.3.0
 
 		Now takes a very different set of parameters to the previous version.
 		Please read the current documentation carefully.
+
+	.. versionchanged:: 0.8.0
+
+		* Added the ``jobs``, ``write_limit``, ``summary``, ``client``, ``force_edit``, ``release_index``,
+		  ``file_cache``, ``retry``, ``dry_run``, ``metrics``, ``max_age`` and ``version`` options.
+		* Existing releases are no longer edited if nothing other than the "Last Updated" date would change.
+		* Existing assets which were not uploaded completely, or do not match the file on PyPI, are replaced.
 	"""
 
-	version = tag_name.lstrip('v')
+	if write_limit is None:
+		write_limit = nullcontext()
+
+	if summary is None:
+		summary = SyncSummary()
+
+	if metrics is None:
+		metrics = Metrics()
+
+	if version is None:
+		version = tag_name.lstrip('v')
+
 	release_name = f"Version {version}"
 
 	message_maker = partial(
@@ -93,91 +299,308 @@ def update_github_release(
 
 	prerelease: bool = False
 	with suppress(InvalidVersion):
-		prerelease = Version(tag_name).is_prerelease
+		prerelease = Version(version).is_prerelease
 
-	current_assets = []
+	current_assets: Dict[str, Asset] = {}
 
 	# TODO: List checksums in release message.
 
-	try:
-		release: Release = repo.release_from_tag(tag_name)
+	release: Optional[Release]
 
+	if release_index is None:
+		try:
+			with metrics.time("list-releases"):
+				release = repo.release_from_tag(tag_name)
+		except NotFoundError:
+			release = None
+	else:
+		release = release_index.get(tag_name)
+
+	if release is not None:
 		# Check if and when last updated.
 		created_at: datetime.datetime = release.created_at.astimezone(datetime.timezone.utc)
 		# last_updated = UTCDateTime.strptime(release.last_modified, "%a, %d %b %Y %H:%M:%S %Z")
 
-		if (UTCDateTime.utcnow() - datetime.timedelta(days=7)) > created_at:
-			# Don't update release message if created more than 7 days ago.
-			click.echo(f"Skipping tag {tag_name} as it is more than 7 days old.")
+		if max_age is not None and (UTCDateTime.utcnow() - max_age) > created_at:
+			# Don't update release message if created before the update window.
+			info(f"Skipping tag {tag_name} as it is more than {_format_age(max_age)} old.")
+			summary.record_release(tag_name, "old")
 			return release
 
 		# Update existing release
-		release.edit(
-				name=release_name,
-				body=message_maker(release_date=created_at),
-				prerelease=prerelease,
-				)
+		body = message_maker(release_date=created_at)
+
+		if force_edit or _release_changed(release, release_name, body, prerelease):
+			if not dry_run:
+				with write_limit, metrics.time("write-release"):
+					release.edit(name=release_name, body=body, prerelease=prerelease)
+
+			summary.record_release(tag_name, "updated")
+		else:
+			summary.record_release(tag_name, "unchanged")
 
 		# Get list of current assets for release
-		for asset in release.assets():
-			current_assets.append(asset.name)
+		if release_index is None:
+			with metrics.time("list-releases"):
+				assets: Iterable[Asset] = list(release.assets())
+		else:
+			assets = release.original_assets
+
+		for asset in assets:
+			current_assets[asset.name] = asset
+
+	elif dry_run:
+		summary.record_release(tag_name, "created")
 
-	except NotFoundError:
+	else:
 		# Create the release
-		release = repo.create_release(
-				tag_name=tag_name,
-				name=release_name,
-				body=message_maker(release_date=datetime.date.today()),
-				prerelease=prerelease,
-				)
+		with write_limit, metrics.time("write-release"):
+			release = repo.create_release(
+					tag_name=tag_name,
+					name=release_name,
+					body=message_maker(release_date=datetime.date.today()),
+					prerelease=prerelease,
+					)
+
+		summary.record_release(tag_name, "created")
 
 	if not file_urls:
 		return release
 
-	with TemporaryPathPlus() as tmpdir:
+	with TemporaryPathPlus() as tmpdir, _use_client(client, jobs) as client:
+		_map_in_order(
+				partial(
+						_copy_file,
+						release,
+						client=client,
+						tag_name=tag_name,
+						current_assets=current_assets,
+						tmpdir=tmpdir,
+						traceback=traceback,
+						write_limit=write_limit,
+						summary=summary,
+						file_cache=file_cache,
+						retry=retry,
+						dry_run=dry_run,
+						metrics=metrics,
+						),
+				list(file_urls),
+				jobs=jobs,
+				)
 
-		for pypi_url in file_urls:
-			if isinstance(pypi_url, dict):
-				checksum: Optional[str] = pypi_url["digest"]
-				pypi_url = pypi_url["url"]
-			else:
-				checksum = None
+	return release
 
-			filename = URL(pypi_url).name
 
-			if filename in current_assets:
-				warning(f"File '{filename}' already exists for release '{tag_name}'. Skipping.")
-				continue
+_last_updated_re = re.compile(r"^<!-- Octocheese: Last Updated .* -->$", flags=re.MULTILINE)
 
-			try:
 
-				with PyPIJSON() as client:
-					response = client.download_file(pypi_url)
+def _normalise_message(body: Optional[str]) -> str:
+	"""
+	Normalise a release message for comparison.
 
-				if response.status_code != 200:  # pragma: no cover
-					raise OSError(f"Unable to download '{filename}' from PyPI.")
+	Line endings and trailing whitespace are normalised, and the "Last Updated" comment is removed.
 
-				downloaded_file = tmpdir / filename
-				downloaded_file.write_bytes(response.content)
+	:param body:
+	"""
 
-				if checksum is not None and not check_sha256_hash(downloaded_file, checksum):
-					raise ValueError(f"The checksums for {filename} do not match!")
+	body = _last_updated_re.sub('', (body or '').replace("\r\n", '\n'))
+	return '\n'.join(line.rstrip() for line in body.strip().splitlines())
 
-				success(f"Copying {filename} from PyPI to GitHub Releases.")
-				release.upload_asset(
-						content_type="application/binary",
-						name=filename,
-						asset=(PathPlus(tmpdir) / filename).read_bytes(),
-						)
 
-			except OSError as e:
-				if traceback:
-					raise
-				else:
-					error(f"{e} Skipping.")
-					continue
+def _release_changed(release: Release, name: str, body: str, prerelease: bool) -> bool:
+	"""
+	Returns whether editing the release to have the given name, message and prerelease status would change it.
 
-	return release
+	:param release:
+	:param name:
+	:param body:
+	:param prerelease:
+	"""
+
+	return (
+			release.name != name or bool(release.prerelease) != prerelease
+			or _normalise_message(release.body) != _normalise_message(body)
+			)
+
+
+def _copy_file(
+		release: Release,
+		pypi_url: Union[str, FileURL],
+		*,
+		client: PyPIJSON,
+		tag_name: str,
+		current_assets: Mapping[str, Asset],
+		tmpdir: PathPlus,
+		traceback: bool = False,
+		write_limit: ContextManager,
+		summary: SyncSummary,
+		file_cache: Optional[FileCache] = None,
+		retry: RetryPolicy = DEFAULT_RETRY,
+		dry_run: bool = False,
+		metrics: Optional[Metrics] = None,
+		) -> None:
+	"""
+	Copy a single file from PyPI to the given release.
+
+	:param release:
+	:param pypi_url: The URL of the file, or a mapping giving the URL, its sha256 checksum and its size,
+		and optionally the other digests PyPI lists for it.
+	:param client: The client to download the file from PyPI with.
+	:param tag_name:
+	:param current_assets: Mapping of the names of the release's existing assets to the assets.
+	:param tmpdir: The directory to download the file into.
+	:param traceback: Show the full traceback on error.
+	:param write_limit: A context manager entered around the upload.
+	:param summary: A :class:`~.SyncSummary` to record the outcome in.
+	:param file_cache: A cache to take the file from, or to add it to once downloaded.
+	:param retry: How to retry the download and upload if they fail.
+	:param dry_run: Record what would be done in ``summary`` without copying the file.
+	:param metrics: Records the download and upload.
+	"""
+
+	if isinstance(pypi_url, dict):
+		checksum: Optional[str] = pypi_url["digest"]
+		size: Optional[int] = pypi_url.get("size")  # type: ignore[misc]
+		digests: Optional[Mapping[str, str]] = pypi_url.get("digests")  # type: ignore[misc]
+		pypi_url = pypi_url["url"]
+	else:
+		checksum = size = digests = None
+
+	filename = URL(pypi_url).name
+	existing = current_assets.get(filename)
+
+	if existing is not None:
+		if _asset_matches(existing, size, checksum):
+			warning(f"File '{filename}' already exists for release '{tag_name}'. Skipping.")
+			summary.record_file(tag_name, filename, "exists", size)
+			return
+
+		warning(f"File '{filename}' for release '{tag_name}' does not match the file on PyPI. Replacing.")
+
+	if dry_run:
+		summary.record_file(tag_name, filename, "copied" if existing is None else "replaced", size)
+		return
+
+	try:
+		with _local_copy(client, pypi_url, checksum, tmpdir, file_cache, retry, metrics, digests) as local_file:
+			success(f"Copying {filename} from PyPI to GitHub Releases.")
+			with write_limit:
+				if existing is not None:
+					_delete_asset(release, existing)
+				upload_file(release, local_file, name=filename, retry=retry, metrics=metrics)
+
+		summary.record_file(tag_name, filename, "copied" if existing is None else "replaced", size)
+
+	except (OSError, TransportError, ServerError) as e:
+		summary.record_file(tag_name, filename, "failed")
+
+		if traceback:
+			raise
+		else:
+			error(f"{e} Skipping.")
+
+
+def _asset_digest(asset: Asset) -> Optional[str]:
+	"""
+	Returns the sha256 checksum GitHub lists for the asset, or :py:obj:`None` if it is not known.
+
+	:param asset:
+	"""
+
+	digest = getattr(asset, "digest", None)
+
+	if digest is None and hasattr(asset, "as_dict"):
+		digest = asset.as_dict().get("digest")
+
+	if isinstance(digest, str) and digest.startswith("sha256:"):
+		return digest[7:].lower()
+
+	return None
+
+
+def _asset_matches(asset: Asset, size: Optional[int], checksum: Optional[str]) -> bool:
+	"""
+	Returns whether the existing asset matches the file on PyPI with the given size and checksum.
+
+	Assets left in the ``starter`` state by an interrupted upload never match.
+	Otherwise the size and checksum are compared where both GitHub and PyPI provide them.
+
+	:param asset:
+	:param size: The size of the file on PyPI, in bytes.
+	:param checksum: The sha256 checksum of the file on PyPI.
+	"""
+
+	if getattr(asset, "state", "uploaded") == "starter":
+		return False
+
+	if size is not None and getattr(asset, "size", None) is not None and asset.size != size:
+		return False
+
+	digest = _asset_digest(asset)
+	if checksum is not None and digest is not None and digest != checksum.lower():
+		return False
+
+	return True
+
+
+def _delete_asset(release: Release, asset: Asset) -> None:
+	"""
+	Delete the given asset from the release.
+
+	:param release:
+	:param asset:
+	"""
+
+	if not hasattr(asset, "delete"):
+		# Assets listed with the GraphQL API must be looked up with the REST API to be deleted.
+		asset = next((current for current in release.assets() if current.name == asset.name), None)
+		if asset is None:
+			return
+
+	asset.delete()
+
+
+@contextmanager
+def _local_copy(
+		client: PyPIJSON,
+		url: str,
+		checksum: Optional[str],
+		tmpdir: PathPlus,
+		file_cache: Optional[FileCache] = None,
+		retry: RetryPolicy = DEFAULT_RETRY,
+		metrics: Optional[Metrics] = None,
+		digests: Optional[Mapping[str, str]] = None,
+		) -> Iterator[PathPlus]:
+	"""
+	Context manager giving the path to a local copy of the file with the given URL.
+
+	The file is taken from ``file_cache`` if possible, and otherwise downloaded into ``tmpdir``
+	and removed afterwards.
+
+	:param client:
+	:param url:
+	:param checksum: The sha256 checksum of the file. Files without a checksum are not cached.
+	:param tmpdir:
+	:param file_cache:
+	:param retry:
+	:param metrics:
+	:param digests: Mapping of digest names to the expected digests of the file.
+	"""
+
+	if file_cache is not None and checksum is not None:
+		with file_cache.use(client, url, checksum, retry, metrics, digests) as filename:
+			yield filename
+
+		return
+
+	filename = tmpdir / URL(url).name
+
+	try:
+		download_file(client, url, filename, checksum, retry, metrics, digests)
+		yield filename
+	finally:
+		if filename.exists():
+			filename.unlink()
 
 
 def copy_pypi_2_github(
@@ -190,7 +613,24 @@ def copy_pypi_2_github(
 		self_promotion=True,
 		max_tags: int = -1,
 		traceback: bool = False,
-		) -> None:
+		jobs: int = 1,
+		release_jobs: int = 1,
+		max_writes: Optional[int] = None,
+		client: Optional[PyPIJSON] = None,
+		pool_size: Optional[int] = None,
+		force_edit: bool = False,
+		metadata_cache: Optional[MetadataCache] = None,
+		state: Optional[SyncState] = None,
+		backend: Literal["rest", "graphql"] = "rest",
+		write_limit: Optional[ContextManager] = None,
+		file_cache: Optional[FileCache] = None,
+		retry: RetryPolicy = DEFAULT_RETRY,
+		dry_run: bool = False,
+		metrics: Optional[Metrics] = None,
+		max_age: Optional[datetime.timedelta] = DEFAULT_MAX_AGE,
+		tag_patterns: Optional[Sequence[str]] = None,
+		recent_only: bool = False,
+		) -> SyncSummary:
 	"""
 	The main function for ``OctoCheese``.
 
@@ -204,6 +644,65 @@ def copy_pypi_2_github(
 	:param max_tags: The maximum number of tags to process, starting with the most recent.
 		Set to ``-1`` to process all tags.
 	:param traceback: Show the full traceback on error.
+	:param jobs: The number of files to copy from PyPI at once for each release.
+	:param release_jobs: The number of releases to process at once.
+	:param max_writes: The maximum number of requests which modify the repository
+		to have in flight at once, across all releases.
+		If :py:obj:`None` the number is not limited.
+	:param client: The client to obtain metadata and download files from PyPI with.
+		If :py:obj:`None` a new client is created, and closed afterwards.
+		See :func:`~.make_pypi_client`.
+	:param pool_size: The maximum number of connections the new client keeps open to each PyPI host.
+		Defaults to the number of files which may be downloaded at once.
+		Ignored if ``client`` is given.
+	:param force_edit: Edit existing releases even if their name, message and prerelease status would not change.
+	:param metadata_cache: A cache of the project's metadata from PyPI.
+		If given, and PyPI reports the project has not changed since the last run which completed without errors
+		and found a tag for every recent release, nothing further is done.
+	:param state: A record of the releases and files copied by previous runs.
+		If given, releases whose files are all known to be on GitHub,
+		and whose message options have not changed, are skipped without any requests being made,
+		and only files not known to be on GitHub are copied for the others.
+		Releases found to be older than ``max_age`` are not checked again until the window is widened.
+		The state is updated, and saved, at the end of the run.
+	:param backend: The GitHub API used to list the repository's tags, releases and assets.
+		With ``'graphql'`` they are listed with :func:`~octocheese.graphql.fetch_inventory`,
+		which needs a single request for up to 100 tags and 100 releases.
+	:param write_limit: Context manager entered around each request which modifies the repository,
+		such as a :class:`threading.BoundedSemaphore` shared between several calls to this function.
+		Overrides ``max_writes``.
+	:param file_cache: A cache of files downloaded from PyPI, which may be shared between projects and runs.
+		See :class:`~.FileCache`.
+	:param retry: How to retry downloads from PyPI and uploads to GitHub which fail.
+		See :class:`~.RetryPolicy`.
+	:param dry_run: Work out what would be done, without downloading any files, making any changes on GitHub,
+		or updating ``metadata_cache`` and ``state``. A :class:`~.SyncPlan` is returned.
+	:param metrics: Records the time spent, bytes transferred and retries in each phase of the run.
+		See :mod:`octocheese.metrics`.
+	:param max_age: The update window. Existing GitHub releases created longer ago than this are left unchanged.
+		Missing releases are created however old they are.
+		If :py:obj:`None` existing releases are updated however old they are.
+	:param tag_patterns: Regular expressions matching the tags to process, each with a ``version`` group
+		capturing the version number. Tags matching none of the patterns are ignored.
+		Defaults to :py:data:`~.DEFAULT_TAG_PATTERN`. See :mod:`octocheese.tags`.
+	:param recent_only: Only process PyPI releases with a file uploaded within ``max_age``,
+		listing tags only until one has been found for each of them.
+		This needs fewer requests for a routine run, but releases older than the window
+		which are missing from GitHub are not created. Ignored if ``max_age`` is :py:obj:`None`.
+
+	Tags are matched to releases on PyPI after normalising their version numbers,
+	so the tag ``v1.2`` matches the release ``1.2.0``.
+
+	With the ``'rest'`` backend the repository's existing releases, and their assets,
+	are listed once with :func:`~.index_releases` (the first time a release is needed),
+	rather than being requested for each tag.
+
+	With ``recent_only``, tags are listed, most recent first, only until a tag has been found
+	for every PyPI release in the update window.
+	If there are no such releases nothing is requested from GitHub at all.
+
+	:returns: A summary of the outcome for each release and file.
+		The output for each release is printed in tag order regardless of ``release_jobs``.
 
 	.. versionchanged:: 0.1.0
 
@@ -213,6 +712,17 @@ def copy_pypi_2_github(
 
 		* Added the optional ``max_tags`` option.
 		* Added the optional ``traceback`` parameter.
+
+	.. versionchanged:: 0.8.0
+
+		* Added the ``jobs``, ``release_jobs``, ``max_writes``, ``client``, ``pool_size``,
+		  ``force_edit``, ``metadata_cache``, ``state``, ``backend``, ``write_limit``, ``file_cache``,
+		  ``retry``, ``dry_run``, ``metrics``, ``max_age``, ``tag_patterns`` and ``recent_only`` options.
+		* Now returns a :class:`~.SyncSummary`.
+		* Existing releases are listed in bulk rather than being requested for each tag.
+		* With ``recent_only``, tags whose PyPI release is older than the update window are not processed,
+		  and tags are only listed until the releases in the window have been found.
+		* Version numbers are normalised when matching tags to releases on PyPI.
 	"""
 
 	repo_name = str(repo_name)
@@ -223,28 +733,286 @@ def copy_pypi_2_github(
 
 	pypi_name = str(pypi_name)
 
-	with PyPIJSON() as client:
-		pypi_releases = client.get_metadata(pypi_name).get_releases_with_digests()
+	if backend not in {"rest", "graphql"}:
+		raise ValueError(f"Unknown backend {backend!r}")
+
+	if pool_size is None:
+		pool_size = jobs * release_jobs
+
+	summary = SyncPlan() if dry_run else SyncSummary()
+
+	# Requests are only counted for metrics provided by the caller,
+	# so hooks do not pile up on sessions shared between calls.
+	count_requests = metrics is not None
+
+	if metrics is None:
+		metrics = Metrics()
+
+	with _use_client(client, pool_size) as client:
+		if count_requests:
+			metrics.count_requests(g.session, "github")
+			metrics.count_requests(client.endpoint.session, "pypi")
+
+		if metadata_cache is None:
+			with metrics.time("metadata"):
+				metadata = client.get_metadata(pypi_name)
+		else:
+			with metrics.time("metadata"):
+				metadata, changed = metadata_cache.fetch(client, pypi_name)
+
+			if not changed:
+				info(f"Nothing has changed on PyPI for '{pypi_name}' since the last run. Skipping.")
+				return summary
+
+		pypi_releases = get_release_files(metadata)
+		version_index = VersionIndex(pypi_releases, tag_patterns)
+		window: Optional[_UpdateWindow] = None
+
+		if max_age is not None and recent_only:
+			window = _UpdateWindow(metadata, max_age, version_index)
+
+			if not window.versions:
+				info(f"No releases of '{pypi_name}' were uploaded to PyPI in the last {_format_age(max_age)}.")
+				return summary
+
+		repo: Repository = g.repository(github_username, repo_name)
+
+		if write_limit is None:
+			write_limit = nullcontext() if max_writes is None else threading.BoundedSemaphore(max_writes)
+		release_index: Mapping[str, Release]
+		state_key = f"{github_username}/{repo_name}"
+
+		def process_tag(tag: str) -> None:
+			version = version_index.match(tag)
+			if version is None:
+				warning(f"No PyPI release found for tag '{tag}'. Skipping.")
+				summary.record_release(tag, "no-pypi")
+				return
+
+			if window is not None and version not in window.versions:
+				info(f"Skipping tag {tag} as it is more than {_format_age(window.max_age)} old.")
+				summary.record_release(tag, "old")
+				return
+
+			file_urls = pypi_releases[version]
+			fingerprint = _message_fingerprint(pypi_name, tag, changelog, self_promotion)
+
+			if state is not None and not force_edit:
+				if state.is_frozen(state_key, tag, max_age):
+					summary.record_release(tag, "old")
+					return
+
+				file_urls = state.unsynced_files(state_key, tag, file_urls)
+
+				if not file_urls and state.get_fingerprint(state_key, tag) == fingerprint:
+					summary.record_release(tag, "synced")
+					return
+
+			info(f"Processing release for {version}")
+
+			release = update_github_release(
+					repo=repo,
+					tag_name=tag,
+					pypi_name=pypi_name,
+					changelog=changelog,
+					self_promotion=self_promotion,
+					file_urls=file_urls,
+					traceback=traceback,
+					jobs=jobs,
+					write_limit=write_limit,
+					summary=summary,
+					client=client,
+					force_edit=force_edit,
+					release_index=release_index,
+					file_cache=file_cache,
+					retry=retry,
+					dry_run=dry_run,
+					metrics=metrics,
+					max_age=max_age,
+					version=version,
+					)
+
+			if state is not None and not dry_run:
+				created_at = None if release is None else release.created_at
+				_update_state(state, state_key, tag, file_urls, fingerprint, summary, created_at)
+
+		with metrics.time("list-tags"):
+			if backend == "graphql":
+				inventory = fetch_inventory(g, repo, max_tags, stop=window)
+				tags = list(reversed(inventory.tags))
+				release_index = inventory.releases  # type: ignore[assignment]
+			else:
+				tags = list(reversed(_list_tags((tag.name for tag in repo.tags(max_tags)), window)))
+				release_index = _LazyReleaseIndex(repo, metrics)
 
-	repo: Repository = g.repository(github_username, repo_name)
+		tags_listed = len(tags)
 
-	for tag in reversed([tag.name for tag in repo.tags(max_tags)]):
-		version = tag.lstrip('v')
-		if version not in pypi_releases:
-			warning(f"No PyPI release found for tag '{tag}'. Skipping.")
-			continue
+		# Tags matching none of the patterns belong to something else, such as another project in the repository
+		tags = [tag for tag in tags if version_index.parse_tag(tag) is not None]
 
-		click.echo(f"Processing release for {version}")
+		try:
+			_map_in_order(process_tag, tags, jobs=release_jobs)
+		finally:
+			if state is not None and not dry_run:
+				state.save()
 
-		update_github_release(
-				repo=repo,
-				tag_name=tag,
-				pypi_name=pypi_name,
-				changelog=changelog,
-				self_promotion=self_promotion,
-				file_urls=pypi_releases[version],
-				traceback=traceback,
-				)
+		untagged = _untagged_versions(metadata, {version_index.match(tag) for tag in tags})
+		summary.untagged = untagged
+
+		if isinstance(summary, SyncPlan):
+			# The releases are only listed with the REST API if a release needed checking
+			summary.tags_listed = tags_listed
+			summary.graphql = backend == "graphql"
+			if not isinstance(release_index, _LazyReleaseIndex) or release_index.loaded:
+				summary.releases_listed = len(release_index)
+
+	if metadata_cache is not None and not summary.failed_files and not dry_run:
+		if untagged:
+			# The tags may be pushed after the upload, so check again next time even if PyPI is unchanged
+			info(f"Not caching the metadata for '{pypi_name}' as some releases have no tag yet: {', '.join(untagged)}")
+		else:
+			metadata_cache.commit(pypi_name)
+
+	return summary
+
+
+class _UpdateWindow:
+	"""
+	Tracks which of the PyPI releases in the update window have been found while listing a repository's tags.
+
+	:param metadata: The project's metadata from PyPI.
+	:param max_age: The length of the update window.
+	:param version_index: Used to match tags to versions on PyPI.
+	"""
+
+	def __init__(self, metadata: ProjectMetadata, max_age: datetime.timedelta, version_index: VersionIndex):
+		cutoff = UTCDateTime.utcnow() - max_age
+
+		self.max_age = max_age
+		self._version_index = version_index
+
+		#: The versions with a file uploaded to PyPI within the update window.
+		self.versions = {version for version, uploaded in get_release_times(metadata).items() if uploaded >= cutoff}
+
+		self._remaining = set(self.versions)
+
+	def __call__(self, tag_name: str) -> bool:
+		"""
+		Record that the given tag has been listed.
+
+		Returns :py:obj:`True` once a tag has been listed for every version in the window,
+		after which no more tags need to be listed.
+
+		:param tag_name:
+		"""
+
+		self._remaining.discard(self._version_index.match(tag_name))
+		return not self._remaining
+
+
+def _untagged_versions(metadata: ProjectMetadata, tagged: Set[Optional[str]]) -> List[str]:
+	"""
+	Returns the versions on PyPI which do not have a tag yet.
+
+	Versions uploaded before the oldest tagged version are assumed to predate the repository,
+	and are not returned.
+
+	:param metadata: The project's metadata from PyPI.
+	:param tagged: The versions which were matched to a tag.
+	"""
+
+	release_times = get_release_times(metadata)
+	tagged_times = [uploaded for version, uploaded in release_times.items() if version in tagged]
+
+	if not tagged_times:
+		return list(release_times)
+
+	oldest = min(tagged_times)
+	return [version for version, uploaded in release_times.items() if uploaded >= oldest and version not in tagged]
+
+
+def _list_tags(tag_names: Iterable[str], stop: Optional[Callable[[str], bool]] = None) -> List[str]:
+	"""
+	List tags from the given iterable until ``stop`` returns :py:obj:`True`.
+
+	:param tag_names: The tags, which may be fetched lazily from GitHub.
+	:param stop: Called with each tag name. Once it returns :py:obj:`True` no more tags are listed.
+	"""
+
+	tags = []
+
+	for tag_name in tag_names:
+		tags.append(tag_name)
+		if stop is not None and stop(tag_name):
+			break
+
+	return tags
+
+
+def _format_age(age: datetime.timedelta) -> str:
+	"""
+	Format the length of the update window for display.
+
+	:param age:
+	"""
+
+	if age % datetime.timedelta(days=1):
+		return str(age)
+	elif age.days == 1:
+		return "1 day"
+	else:
+		return f"{age.days} days"
+
+
+def _message_fingerprint(pypi_name: str, tag_name: str, changelog: str, self_promotion: bool) -> str:
+	"""
+	Returns a fingerprint of the options used to generate a release message.
+
+	:param pypi_name:
+	:param tag_name:
+	:param changelog:
+	:param self_promotion:
+	"""
+
+	options = json.dumps([pypi_name, tag_name, changelog, self_promotion])
+	return hashlib.sha256(options.encode("UTF-8")).hexdigest()
+
+
+def _update_state(
+		state: SyncState,
+		state_key: str,
+		tag_name: str,
+		file_urls: List[FileURL],
+		fingerprint: str,
+		summary: SyncSummary,
+		created_at: Optional[datetime.datetime] = None,
+		) -> None:
+	"""
+	Record the outcome for a release in the sync state.
+
+	:param state:
+	:param state_key: The repository, in the form ``<username>/<repository>``.
+	:param tag_name:
+	:param file_urls: The files which were to be copied.
+	:param fingerprint: The fingerprint of the options the release message was generated with.
+	:param summary: The summary the outcomes were recorded in.
+	:param created_at: The time the release was created.
+	"""
+
+	outcome = summary.releases.get(tag_name)
+
+	if outcome == "old":
+		state.freeze(state_key, tag_name, created_at)
+		return
+	elif outcome is None:
+		return
+
+	state.set_fingerprint(state_key, tag_name, fingerprint)
+
+	for file_url in file_urls:
+		filename = URL(file_url["url"]).name
+		if summary.files.get((tag_name, filename)) in {"copied", "replaced", "exists"}:
+			state.record_file(state_key, tag_name, filename, file_url["digest"])
 
 
 def make_release_message(
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+#
+#  graphql.py
+"""
+List a repository's tags, releases and release assets with the GitHub GraphQL API.
+
+The REST API needs one request per 100 tags, plus one per 100 releases.
+The GraphQL API returns 100 tags and 100 releases, each with up to 100 assets, in a single request.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import datetime
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# 3rd party
+import requests
+from github3 import GitHub
+from github3.repos import Repository
+from github3.repos.release import Asset, Release
+
+__all__ = ["GraphQLAsset", "GraphQLRelease", "RepositoryInventory", "fetch_inventory", "graphql_url"]
+
+_QUERY = """
+query(
+  $owner: String!, $name: String!,
+  $tagsCursor: String, $releasesCursor: String,
+  $tagsPage: Int!, $releasesPage: Int!
+) {
+  repository(owner: $owner, name: $name) {
+    refs(
+      refPrefix: "refs/tags/", first: $tagsPage, after: $tagsCursor,
+      orderBy: {field: TAG_COMMIT_DATE, direction: DESC}
+    ) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name }
+    }
+    releases(first: $releasesPage, after: $releasesCursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        tagName
+        name
+        description
+        isPrerelease
+        isDraft
+        createdAt
+        releaseAssets(first: 100) {
+          pageInfo { hasNextPage }
+          nodes { name size }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def graphql_url(g: GitHub) -> str:
+	"""
+	Returns the URL of the GraphQL API for the given GitHub instance.
+
+	:param g:
+	"""
+
+	url = g._build_url("graphql")
+
+	# GitHub Enterprise serves the REST API from /api/v3 but GraphQL from /api/graphql
+	if url.endswith("/api/v3/graphql"):
+		url = url[:-len("/v3/graphql")] + "/graphql"
+
+	return url
+
+
+class GraphQLAsset(NamedTuple):
+	"""
+	The name and size of a release asset, as listed by the GraphQL API.
+	"""
+
+	#: The name of the asset.
+	name: str
+
+	#: The size of the asset, in bytes.
+	size: int
+
+
+class GraphQLRelease:
+	"""
+	A release listed by the GraphQL API.
+
+	Provides the parts of the :class:`github3.repos.release.Release` interface used by :func:`~.update_github_release`.
+	The release is only requested from the REST API, with one request, if it needs to be modified.
+
+	:param repo: The repository the release belongs to.
+	:param node: The release's node in the GraphQL response.
+	"""
+
+	def __init__(self, repo: Repository, node: Dict[str, Any]):
+		self._repo = repo
+		self._rest_release: Optional[Release] = None
+		self._lock = threading.Lock()
+
+		self.id: int = node["databaseId"]
+		self.tag_name: str = node["tagName"]
+		self.name: Optional[str] = node["name"]
+		self.body: Optional[str] = node["description"]
+		self.prerelease: bool = node["isPrerelease"]
+		self.draft: bool = node["isDraft"]
+		self.created_at = datetime.datetime.fromisoformat(node["createdAt"].replace('Z', "+00:00"))
+
+		assets = node["releaseAssets"]
+		self._all_assets_listed: bool = not assets["pageInfo"]["hasNextPage"]
+		self._assets = [GraphQLAsset(asset["name"], asset["size"]) for asset in assets["nodes"]]
+
+	def __repr__(self) -> str:
+		return f"<{self.__class__.__name__} [{self.name}]>"
+
+	@property
+	def rest_release(self) -> Release:
+		"""
+		The release, as returned by the REST API.
+		"""
+
+		with self._lock:
+			if self._rest_release is None:
+				self._rest_release = self._repo.release(self.id)
+
+		return self._rest_release
+
+	@property
+	def original_assets(self) -> List[Any]:
+		"""
+		The release's assets.
+
+		If the release has more than 100 assets they are listed with the REST API instead.
+		"""
+
+		if self._all_assets_listed:
+			return list(self._assets)
+		else:
+			return list(self.rest_release.assets())
+
+	def assets(self) -> List[Any]:
+		"""
+		Returns the release's current assets, as listed by the REST API.
+
+		Unlike :attr:`~.GraphQLRelease.original_assets` these include the state of each asset.
+		"""
+
+		return list(self.rest_release.assets())
+
+	def edit(self, **kwargs) -> bool:
+		"""
+		Edit the release. Takes the same arguments as :meth:`github3.repos.release.Release.edit`.
+		"""
+
+		release = self.rest_release
+		successful = release.edit(**kwargs)
+
+		if successful:
+			self.name = release.name
+			self.body = release.body
+			self.prerelease = release.prerelease
+
+		return successful
+
+	def upload_asset(self, content_type: str, name: str, asset: Any, label: Optional[str] = None) -> Asset:
+		"""
+		Upload an asset to the release.
+		Takes the same arguments as :meth:`github3.repos.release.Release.upload_asset`.
+		"""
+
+		return self.rest_release.upload_asset(content_type, name, asset, label)
+
+
+class RepositoryInventory(NamedTuple):
+	"""
+	A repository's tags and published releases.
+	"""
+
+	#: The names of the repository's tags, starting with the most recent.
+	tags: List[str]
+
+	#: Mapping of tag names to the repository's published releases.
+	releases: Dict[str, GraphQLRelease]
+
+
+def fetch_inventory(
+		g: GitHub,
+		repo: Repository,
+		max_tags: int = -1,
+		page_size: int = 100,
+		stop: Optional[Callable[[str], bool]] = None,
+		) -> RepositoryInventory:
+	"""
+	List the repository's tags, and its releases with their assets, using the GraphQL API.
+
+	:param g:
+	:param repo:
+	:param max_tags: The maximum number of tags to list, starting with the most recent.
+		Set to ``-1`` to list all tags.
+	:param page_size: The number of tags and of releases to list in each request. The maximum is 100.
+	:param stop: Called with the name of each tag as it is listed.
+		Once it returns :py:obj:`True` no more tags are listed.
+
+	:raises:
+
+		* :exc:`requests.HTTPError` if the request fails.
+		* :exc:`ValueError` if the query returns an error.
+	"""
+
+	url = graphql_url(g)
+	variables: Dict[str, Any] = {
+			"owner": repo.owner.login,
+			"name": repo.name,
+			"tagsCursor": None,
+			"releasesCursor": None,
+			"tagsPage": page_size,
+			"releasesPage": page_size,
+			}
+
+	tags: List[str] = []
+	releases: Dict[str, GraphQLRelease] = {}
+	more_tags = more_releases = True
+
+	while more_tags or more_releases:
+		# Once a connection is exhausted only the other is paged through
+		variables["tagsPage"] = page_size if more_tags else 0
+		variables["releasesPage"] = page_size if more_releases else 0
+
+		response: requests.Response = g.session.post(url, json={"query": _QUERY, "variables": variables})
+
+		if response.status_code != 200:
+			raise requests.HTTPError(
+					f"An error occurred when querying the GraphQL API: HTTP Status {response.status_code}",
+					response=response,
+					)
+
+		data = response.json()
+
+		if data.get("errors"):
+			messages = "; ".join(error.get("message", str(error)) for error in data["errors"])
+			raise ValueError(f"The GraphQL query failed: {messages}")
+
+		repository = data["data"]["repository"]
+
+		if more_tags:
+			refs = repository["refs"]
+			stopped = False
+
+			for node in refs["nodes"]:
+				tags.append(node["name"])
+				if stop is not None and stop(node["name"]):
+					stopped = True
+					break
+
+			more_tags = refs["pageInfo"]["hasNextPage"] and not stopped and (max_tags == -1 or len(tags) < max_tags)
+			variables["tagsCursor"] = refs["pageInfo"]["endCursor"]
+
+		if more_releases:
+			connection = repository["releases"]
+			for node in connection["nodes"]:
+				if not node["isDraft"]:
+					releases[node["tagName"]] = GraphQLRelease(repo, node)
+
+			more_releases = connection["pageInfo"]["hasNextPage"]
+			variables["releasesCursor"] = connection["pageInfo"]["endCursor"]
+
+	if max_tags != -1:
+		tags = tags[:max_tags]
+
+	return RepositoryInventory(tags, releases)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+#
+#  metrics.py
+"""
+Timings, byte counts and request counts for each phase of a run of OctoCheese.
+
+The phases recorded by :func:`~.copy_pypi_2_github` are:
+
+* ``metadata`` -- obtaining the project's metadata from PyPI.
+* ``list-tags`` -- listing the repository's tags (and, with the GraphQL backend, its releases).
+* ``list-releases`` -- listing the repository's releases and their assets.
+* ``write-release`` -- creating and editing releases.
+* ``download`` -- downloading files from PyPI.
+* ``hash`` -- calculating the digests of downloaded files.
+  Files are hashed in a background thread while they download, so this time overlaps with the ``download`` phase,
+  and the ``MiB/s`` column of :meth:`Metrics.format() <.Metrics.format>` gives the hashing throughput.
+* ``upload`` -- uploading files to GitHub.
+
+:func:`octocheese.runner.run` also records the whole run as the ``total`` phase.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+# 3rd party
+import requests
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.stringlist import StringList
+from domdf_python_tools.typing import PathLike
+
+__all__ = ["PhaseMetrics", "Metrics"]
+
+
+class PhaseMetrics:
+	"""
+	The totals for a single phase.
+	"""
+
+	#: The number of times the phase was run.
+	count: int
+
+	#: The total time spent in the phase, in seconds, summed across threads.
+	seconds: float
+
+	#: The number of bytes transferred or processed in the phase.
+	bytes: int  # noqa: A003  # pylint: disable=redefined-builtin
+
+	#: The number of retries in the phase.
+	retries: int
+
+	def __init__(self) -> None:
+		self.count = 0
+		self.seconds = 0.0
+		self.bytes = 0
+		self.retries = 0
+
+	@property
+	def throughput(self) -> float:
+		"""
+		The number of bytes per second, or ``0`` if no time was spent in the phase.
+		"""
+
+		return self.bytes / self.seconds if self.seconds else 0.0
+
+	def as_dict(self) -> Dict[str, Any]:
+		"""
+		Returns the totals as a JSON-serialisable dictionary.
+		"""
+
+		return {"count": self.count, "seconds": self.seconds, "bytes": self.bytes, "retries": self.retries}
+
+
+class Metrics:
+	"""
+	Collects the timings, byte counts, retries and request counts of a run.
+
+	The methods of this class may be called from several threads at once.
+
+	:param clock: Function returning the current time in seconds, for measuring durations.
+	"""
+
+	#: Mapping of phase names to the totals for that phase, in the order the phases were first recorded.
+	phases: Dict[str, PhaseMetrics]
+
+	#: Mapping of service names to the number of HTTP requests made to that service.
+	requests: Counter
+
+	def __init__(self, clock: Callable[[], float] = time.perf_counter):
+		self.clock = clock
+		self.phases = {}
+		self.requests = Counter()
+		self._lock = threading.Lock()
+		self._sessions: List[requests.Session] = []
+
+	def _phase(self, phase: str) -> PhaseMetrics:
+		# Must be called with the lock held
+		if phase not in self.phases:
+			self.phases[phase] = PhaseMetrics()
+		return self.phases[phase]
+
+	@contextmanager
+	def time(self, phase: str) -> Iterator[None]:
+		"""
+		Context manager recording one run of the given phase, and the time spent in the ``with`` block.
+
+		:param phase:
+		"""
+
+		start = self.clock()
+
+		try:
+			yield
+		finally:
+			self.add_time(phase, self.clock() - start)
+
+	def add_time(self, phase: str, seconds: float, count: int = 1) -> None:
+		"""
+		Record time spent in the given phase.
+
+		:param phase:
+		:param seconds:
+		:param count: The number of runs of the phase the time was spent on.
+		"""
+
+		with self._lock:
+			metrics = self._phase(phase)
+			metrics.seconds += seconds
+			metrics.count += count
+
+	def add_bytes(self, phase: str, size: int) -> None:
+		"""
+		Record bytes transferred or processed in the given phase.
+
+		:param phase:
+		:param size: The number of bytes.
+		"""
+
+		with self._lock:
+			self._phase(phase).bytes += size
+
+	def add_retry(self, phase: str) -> None:
+		"""
+		Record a retry in the given phase.
+
+		:param phase:
+		"""
+
+		with self._lock:
+			self._phase(phase).retries += 1
+
+	def count_requests(self, session: requests.Session, service: str) -> None:
+		"""
+		Count the HTTP requests made with the given session.
+
+		Requests made with a session are only counted once, however many times this method is called for it.
+
+		:param session:
+		:param service: The name to record the requests under, such as ``'github'`` or ``'pypi'``.
+		"""
+
+		def hook(response: requests.Response, *args, **kwargs) -> None:
+			with self._lock:
+				self.requests[service] += 1
+
+		with self._lock:
+			if any(counted is session for counted in self._sessions):
+				return
+
+			self._sessions.append(session)
+
+		session.hooks["response"].append(hook)
+
+	def as_dict(self) -> Dict[str, Any]:
+		"""
+		Returns the metrics as a JSON-serialisable dictionary.
+		"""
+
+		with self._lock:
+			return {
+					"phases": {phase: metrics.as_dict() for phase, metrics in self.phases.items()},
+					"requests": dict(self.requests),
+					}
+
+	def format(self) -> str:  # noqa: A003  # pylint: disable=redefined-builtin
+		"""
+		Returns the metrics as a table.
+
+		Times are summed across threads, so may exceed the duration of the run.
+		"""
+
+		rows = [("Phase", "Count", "Seconds", "Bytes", "MiB/s", "Retries")]
+
+		with self._lock:
+			for phase, metrics in self.phases.items():
+				rows.append((
+						phase,
+						str(metrics.count),
+						f"{metrics.seconds:.2f}",
+						str(metrics.bytes),
+						f"{metrics.throughput / 1024 / 1024:.2f}" if metrics.bytes else '-',
+						str(metrics.retries),
+						))
+
+			requests_made = ", ".join(f"{service} {count}" for service, count in sorted(self.requests.items()))
+
+		widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+
+		buf = StringList(["Metrics:"])
+		buf.indent_type = "  "
+
+		with buf.with_indent_size(1):
+			for row in rows:
+				cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+				buf.append("  ".join(cells))
+
+			buf.append(f"Requests: {requests_made or 'none'}")
+
+		return str(buf)
+
+	def to_openmetrics(self) -> str:
+		"""
+		Returns the metrics in the OpenMetrics text format.
+		"""
+
+		families = [
+				("octocheese_phase_runs", None, "count"),
+				("octocheese_phase_seconds", "seconds", "seconds"),
+				("octocheese_phase_bytes", "bytes", "bytes"),
+				("octocheese_phase_retries", None, "retries"),
+				]
+
+		data = self.as_dict()
+		buf = StringList()
+
+		for name, unit, key in families:
+			buf.append(f"# TYPE {name} counter")
+			if unit:
+				buf.append(f"# UNIT {name} {unit}")
+			for phase, metrics in data["phases"].items():
+				buf.append(f'{name}_total{{phase="{phase}"}} {metrics[key]}')
+
+		buf.append("# TYPE octocheese_requests counter")
+		for service, count in sorted(data["requests"].items()):
+			buf.append(f'octocheese_requests_total{{service="{service}"}} {count}')
+
+		buf.append("# EOF")
+		buf.blankline(ensure_single=True)
+
+		return str(buf)
+
+	def dump(self, filename: PathLike) -> None:
+		"""
+		Write the metrics to the given file.
+
+		The file is written as JSON if its name ends in ``.json``, and in the OpenMetrics text format otherwise.
+
+		:param filename:
+		"""
+
+		filename = PathPlus(filename)
+
+		if filename.suffix == ".json":
+			filename.dump_json(self.as_dict(), indent=2)
+		else:
+			filename.write_clean(self.to_openmetrics())
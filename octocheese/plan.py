@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+#
+#  plan.py
+"""
+Describe what a run of OctoCheese would do, without doing it.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+from collections import Counter
+from typing import Any, Dict, Optional
+
+# 3rd party
+from domdf_python_tools.stringlist import StringList
+
+# this package
+from octocheese.summary import SyncSummary, _format_counts
+
+__all__ = ["SyncPlan", "RELEASE_ACTIONS", "FILE_ACTIONS"]
+
+#: Mapping of release outcomes to the name of the action in a plan, and its description.
+RELEASE_ACTIONS: Dict[str, Dict[str, str]] = {
+		"created": {"action": "create", "description": "to create"},
+		"updated": {"action": "edit", "description": "to edit"},
+		"unchanged": {"action": "unchanged", "description": "unchanged"},
+		"synced": {"action": "synced", "description": "already synced"},
+		"old": {"action": "old", "description": "older than the update window"},
+		"no-pypi": {"action": "no-pypi", "description": "without a PyPI release"},
+		}
+
+#: Mapping of file outcomes to the name of the action in a plan, and its description.
+FILE_ACTIONS: Dict[str, Dict[str, str]] = {
+		"copied": {"action": "upload", "description": "to upload"},
+		"replaced": {"action": "replace", "description": "to replace"},
+		"exists": {"action": "exists", "description": "already on GitHub"},
+		"failed": {"action": "failed", "description": "failed"},
+		}
+
+#: The number of tags or releases GitHub lists in each response.
+_PAGE_SIZE = 100
+
+
+def _pages(count: int) -> int:
+	# A listing takes one request even if it is empty
+	return max(1, -(-count // _PAGE_SIZE))
+
+
+class SyncPlan(SyncSummary):
+	"""
+	The releases and files a run of :func:`~.copy_pypi_2_github` would create, edit and upload.
+
+	Returned by :func:`~.copy_pypi_2_github` when ``dry_run`` is :py:obj:`True`.
+	The outcomes are recorded as for a :class:`~.SyncSummary`, but describe what would happen.
+	"""
+
+	#: The number of tags listed from GitHub, or :py:obj:`None` if the repository was not requested.
+	tags_listed: Optional[int]
+
+	#: The number of releases listed from GitHub, or :py:obj:`None` if the releases were not listed.
+	releases_listed: Optional[int]
+
+	#: Whether the tags and releases were listed with the GraphQL API, which lists both in the same requests.
+	graphql: bool
+
+	def __init__(self) -> None:
+		super().__init__()
+		self.tags_listed = None
+		self.releases_listed = None
+		self.graphql = False
+
+	@property
+	def upload_bytes(self) -> int:
+		"""
+		The total size, in bytes, of the files which would be uploaded.
+
+		Files whose size is not known are not counted.
+		"""
+
+		return sum(
+				self.sizes.get(key, 0) for key, outcome in self.files.items() if outcome in {"copied", "replaced"}
+				)
+
+	@property
+	def write_requests(self) -> int:
+		"""
+		An estimate of the number of requests which would modify the repository on GitHub.
+
+		Creating or editing a release, and uploading a file, each take one request.
+		Replacing a file takes two, one to delete the existing asset and one to upload the new file.
+		"""
+
+		release_counts = Counter(self.releases.values())
+		file_counts = Counter(self.files.values())
+
+		return (
+				release_counts["created"] + release_counts["updated"] + file_counts["copied"]
+				+ 2 * file_counts["replaced"]
+				)
+
+	@property
+	def read_requests(self) -> int:
+		"""
+		An estimate of the number of requests which would read from PyPI and GitHub.
+
+		The project's metadata is requested from PyPI, and the repository from GitHub, once each.
+		Tags and releases (with their assets) are listed 100 at a time,
+		and with the GraphQL API a single request lists up to 100 of each.
+
+		The same requests are made when planning, so this is based on what was listed for the plan.
+		"""
+
+		if self.tags_listed is None:
+			return 1
+
+		if self.graphql:
+			listings = _pages(max(self.tags_listed, self.releases_listed or 0))
+		else:
+			listings = _pages(self.tags_listed)
+			if self.releases_listed is not None:
+				listings += _pages(self.releases_listed)
+
+		return 2 + listings
+
+	@property
+	def api_requests(self) -> int:
+		"""
+		An estimate of the total number of requests to the PyPI and GitHub APIs,
+		excluding the downloads of the files to upload.
+		"""
+
+		return self.read_requests + self.write_requests
+
+	def as_dict(self) -> Dict[str, Any]:
+		"""
+		Returns the plan as a JSON-serialisable dictionary.
+
+		Releases and files are sorted by tag name and filename.
+		"""
+
+		files = []
+
+		for (tag_name, filename), outcome in sorted(self.files.items()):
+			files.append({
+					"tag": tag_name,
+					"filename": filename,
+					"action": FILE_ACTIONS[outcome]["action"],
+					"size": self.sizes.get((tag_name, filename)),
+					})
+
+		release_counts = Counter(self.releases.values())
+		file_counts = Counter(self.files.values())
+
+		return {
+				"releases": {
+						tag_name: RELEASE_ACTIONS[outcome]["action"]
+						for tag_name, outcome in sorted(self.releases.items())
+						},
+				"files": files,
+				"totals": {
+						"releases_to_create": release_counts["created"],
+						"releases_to_edit": release_counts["updated"],
+						"files_to_upload": file_counts["copied"],
+						"files_to_replace": file_counts["replaced"],
+						"upload_bytes": self.upload_bytes,
+						"read_requests": self.read_requests,
+						"write_requests": self.write_requests,
+						"api_requests": self.api_requests,
+						},
+				}
+
+	def format(self) -> str:  # noqa: A003  # pylint: disable=redefined-builtin
+		"""
+		Returns the plan as text.
+		"""
+
+		release_counts = Counter(self.releases.values())
+		file_counts = Counter(self.files.values())
+		release_descriptions = {outcome: action["description"] for outcome, action in RELEASE_ACTIONS.items()}
+		file_descriptions = {outcome: action["description"] for outcome, action in FILE_ACTIONS.items()}
+
+		buf = StringList(["Plan:"])
+		buf.indent_type = "  "
+
+		with buf.with_indent_size(1):
+			buf.append(f"Releases: {_format_counts(release_counts, release_descriptions)}")
+			buf.append(f"Files: {_format_counts(file_counts, file_descriptions)}")
+			buf.append(f"Upload size: {self.upload_bytes} bytes")
+			buf.append(f"Estimated read requests: {self.read_requests}")
+			buf.append(f"Estimated write requests: {self.write_requests}")
+			buf.append(f"Estimated API requests: {self.api_requests}")
+
+		return str(buf)
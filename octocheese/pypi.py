@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+#
+#  pypi.py
+"""
+Helpers for communicating with PyPI.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import datetime
+import xmlrpc.client
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# 3rd party
+import requests
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+from packaging.requirements import InvalidRequirement
+from packaging.utils import canonicalize_name
+from pypi_json import USER_AGENT, FileURL, ProjectMetadata, PyPIJSON
+from requests.adapters import HTTPAdapter
+
+__all__ = [
+		"DEFAULT_POOL_SIZE",
+		"make_pypi_client",
+		"get_release_files",
+		"get_release_times",
+		"get_last_serial",
+		"get_changelog",
+		"MetadataCache",
+		"ChangeDetector",
+		]
+
+#: The default number of connections kept open to each PyPI host.
+DEFAULT_POOL_SIZE: int = 10
+
+
+def make_pypi_client(pool_size: int = DEFAULT_POOL_SIZE) -> PyPIJSON:
+	"""
+	Create a PyPI client whose connections are kept alive and reused between requests.
+
+	A single client should be created for each run and shared between all downloads,
+	including from several threads, so each file does not pay for a new TCP and TLS handshake.
+
+	:param pool_size: The maximum number of connections to keep open to each host.
+		This should be at least the number of files downloaded at once.
+	"""
+
+	adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+	session = requests.Session()
+	session.headers["User-Agent"] = USER_AGENT
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+
+	return PyPIJSON(session=session)
+
+
+def get_release_files(metadata: ProjectMetadata) -> Dict[str, List[FileURL]]:
+	"""
+	Returns a dictionary mapping PyPI release versions to the files for that release.
+
+	As :meth:`ProjectMetadata.get_releases_with_digests <pypi_json.ProjectMetadata.get_releases_with_digests>`,
+	but each file also has a ``size`` key giving its size in bytes, where PyPI provides it,
+	and a ``digests`` key mapping the names of the digests PyPI lists for the file
+	(such as ``sha256`` and ``blake2b_256``) to their values.
+
+	:param metadata:
+	"""
+
+	if metadata.releases is None:
+		return metadata.get_releases_with_digests()
+
+	pypi_releases: Dict[str, List[FileURL]] = {}
+
+	for release, release_data in metadata.releases.items():
+		release_urls: List[FileURL] = []
+
+		for file in release_data:
+			file_url: FileURL = {"url": file["url"], "digest": file["digests"]["sha256"]}
+			if file.get("size") is not None:
+				file_url["size"] = file["size"]  # type: ignore[typeddict-unknown-key]
+			file_url["digests"] = dict(file["digests"])  # type: ignore[typeddict-unknown-key]
+			release_urls.append(file_url)
+
+		pypi_releases[release] = release_urls
+
+	return pypi_releases
+
+
+def get_release_times(metadata: ProjectMetadata) -> Dict[str, datetime.datetime]:
+	"""
+	Returns a dictionary mapping PyPI release versions to the time the most recent file for that release was uploaded.
+
+	Releases without any files are omitted.
+
+	:param metadata:
+	"""
+
+	release_times: Dict[str, datetime.datetime] = {}
+
+	for release, release_data in (metadata.releases or {}).items():
+		for file in release_data:
+			upload_time = file.get("upload_time_iso_8601") or file.get("upload_time")
+			if not upload_time:
+				continue
+
+			uploaded = datetime.datetime.fromisoformat(upload_time.replace('Z', "+00:00"))
+			if uploaded.tzinfo is None:
+				uploaded = uploaded.replace(tzinfo=datetime.timezone.utc)
+
+			if release not in release_times or uploaded > release_times[release]:
+				release_times[release] = uploaded
+
+	return release_times
+
+
+def _call_xmlrpc(client: PyPIJSON, method: str, *params: Any) -> Any:
+	"""
+	Call a method of the PyPI XML-RPC API, using the session of the given client.
+
+	:param client:
+	:param method:
+	:param params:
+	"""
+
+	response: requests.Response = client.endpoint.session.post(
+			str(client.endpoint).rstrip('/'),
+			data=xmlrpc.client.dumps(params, method),
+			headers={"Content-Type": "text/xml"},
+			timeout=client.timeout,
+			)
+	response.raise_for_status()
+
+	return xmlrpc.client.loads(response.content)[0][0]
+
+
+def get_last_serial(client: PyPIJSON) -> int:
+	"""
+	Returns the serial number of the most recent event on PyPI.
+
+	:param client:
+
+	:raises:
+
+		* :exc:`requests.HTTPError` if an error occurs when communicating with PyPI.
+		* :exc:`xmlrpc.client.Fault` if PyPI rejects the request.
+	"""
+
+	return int(_call_xmlrpc(client, "changelog_last_serial"))
+
+
+def get_changelog(client: PyPIJSON, since_serial: int) -> List[Tuple[str, Optional[str], int, str, int]]:
+	"""
+	Returns the events on PyPI since the given serial number,
+	as tuples of ``(name, version, timestamp, action, serial)``, oldest first.
+
+	:param client:
+	:param since_serial:
+
+	:raises:
+
+		* :exc:`requests.HTTPError` if an error occurs when communicating with PyPI.
+		* :exc:`xmlrpc.client.Fault` if PyPI rejects the request.
+	"""
+
+	changelog = _call_xmlrpc(client, "changelog_since_serial", since_serial)
+	return [tuple(event) for event in changelog]  # type: ignore[misc]
+
+
+class MetadataCache:
+	"""
+	On-disk cache of project metadata from the PyPI JSON API.
+
+	Metadata is requested with the ``ETag`` and ``Last-Modified`` values from the previous run,
+	so PyPI only sends the full document when the project has changed.
+
+	A newly fetched entry is only written to disk when :meth:`~.MetadataCache.commit` is called,
+	which should be done once the project has been copied to GitHub without errors.
+	A run which fails part way through is therefore repeated in full next time.
+
+	:param directory: The directory to store the metadata in.
+	"""
+
+	def __init__(self, directory: PathLike):
+		self.directory = PathPlus(directory)
+		self._pending: Dict[str, Dict[str, Any]] = {}
+
+	def _filename(self, project: str) -> PathPlus:
+		return self.directory / f"{canonicalize_name(project)}.json"
+
+	def load(self, project: str) -> Optional[Dict[str, Any]]:
+		"""
+		Returns the cache entry for the given project, or :py:obj:`None` if there is no usable entry.
+
+		:param project:
+		"""
+
+		filename = self._filename(project)
+
+		if not filename.is_file():
+			return None
+
+		try:
+			entry = filename.load_json()
+		except ValueError:
+			return None
+
+		if not isinstance(entry, dict) or "metadata" not in entry:
+			return None
+
+		return entry
+
+	def fetch(self, client: PyPIJSON, project: str) -> Tuple[ProjectMetadata, bool]:
+		"""
+		Returns the metadata for the given project, and whether it has changed since the last committed entry.
+
+		:param client:
+		:param project:
+
+		:raises:
+
+			* :exc:`packaging.requirements.InvalidRequirement` if the project cannot be found on PyPI.
+			* :exc:`requests.HTTPError` if an error occurs when communicating with PyPI.
+		"""
+
+		cached = self.load(project)
+		headers = {}
+
+		if cached is not None:
+			if cached.get("etag"):
+				headers["If-None-Match"] = cached["etag"]
+			if cached.get("last_modified"):
+				headers["If-Modified-Since"] = cached["last_modified"]
+
+		response: requests.Response = (client.endpoint / project / "json").get(
+				timeout=client.timeout,
+				headers=headers,
+				)
+
+		if response.status_code == 304 and cached is not None:
+			return ProjectMetadata(**cached["metadata"]), False
+		elif response.status_code == 404:
+			raise InvalidRequirement(f"No such project {project!r}")
+		elif response.status_code != 200:
+			raise requests.HTTPError(
+					f"An error occurred when obtaining project metadata for {project!r}: "
+					f"HTTP Status {response.status_code}",
+					response=response,
+					)
+
+		raw_metadata = response.json()
+		serial = raw_metadata.get("last_serial")
+
+		self._pending[canonicalize_name(project)] = {
+				"etag": response.headers.get("ETag"),
+				"last_modified": response.headers.get("Last-Modified"),
+				"serial": serial,
+				"metadata": raw_metadata,
+				}
+
+		changed = cached is None or serial is None or cached.get("serial") != serial
+		return ProjectMetadata(**raw_metadata), changed
+
+	def commit(self, project: str) -> None:
+		"""
+		Write the entry most recently fetched for the given project to disk.
+
+		:param project:
+		"""
+
+		entry = self._pending.pop(canonicalize_name(project), None)
+
+		if entry is not None:
+			self.directory.maybe_make(parents=True)
+			self._filename(project).dump_json(entry)
+
+	def invalidate(self, project: str) -> None:
+		"""
+		Discard the committed entry for the given project, so it is treated as changed by the next fetch.
+
+		Used when something other than PyPI has changed, such as a new tag being pushed to the repository.
+
+		:param project:
+		"""
+
+		self._filename(project).unlink(missing_ok=True)
+
+
+class ChangeDetector:
+	"""
+	Determines which projects have changed on PyPI since the last run, from PyPI's changelog.
+
+	A single request lists the events for every project on PyPI since the serial number recorded by the previous run,
+	so projects without new events can be skipped without requesting their metadata.
+
+	The serial number is only written to disk when :meth:`~.ChangeDetector.commit` is called.
+	Projects which failed are passed to :meth:`~.ChangeDetector.commit` so they are treated as changed next time.
+
+	:param filename: The JSON file to record the serial number in.
+	"""
+
+	def __init__(self, filename: PathLike):
+		self.filename = PathPlus(filename)
+		self._serial: Optional[int] = None
+		self._projects: Set[str] = set()
+
+	def load(self) -> Optional[Dict[str, Any]]:
+		"""
+		Returns the state recorded by the previous run, or :py:obj:`None` if there is no usable state.
+		"""
+
+		if not self.filename.is_file():
+			return None
+
+		try:
+			state = self.filename.load_json()
+		except ValueError:
+			return None
+
+		if not isinstance(state, dict) or not isinstance(state.get("serial"), int):
+			return None
+
+		return state
+
+	def fetch(self, client: PyPIJSON, projects: Iterable[str]) -> List[str]:
+		"""
+		Returns the projects which have changed since the previous run, in the order given.
+
+		Projects which were not given to the previous run are treated as changed,
+		as are all projects if there was no previous run.
+
+		:param client:
+		:param projects: The names of the projects to check.
+
+		:raises:
+
+			* :exc:`requests.HTTPError` if an error occurs when communicating with PyPI.
+			* :exc:`xmlrpc.client.Fault` if PyPI rejects the request.
+		"""
+
+		projects = list(projects)
+		self._projects = {canonicalize_name(name) for name in projects}
+		self._serial = None
+		state = self.load()
+
+		if state is None:
+			self._serial = get_last_serial(client)
+			return projects
+
+		changelog = get_changelog(client, state["serial"])
+		self._serial = max((event[4] for event in changelog), default=state["serial"])
+
+		changed = {canonicalize_name(event[0]) for event in changelog}
+		changed.update(state.get("retry", ()))
+		known = set(state.get("projects", ()))
+
+		return [name for name in projects if canonicalize_name(name) in changed or canonicalize_name(name) not in known]
+
+	def commit(self, retry: Iterable[str] = ()) -> None:
+		"""
+		Record the serial number obtained by the last call to :meth:`~.ChangeDetector.fetch`.
+
+		:param retry: The names of projects to treat as changed next time, such as those which failed.
+		"""
+
+		if self._serial is None:
+			return
+
+		self.filename.parent.maybe_make(parents=True)
+		self.filename.dump_json({
+				"serial": self._serial,
+				"projects": sorted(self._projects),
+				"retry": sorted({canonicalize_name(name) for name in retry}),
+				})
+		self._serial = None
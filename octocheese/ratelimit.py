@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+#
+#  ratelimit.py
+"""
+Pace requests to the GitHub API, and wait out rate limits rather than failing.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import threading
+import time
+from typing import Callable, Optional
+
+# 3rd party
+import requests
+from github3 import GitHub
+from requests.adapters import HTTPAdapter
+
+# this package
+from octocheese.colours import warning
+from octocheese.pypi import DEFAULT_POOL_SIZE
+
+__all__ = ["TokenBucket", "RateLimitedAdapter", "install_rate_limiter"]
+
+
+class TokenBucket:
+	"""
+	Limits the average rate of requests, while allowing short bursts.
+
+	The methods of this class may be called from several threads at once.
+
+	:param rate: The number of tokens added to the bucket each second.
+	:param capacity: The maximum number of tokens the bucket can hold, which is the largest burst allowed.
+		Defaults to ``rate``, or ``1`` if ``rate`` is less than one.
+	:param clock: Function returning the current time in seconds.
+	:param sleep: Function to wait for the given number of seconds.
+	"""
+
+	def __init__(
+			self,
+			rate: float,
+			capacity: Optional[float] = None,
+			*,
+			clock: Callable[[], float] = time.monotonic,
+			sleep: Callable[[float], None] = time.sleep,
+			):
+		if rate <= 0:
+			raise ValueError("'rate' must be greater than zero.")
+
+		self.rate = rate
+		self.capacity = max(1.0, rate) if capacity is None else capacity
+		self._clock = clock
+		self._sleep = sleep
+		self._lock = threading.Lock()
+		self._tokens = self.capacity
+		self._updated = clock()
+
+	def acquire(self) -> float:
+		"""
+		Take a token from the bucket, waiting until one is available.
+
+		:returns: The number of seconds spent waiting.
+		"""
+
+		with self._lock:
+			now = self._clock()
+			self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+			self._updated = now
+
+			# The token is reserved even when the bucket is empty, so threads are served in turn
+			self._tokens -= 1
+			wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+		if wait:
+			self._sleep(wait)
+
+		return wait
+
+
+class RateLimitedAdapter(HTTPAdapter):
+	"""
+	Transport adapter which paces requests to GitHub according to its rate limit headers.
+
+	* When ``X-RateLimit-Remaining`` falls below a tenth of ``X-RateLimit-Limit``,
+	  the remaining requests are spread out until ``X-RateLimit-Reset``.
+	* When the primary rate limit is exhausted no further requests are made until it resets.
+	* Responses indicating a secondary rate limit (``403`` or ``429``) are retried after the time
+	  given in the ``Retry-After`` header, or with exponential backoff if there is none.
+
+	A pause applies to all requests made through the adapter, from any thread.
+
+	:param bucket: Used to limit the average rate of requests. If :py:obj:`None` the rate is only
+		limited by the headers returned by GitHub.
+	:param max_retries_on_limit: The number of times to retry a request which was rate limited.
+	:param min_secondary_wait: The number of seconds to wait after a secondary rate limit with no ``Retry-After`` header.
+		This doubles with each retry.
+	:param pool_size: The maximum number of connections to keep open to each host.
+	:param clock: Function returning the current time, in seconds since the epoch.
+	:param sleep: Function to wait for the given number of seconds.
+	"""
+
+	#: The value of the ``X-RateLimit-Remaining`` header on the most recent response.
+	remaining: Optional[int]
+
+	#: The number of responses which were rate limited.
+	throttled: int
+
+	#: The total number of seconds requests have been delayed for.
+	waited: float
+
+	def __init__(
+			self,
+			bucket: Optional[TokenBucket] = None,
+			max_retries_on_limit: int = 5,
+			min_secondary_wait: float = 60.0,
+			pool_size: int = DEFAULT_POOL_SIZE,
+			*,
+			clock: Callable[[], float] = time.time,
+			sleep: Callable[[float], None] = time.sleep,
+			):
+		super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+		self.bucket = bucket
+		self.max_retries_on_limit = max_retries_on_limit
+		self.min_secondary_wait = min_secondary_wait
+		self._clock = clock
+		self._sleep = sleep
+		self._lock = threading.Lock()
+		self._resume_at = 0.0
+		self._interval = 0.0
+		self._last_request = 0.0
+		self.remaining = None
+		self.throttled = 0
+		self.waited = 0.0
+
+	def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:  # type: ignore[override]
+		attempt = 0
+
+		while True:
+			self._wait_turn()
+			response = super().send(request, **kwargs)
+			self._update_from_headers(response)
+
+			delay = self._limit_delay(response, attempt)
+			if delay is None or attempt >= self.max_retries_on_limit or not _rewind(request):
+				return response
+
+			with self._lock:
+				self.throttled += 1
+				self._resume_at = max(self._resume_at, self._clock() + delay)
+
+			warning(f"GitHub rate limit reached. Retrying in {delay:.0f} seconds.")
+			response.close()
+			attempt += 1
+
+	def _wait_turn(self) -> None:
+		"""
+		Wait until a request may be made.
+		"""
+
+		waited = self.bucket.acquire() if self.bucket is not None else 0.0
+
+		with self._lock:
+			now = self._clock()
+			start = max(now, self._resume_at, self._last_request + self._interval)
+			self._last_request = start
+
+		if start > now:
+			self._sleep(start - now)
+			waited += start - now
+
+		if waited:
+			with self._lock:
+				self.waited += waited
+
+	def _update_from_headers(self, response: requests.Response) -> None:
+		"""
+		Update the pacing from the rate limit headers of the response.
+
+		:param response:
+		"""
+
+		remaining = _int_header(response, "X-RateLimit-Remaining")
+		limit = _int_header(response, "X-RateLimit-Limit")
+		reset = _int_header(response, "X-RateLimit-Reset")
+
+		if remaining is None:
+			return
+
+		with self._lock:
+			self.remaining = remaining
+			until_reset = max(0.0, reset - self._clock()) if reset is not None else 0.0
+
+			if remaining == 0:
+				# Without the reset time there is nothing to pace by; the next request is retried once it is limited.
+				if reset is not None:
+					self._resume_at = max(self._resume_at, self._clock() + until_reset + 1)
+				self._interval = 0.0
+			elif limit and remaining < limit / 10:
+				self._interval = until_reset / remaining
+			else:
+				self._interval = 0.0
+
+	def _limit_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+		"""
+		Returns the number of seconds to wait before retrying, or :py:obj:`None` if the response was not rate limited.
+
+		:param response:
+		:param attempt: The number of times the request has already been retried.
+		"""
+
+		if response.status_code not in {403, 429}:
+			return None
+
+		retry_after = response.headers.get("Retry-After")
+		if retry_after is not None:
+			try:
+				return max(0.0, float(retry_after))
+			except ValueError:
+				pass
+
+		reset = _int_header(response, "X-RateLimit-Reset")
+		if response.headers.get("X-RateLimit-Remaining") == '0' and reset is not None:
+			return max(0.0, reset - self._clock()) + 1
+
+		if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+			return self.min_secondary_wait * 2**attempt
+
+		# A 403 for some other reason, such as insufficient permissions
+		return None
+
+
+def _int_header(response: requests.Response, header: str) -> Optional[int]:
+	try:
+		return int(response.headers[header])
+	except (KeyError, ValueError):
+		return None
+
+
+def _rewind(request: requests.PreparedRequest) -> bool:
+	"""
+	Prepare the request to be sent again, returning whether that is possible.
+
+	:param request:
+	"""
+
+	body = request.body
+
+	if body is None or isinstance(body, (bytes, str)):
+		return True
+
+	if hasattr(body, "seek"):
+		try:
+			body.seek(0)
+			return True
+		except OSError:
+			return False
+
+	return False
+
+
+def install_rate_limiter(
+		g: GitHub,
+		rate: Optional[float] = None,
+		capacity: Optional[float] = None,
+		pool_size: int = DEFAULT_POOL_SIZE,
+		) -> RateLimitedAdapter:
+	"""
+	Route all requests made with ``g`` through a :class:`~.RateLimitedAdapter`.
+
+	:param g:
+	:param rate: The maximum average number of requests per second. If :py:obj:`None` the rate is
+		only limited by the headers returned by GitHub.
+	:param capacity: The largest burst of requests allowed when ``rate`` is given. Defaults to ``rate``.
+	:param pool_size: The maximum number of connections to keep open to each GitHub host.
+		This should be at least the number of requests made at once.
+
+	:returns: The adapter, which records how often requests were rate limited.
+	"""
+
+	bucket = None if rate is None else TokenBucket(rate, capacity)
+	adapter = RateLimitedAdapter(bucket, pool_size=pool_size)
+
+	g.session.mount("https://", adapter)
+	g.session.mount("http://", adapter)
+
+	return adapter
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+#
+#  runner.py
+"""
+Run OctoCheese for a single repository, as the command line interface and the GitHub Action do.
+
+This module is kept light to import, with the GitHub and PyPI clients imported when :func:`~.run` is called,
+so the action starts quickly.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import datetime
+from typing import Optional, Sequence
+
+# 3rd party
+import click
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.secrets import Secret
+from domdf_python_tools.typing import PathLike
+
+__all__ = ["run"]
+
+
+def run(
+		github_token: Secret,
+		github_username: str,
+		repo_name: str,
+		pypi_name: str,
+		self_promotion: bool = True,
+		max_tags: int = -1,
+		jobs: int = 1,
+		release_jobs: int = 1,
+		max_writes: Optional[int] = None,
+		pool_size: Optional[int] = None,
+		force_edit: bool = False,
+		cache_dir: Optional[PathLike] = None,
+		state_file: Optional[PathLike] = None,
+		backend: str = "rest",
+		api_rate: Optional[float] = None,
+		file_cache_size: int = 1024,
+		retries: int = 3,
+		dry_run: bool = False,
+		plan_file: Optional[PathLike] = None,
+		metrics_file: Optional[PathLike] = None,
+		max_age: float = 7,
+		tag_patterns: Sequence[str] = (),
+		tag_prefix: Optional[str] = None,
+		recent_only: bool = False,
+		) -> None:
+	"""
+	Helper function for when running as script or action.
+
+	:param github_token: The token to authenticate with the GitHub API with.
+		See https://help.github.com/en/github/authenticating-to-github/creating-a-personal-access-token
+		for instructions on generating a token.
+	:param github_username: The username of the GitHub account that owns the repository.
+	:param repo_name: The name of the GitHub repository.
+	:param pypi_name: The name of the package on PyPI.
+	:param self_promotion: Show information about OctoCheese at the bottom of the release message.
+	:param max_tags: The maximum number of tags to process, starting with the most recent.
+		Set to ``-1`` to process all tags.
+	:param jobs: The number of files to copy from PyPI at once for each release.
+	:param release_jobs: The number of releases to process at once.
+	:param max_writes: The maximum number of concurrent requests which modify the repository.
+		If :py:obj:`None` the number is not limited.
+	:param pool_size: The maximum number of connections to keep open to each PyPI host.
+		Defaults to the number of files which may be downloaded at once.
+	:param force_edit: Edit existing releases even if only the "Last Updated" date in the message would change.
+	:param cache_dir: A directory to cache data from previous runs in.
+		If given, the run is skipped if nothing has changed on PyPI since the last successful run.
+	:param state_file: A JSON file recording the releases and files copied by previous runs.
+		If given, releases which are already up to date are skipped without any requests to GitHub.
+	:param backend: The GitHub API used to list tags, releases and assets. Either ``'rest'`` or ``'graphql'``.
+	:param api_rate: The maximum average number of GitHub API requests per second.
+		If :py:obj:`None` requests are only paced according to the rate limit headers returned by GitHub.
+	:param file_cache_size: The maximum size, in MiB, of the files downloaded from PyPI kept in ``cache_dir``,
+		so they need not be downloaded again. Set to ``0`` to disable the file cache.
+	:param retries: The number of times to retry a failed download from PyPI or upload to GitHub.
+	:param dry_run: Print what would be done, without downloading any files or making any changes on GitHub.
+	:param plan_file: Write what would be done to this file as JSON (see :meth:`.SyncPlan.as_dict`).
+		Implies ``dry_run``.
+	:param metrics_file: Write the time spent, bytes transferred and retries in each phase of the run to this file,
+		as JSON if its name ends in ``.json`` and in the OpenMetrics text format otherwise.
+		See :class:`~.Metrics`.
+	:param max_age: The update window, in days. Existing releases on GitHub created longer ago than this
+		are left unchanged. Set to ``-1`` to update all releases.
+	:param tag_patterns: Regular expressions matching the tags to process. See :mod:`octocheese.tags`.
+	:param tag_prefix: Only process tags which are this prefix followed by a version number.
+		Combined with ``tag_patterns`` if both are given.
+	:param recent_only: Only process releases uploaded to PyPI within ``max_age`` days,
+		so older releases missing from GitHub are not created.
+
+	.. versionchanged:: 0.1.0
+
+		Added the ``self_promotion`` option.
+
+	.. versionchanged:: 0.3.0
+
+		Added the ``max_tags`` option.
+
+	.. versionchanged:: 0.8.0
+
+		* Added the ``jobs``, ``release_jobs``, ``max_writes``, ``pool_size``, ``force_edit``,
+		  ``cache_dir``, ``state_file``, ``backend``, ``api_rate``, ``file_cache_size``, ``retries``,
+		  ``dry_run``, ``plan_file``, ``metrics_file``, ``max_age``, ``tag_patterns``, ``tag_prefix``
+		  and ``recent_only`` options.
+		* A summary of the run, and a table of timings for each phase, are printed at the end.
+		* Requests to GitHub are paced according to its rate limit headers,
+		  and rate limited requests are retried after waiting.
+		* Moved from :mod:`octocheese.__main__`, from which it can still be imported.
+	"""
+
+	# 3rd party
+	from github3 import GitHub
+	from github3_utils import echo_rate_limit
+
+	# this package
+	from octocheese.core import copy_pypi_2_github
+	from octocheese.metrics import Metrics
+	from octocheese.pypi import DEFAULT_POOL_SIZE, MetadataCache
+	from octocheese.ratelimit import install_rate_limiter
+	from octocheese.state import SyncState
+	from octocheese.tags import prefix_pattern
+	from octocheese.transfer import FileCache, RetryPolicy
+
+	g = GitHub(token=github_token.value)
+	rate_limiter = install_rate_limiter(g, rate=api_rate, pool_size=max(jobs * release_jobs, DEFAULT_POOL_SIZE))
+
+	if cache_dir is None:
+		metadata_cache = None
+		file_cache = None
+	else:
+		metadata_cache = MetadataCache(PathPlus(cache_dir) / "metadata")
+		file_cache = FileCache(PathPlus(cache_dir) / "files", file_cache_size * 1024 * 1024) if file_cache_size else None
+
+	state = None if state_file is None else SyncState(state_file)
+
+	if plan_file is not None:
+		dry_run = True
+
+	tag_patterns = list(tag_patterns)
+	if tag_prefix:
+		tag_patterns.append(prefix_pattern(tag_prefix))
+
+	metrics = Metrics()
+
+	click.echo(f"Running for repo {github_username}/{repo_name}")
+
+	with echo_rate_limit(g, True), metrics.time("total"):
+		summary = copy_pypi_2_github(
+				g,
+				repo_name,
+				github_username,
+				pypi_name=pypi_name,
+				self_promotion=self_promotion,
+				max_tags=max_tags,
+				jobs=jobs,
+				release_jobs=release_jobs,
+				max_writes=max_writes,
+				pool_size=pool_size,
+				force_edit=force_edit,
+				metadata_cache=metadata_cache,
+				state=state,
+				backend=backend,  # type: ignore[arg-type]
+				file_cache=file_cache,
+				retry=RetryPolicy(retries=retries),
+				dry_run=dry_run,
+				metrics=metrics,
+				max_age=None if max_age < 0 else datetime.timedelta(days=max_age),
+				tag_patterns=tag_patterns or None,
+				recent_only=recent_only,
+				)
+
+	click.echo(summary.format())
+	click.echo(metrics.format())
+
+	if plan_file is not None:
+		PathPlus(plan_file).dump_json(summary.as_dict(), indent=2)  # type: ignore[attr-defined]
+
+	if metrics_file is not None:
+		metrics.dump(metrics_file)
+
+	if rate_limiter.throttled:
+		click.echo(
+				f"Rate limited by GitHub {rate_limiter.throttled} time(s). "
+				f"Waited {rate_limiter.waited:.0f} seconds in total."
+				)
@@ -0,0 +1,687 @@
+#!/usr/bin/env python3
+#
+#  service.py
+"""
+Run OctoCheese as a long-running service, copying projects when they change rather than on a schedule.
+
+The service listens for HTTP requests on the following paths:
+
+* ``POST /github`` -- a GitHub webhook.
+  ``release`` events (when a release is published) and ``create`` events (when a tag is pushed)
+  queue the projects mirrored to that repository.
+* ``POST /pypi`` -- a notification that a new file has been uploaded to PyPI,
+  as a JSON object of the form ``{"project": "octocheese"}``.
+  This can be sent by the workflow which uploads the project.
+* ``GET /health`` -- the projects waiting to be copied, and the number of runs so far.
+* ``GET /metrics`` -- the timings and byte counts for each phase, in the OpenMetrics text format.
+
+If a secret is given, the ``POST`` requests must be signed with it in the ``X-Hub-Signature-256`` header,
+as GitHub does for webhooks.
+
+Queued projects are not copied immediately. A project is copied once no further events have arrived for it
+for ``delay`` seconds, or ``max_delay`` seconds after the first event, whichever is sooner.
+A burst of events, such as the upload of a dozen wheels, therefore results in a single run.
+
+PyPI is also polled when the service starts, and every ``poll_interval`` seconds if given, in case any events
+were missed. If a change detector is given only projects with new events in PyPI's changelog since the previous poll
+are queued, along with any projects which failed or were incomplete last time; otherwise all projects are queued.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import hashlib
+import hmac
+import json
+import threading
+import time
+import xmlrpc.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+# 3rd party
+import click
+import requests
+from consolekit import click_command
+from consolekit.options import auto_default_option
+from domdf_python_tools.paths import PathPlus, TemporaryPathPlus
+from domdf_python_tools.secrets import Secret
+from github3 import GitHub
+from github3_utils.click import token_option
+from packaging.utils import canonicalize_name
+
+# this package
+from octocheese.batch import BatchProject, BatchReport, load_manifest, run_batch
+from octocheese.colours import info, warning
+from octocheese.core import _use_client
+from octocheese.metrics import Metrics
+from octocheese.pypi import ChangeDetector, MetadataCache
+from octocheese.state import SyncState
+from octocheese.transfer import FileCache, RetryPolicy
+
+__all__ = ["SyncQueue", "SyncService", "verify_signature", "main"]
+
+#: The largest request body accepted, in bytes.
+_MAX_BODY_SIZE = 1024 * 1024
+
+#: The actions of ``release`` events which queue the repository's projects.
+_RELEASE_ACTIONS = {"published", "created"}
+
+_Response = Tuple[int, str, bytes]
+
+
+class SyncQueue:
+	"""
+	Queue of projects waiting to be copied, which merges repeated events for the same project.
+
+	The methods of this class may be called from several threads at once.
+
+	:param delay: The time to wait after the latest event for a project before it is due, in seconds.
+	:param max_delay: The longest time to wait after the first event for a project before it is due, in seconds.
+	:param clock: Function returning the current time in seconds.
+	"""
+
+	def __init__(
+			self,
+			delay: float = 10.0,
+			max_delay: float = 60.0,
+			clock: Callable[[], float] = time.monotonic,
+			):
+		self.delay = delay
+		self.max_delay = max_delay
+		self.clock = clock
+		self._condition = threading.Condition()
+		self._pending: Dict[str, Tuple[float, float, Set[str]]] = {}
+		self._closed = False
+
+	def _due_time(self, name: str) -> float:
+		first, last, _ = self._pending[name]
+		return min(last + self.delay, first + self.max_delay)
+
+	def add(self, name: str, reason: str) -> bool:
+		"""
+		Queue the given project, or postpone it if it is already queued.
+
+		Returns :py:obj:`True` if the project was not already queued.
+
+		:param name:
+		:param reason: The source of the event, such as ``'github'`` or ``'pypi'``.
+		"""
+
+		with self._condition:
+			now = self.clock()
+
+			if name in self._pending:
+				first, _, reasons = self._pending[name]
+				self._pending[name] = (first, now, reasons | {reason})
+				new = False
+			else:
+				self._pending[name] = (now, now, {reason})
+				new = True
+
+			self._condition.notify_all()
+			return new
+
+	@property
+	def pending(self) -> List[str]:
+		"""
+		The queued projects, in the order they were first queued.
+		"""
+
+		with self._condition:
+			return list(self._pending)
+
+	@property
+	def closed(self) -> bool:
+		"""
+		Whether :meth:`~.SyncQueue.close` has been called.
+		"""
+
+		return self._closed
+
+	def pop_due(self, timeout: Optional[float] = None) -> Dict[str, Set[str]]:
+		"""
+		Wait until at least one project is due, then remove the due projects from the queue.
+
+		Returns a mapping of the due projects to the sources of their events, in the order they were first queued.
+		The mapping is empty if no projects became due within ``timeout`` seconds, or if the queue was closed.
+
+		:param timeout: The longest time to wait, in seconds. If :py:obj:`None` wait indefinitely.
+		"""
+
+		with self._condition:
+			deadline = None if timeout is None else self.clock() + timeout
+
+			while not self._closed:
+				now = self.clock()
+				due = [name for name in self._pending if self._due_time(name) <= now]
+
+				if due:
+					return {name: self._pending.pop(name)[2] for name in due}
+
+				wait = min((self._due_time(name) - now for name in self._pending), default=None)
+
+				if deadline is not None:
+					if deadline <= now:
+						break
+					wait = deadline - now if wait is None else min(wait, deadline - now)
+
+				self._condition.wait(wait)
+
+			return {}
+
+	def close(self) -> None:
+		"""
+		Close the queue, waking any threads waiting in :meth:`~.SyncQueue.pop_due`.
+		"""
+
+		with self._condition:
+			self._closed = True
+			self._condition.notify_all()
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+	"""
+	Returns whether the signature of a request body is valid.
+
+	:param secret: The secret shared with the sender.
+	:param body:
+	:param signature: The value of the ``X-Hub-Signature-256`` header, in the form ``sha256=<hex digest>``.
+	"""
+
+	if not signature or not signature.startswith("sha256="):
+		return False
+
+	expected = hmac.new(secret.encode("UTF-8"), body, hashlib.sha256).hexdigest()
+	return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def _json_response(data: Any, status: int = 200) -> _Response:
+	return status, "application/json", json.dumps(data).encode("UTF-8")
+
+
+def _parse_content_length(value: Optional[str]) -> Optional[int]:
+	"""
+	Returns the length given in a ``Content-Length`` header, or :py:obj:`None` if the header is missing.
+
+	:param value: The value of the header.
+
+	:raises ValueError: If the value is not a non-negative integer.
+	"""
+
+	if value is None:
+		return None
+
+	value = value.strip()
+
+	# int() alone would also accept signs, underscores and non-ASCII digits
+	if not value.isascii() or not value.isdigit():
+		raise ValueError(f"Invalid Content-Length {value!r}")
+
+	return int(value)
+
+
+class SyncService:
+	"""
+	Copies the projects listed in a batch manifest from PyPI to GitHub as events arrive for them.
+
+	:param g:
+	:param projects:
+	:param secret: The secret requests must be signed with. If :py:obj:`None` requests are not checked.
+	:param delay: The time to wait after the latest event for a project before copying it, in seconds.
+	:param max_delay: The longest time to wait after the first event for a project before copying it, in seconds.
+	:param poll_interval: The time between polls of PyPI, in seconds.
+		If :py:obj:`None` PyPI is only polled when the service starts.
+	:param ignore_sender: The GitHub login OctoCheese authenticates as.
+		``release`` events sent because OctoCheese created a release are ignored.
+	:param clock: Function returning the current time in seconds.
+	:param change_detector: Used to only queue the projects which have changed on PyPI when polling.
+		If :py:obj:`None` every poll queues all projects.
+	:param batch_options: Keyword arguments for :func:`~.run_batch`.
+	"""
+
+	#: The number of times projects have been copied.
+	runs: int
+
+	#: The report from the most recent run, or :py:obj:`None` if there have been no runs.
+	last_report: Optional[BatchReport]
+
+	def __init__(
+			self,
+			g: GitHub,
+			projects: List[BatchProject],
+			*,
+			secret: Optional[str] = None,
+			delay: float = 10.0,
+			max_delay: float = 60.0,
+			poll_interval: Optional[float] = None,
+			ignore_sender: Optional[str] = None,
+			clock: Callable[[], float] = time.monotonic,
+			change_detector: Optional[ChangeDetector] = None,
+			**batch_options: Any,
+			):
+		self.g = g
+		self.projects = list(projects)
+		self.secret = secret
+		self.poll_interval = poll_interval
+		self.ignore_sender = ignore_sender
+		self.batch_options = batch_options
+		self.queue = SyncQueue(delay, max_delay, clock)
+		self.change_detector = change_detector
+		self.runs = 0
+		self.last_report = None
+
+		# Projects queued by a poll which have not been copied yet,
+		# and projects which failed or were incomplete when last copied.
+		self._polled: Set[str] = set()
+		self._retry: Set[str] = set()
+
+		self._by_repo: Dict[str, List[str]] = {}
+		self._by_name: Dict[str, str] = {}
+
+		for project in self.projects:
+			self._by_repo.setdefault(project.repo.lower(), []).append(project.pypi_name)
+			self._by_name[canonicalize_name(project.pypi_name)] = project.pypi_name
+
+	def _queue(self, names: List[str], reason: str) -> List[str]:
+		for name in names:
+			if self.queue.add(name, reason):
+				info(f"Queued {name} ({reason})")
+
+		return names
+
+	def handle_github_event(self, event: str, payload: Mapping[str, Any]) -> List[str]:
+		"""
+		Queue the projects affected by a GitHub webhook event, and return their names.
+
+		:param event: The value of the ``X-GitHub-Event`` header.
+		:param payload:
+		"""
+
+		if event == "release":
+			if payload.get("action") not in _RELEASE_ACTIONS:
+				return []
+			if self.ignore_sender is not None and payload.get("sender", {}).get("login") == self.ignore_sender:
+				return []
+		elif event == "create":
+			if payload.get("ref_type") != "tag":
+				return []
+		else:
+			return []
+
+		repo = payload.get("repository", {}).get("full_name", '')
+		return self._queue(self._by_repo.get(repo.lower(), []), "github")
+
+	def handle_pypi_notification(self, payload: Mapping[str, Any]) -> List[str]:
+		"""
+		Queue the project named in a notification of an upload to PyPI, and return its name.
+
+		:param payload: A mapping of the form ``{"project": "octocheese"}``.
+		"""
+
+		project = payload.get("project")
+
+		if not isinstance(project, str) or canonicalize_name(project) not in self._by_name:
+			return []
+
+		return self._queue([self._by_name[canonicalize_name(project)]], "pypi")
+
+	def poll(self) -> List[str]:
+		"""
+		Queue the projects which have changed on PyPI since the previous poll, and return their names.
+
+		All projects are queued if there is no change detector, or if PyPI's changelog cannot be obtained.
+		"""
+
+		names = [project.pypi_name for project in self.projects]
+
+		if self.change_detector is not None:
+			try:
+				with _use_client(self.batch_options.get("client"), 1) as client:
+					names = self.change_detector.fetch(client, names)
+			except (requests.RequestException, xmlrpc.client.Error) as e:
+				warning(f"Unable to obtain the changelog from PyPI: {e}. Queueing all projects.")
+
+		self._polled.update(names)
+		self._commit_changes()
+
+		return self._queue(names, "poll")
+
+	def _commit_changes(self) -> None:
+		# The serial number is only recorded once the projects queued by the poll have been copied,
+		# so they are not missed if the service stops first.
+		if self.change_detector is not None and not self._polled:
+			self.change_detector.commit(retry=self._retry)
+
+	def handle_request(self, method: str, path: str, headers: Mapping[str, str], body: bytes) -> _Response:
+		"""
+		Returns the response to an HTTP request, as the status code, content type and body.
+
+		:param method:
+		:param path: The path of the request, including the query string.
+		:param headers:
+		:param body:
+		"""
+
+		path = path.split('?', 1)[0].rstrip('/')
+		headers = {key.lower(): value for key, value in headers.items()}
+
+		if path == "/health" and method == "GET":
+			return _json_response({
+					"pending": self.queue.pending,
+					"runs": self.runs,
+					"errors": sorted(self.last_report.errors) if self.last_report else [],
+					})
+
+		if path == "/metrics" and method == "GET":
+			metrics: Optional[Metrics] = self.batch_options.get("metrics")
+			content = (metrics or Metrics()).to_openmetrics()
+			return 200, "application/openmetrics-text; version=1.0.0; charset=utf-8", content.encode("UTF-8")
+
+		if path not in {"/github", "/pypi"}:
+			return _json_response({"message": "Not Found"}, 404)
+
+		if method != "POST":
+			return _json_response({"message": "Method Not Allowed"}, 405)
+
+		if self.secret is not None and not verify_signature(self.secret, body, headers.get("x-hub-signature-256")):
+			return _json_response({"message": "Invalid signature."}, 401)
+
+		try:
+			payload = json.loads(body)
+		except ValueError:
+			return _json_response({"message": "The request body must be JSON."}, 400)
+
+		if not isinstance(payload, dict):
+			return _json_response({"message": "The request body must be a JSON object."}, 400)
+
+		if path == "/github":
+			queued = self.handle_github_event(headers.get("x-github-event", ''), payload)
+		else:
+			queued = self.handle_pypi_notification(payload)
+
+		return _json_response({"queued": queued}, 202)
+
+	def run_pending(self, timeout: Optional[float] = None) -> Optional[BatchReport]:
+		"""
+		Wait until at least one project is due, then copy the due projects.
+
+		Returns the report of the run, or :py:obj:`None` if no projects became due within ``timeout`` seconds.
+
+		:param timeout: The longest time to wait, in seconds. If :py:obj:`None` wait indefinitely.
+		"""
+
+		due = self.queue.pop_due(timeout)
+
+		if not due:
+			return None
+
+		metadata_cache: Optional[MetadataCache] = self.batch_options.get("metadata_cache")
+
+		if metadata_cache is not None:
+			# A change on GitHub, such as a deleted release, may need work when the metadata on PyPI is unchanged,
+			# so the cache would otherwise skip the project.
+			for name, reasons in due.items():
+				if "github" in reasons:
+					metadata_cache.invalidate(name)
+
+		projects = [project for project in self.projects if project.pypi_name in due]
+		report = run_batch(self.g, projects, **self.batch_options)
+
+		incomplete = set(report.incomplete)
+		for name in due:
+			self._polled.discard(name)
+			if name in incomplete:
+				self._retry.add(name)
+			else:
+				self._retry.discard(name)
+
+		self._commit_changes()
+
+		self.runs += 1
+		self.last_report = report
+		info(report.format())
+
+		return report
+
+	def make_server(self, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+		"""
+		Returns an HTTP server which passes requests to :meth:`~.SyncService.handle_request`.
+
+		:param host:
+		:param port:
+		"""
+
+		service = self
+
+		class Handler(BaseHTTPRequestHandler):
+
+			def handle_method(self) -> None:
+				try:
+					length = _parse_content_length(self.headers.get("Content-Length"))
+				except ValueError:
+					length = -1
+
+				# The body cannot be read, so the connection is closed rather than reused after responding
+				if length is None and self.command == "POST":
+					status, content_type, content = _json_response({"message": "Length Required."}, 411)
+					self.close_connection = True
+				elif length is not None and length < 0:
+					status, content_type, content = _json_response({"message": "Invalid Content-Length."}, 400)
+					self.close_connection = True
+				elif length is not None and length > _MAX_BODY_SIZE:
+					status, content_type, content = _json_response({"message": "Request body too large."}, 413)
+					self.close_connection = True
+				else:
+					body = self.rfile.read(length or 0)
+					status, content_type, content = service.handle_request(
+							self.command,
+							self.path,
+							dict(self.headers),
+							body,
+							)
+
+				self.send_response(status)
+				self.send_header("Content-Type", content_type)
+				self.send_header("Content-Length", str(len(content)))
+				self.end_headers()
+				self.wfile.write(content)
+
+			do_GET = do_POST = handle_method
+
+			def log_message(self, format: str, *args: Any) -> None:  # noqa: A002  # pylint: disable=redefined-builtin
+				pass
+
+		server = ThreadingHTTPServer((host, port), Handler)
+		server.daemon_threads = True
+		return server
+
+	def serve(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+		"""
+		Listen for events, and copy projects as they become due, until :meth:`~.SyncService.stop` is called.
+
+		:param host:
+		:param port:
+		"""
+
+		server = self.make_server(host, port)
+		thread = threading.Thread(target=server.serve_forever, args=(0.5, ), daemon=True)
+		thread.start()
+		info(f"Listening on http://{host}:{server.server_address[1]}")
+
+		clock = self.queue.clock
+		next_poll = None if self.poll_interval is None else clock() + self.poll_interval
+		self.poll()
+
+		try:
+			while not self.queue.closed:
+				timeout = None if next_poll is None else max(next_poll - clock(), 0)
+				self.run_pending(timeout)
+
+				if next_poll is not None and clock() >= next_poll:
+					self.poll()
+					next_poll = clock() + self.poll_interval  # type: ignore[operator]
+		finally:
+			server.shutdown()
+			server.server_close()
+
+	def stop(self) -> None:
+		"""
+		Stop :meth:`~.SyncService.serve` once the current run has finished.
+		"""
+
+		self.queue.close()
+
+
+@auto_default_option(
+		"--max-writes",
+		type=click.IntRange(min=1),
+		help="The maximum number of concurrent requests which modify repositories. Unlimited if not given.",
+		)
+@auto_default_option(
+		"-P",
+		"--project-jobs",
+		type=click.IntRange(min=1),
+		help="The number of projects to process at once.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--retries",
+		type=click.IntRange(min=0),
+		help="The number of times to retry a failed download or upload.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--api-rate",
+		type=click.FloatRange(min=0.01),
+		help="The maximum average number of GitHub API requests per second. Unlimited if not given.",
+		)
+@auto_default_option(
+		"--state-file",
+		type=click.Path(dir_okay=False, writable=True),
+		help="A JSON file recording the releases and files already copied. Those releases are skipped.",
+		)
+@auto_default_option(
+		"--file-cache-size",
+		type=click.IntRange(min=0),
+		help="The maximum size, in MiB, of the files downloaded from PyPI kept in --cache-dir. 0 disables the cache.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--cache-dir",
+		type=click.Path(file_okay=False, writable=True),
+		help="A directory to cache data from previous runs in. Unchanged projects are skipped.",
+		)
+@auto_default_option(
+		"--poll-interval",
+		type=click.FloatRange(min=1),
+		help="The time between checks for projects changed on PyPI, in minutes. If not given only checked at startup.",
+		)
+@auto_default_option(
+		"--max-delay",
+		type=click.FloatRange(min=0),
+		help="The longest time to wait after the first event for a project before copying it, in seconds.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--delay",
+		type=click.FloatRange(min=0),
+		help="The time to wait after the latest event for a project before copying it, in seconds.",
+		show_default=True,
+		)
+@auto_default_option(
+		"--secret",
+		type=click.STRING,
+		envvar="OCTOCHEESE_WEBHOOK_SECRET",
+		show_envvar=True,
+		help="The secret requests must be signed with. Requests are not checked if not given.",
+		)
+@auto_default_option("--port", type=click.IntRange(0, 65535), help="The port to listen on.", show_default=True)
+@auto_default_option("--host", type=click.STRING, help="The address to listen on.", show_default=True)
+@token_option("GITHUB_TOKEN")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click_command()
+def main(
+		manifest: str,
+		token: str,
+		host: str = "127.0.0.1",
+		port: int = 8000,
+		secret: Optional[str] = None,
+		delay: float = 10.0,
+		max_delay: float = 60.0,
+		poll_interval: Optional[float] = None,
+		cache_dir: Optional[str] = None,
+		file_cache_size: int = 1024,
+		state_file: Optional[str] = None,
+		api_rate: Optional[float] = None,
+		retries: int = 3,
+		project_jobs: int = 1,
+		max_writes: Optional[int] = None,
+		) -> None:
+	"""
+	Copy the PyPI projects listed in MANIFEST to GitHub Releases as GitHub webhooks and PyPI notifications arrive.
+	"""
+
+	# this package
+	from octocheese.ratelimit import install_rate_limiter
+
+	try:
+		projects = load_manifest(manifest)
+	except ValueError as e:
+		raise click.UsageError(str(e))
+
+	g = GitHub(token=Secret(token).value)
+	install_rate_limiter(g, rate=api_rate)
+
+	if cache_dir is None:
+		metadata_cache = None
+		file_cache = None
+	else:
+		metadata_cache = MetadataCache(PathPlus(cache_dir) / "metadata")
+		file_cache = FileCache(PathPlus(cache_dir) / "files", file_cache_size * 1024 * 1024) if file_cache_size else None
+
+	me = g.me()
+
+	# Without a cache directory the serial number is only kept for the lifetime of the service,
+	# so every project is copied at startup.
+	with TemporaryPathPlus() as tmpdir:
+		service = SyncService(
+				g,
+				projects,
+				secret=secret,
+				delay=delay,
+				max_delay=max_delay,
+				poll_interval=None if poll_interval is None else poll_interval * 60,
+				ignore_sender=me.login if me else None,
+				change_detector=ChangeDetector(PathPlus(cache_dir or tmpdir) / "service_changelog.json"),
+				project_jobs=project_jobs,
+				max_writes=max_writes,
+				metadata_cache=metadata_cache,
+				state=None if state_file is None else SyncState(state_file),
+				file_cache=file_cache,
+				retry=RetryPolicy(retries=retries),
+				metrics=Metrics(),
+				)
+
+		try:
+			service.serve(host, port)
+		except KeyboardInterrupt:
+			info("Stopped")
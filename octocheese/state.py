@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+#
+#  state.py
+"""
+Record which releases and files have already been copied, so later runs can skip them.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import datetime
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+# 3rd party
+from apeye_core import URL
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+from pypi_json import FileURL
+
+__all__ = ["SyncState"]
+
+
+class SyncState:
+	"""
+	A JSON file recording, for each repository and tag, the files which are known to be on GitHub
+	and the options the release message was last generated with.
+
+	The file is small enough to be committed to the repository,
+	or kept between workflow runs with `actions/cache <https://github.com/actions/cache>`_.
+
+	The methods of this class may be called from several threads at once.
+
+	:param filename: The file to load the state from, and later save it to. It need not exist yet.
+	"""
+
+	#: The version of the file format.
+	format_version: int = 1
+
+	#: The file the state is saved to.
+	filename: PathPlus
+
+	def __init__(self, filename: PathLike):
+		self.filename = PathPlus(filename)
+		self._lock = threading.Lock()
+		self._save_lock = threading.Lock()
+		self._repos: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+		if self.filename.is_file():
+			with self.filename.open(encoding="UTF-8") as fp:
+				data = json.load(fp)
+
+			if data.get("version") == self.format_version:
+				self._repos = data.get("repos", {})
+
+	def _tag(self, repo: str, tag_name: str) -> Dict[str, Any]:
+		return self._repos.get(repo, {}).get(tag_name, {})
+
+	def _tag_for_update(self, repo: str, tag_name: str) -> Dict[str, Any]:
+		return self._repos.setdefault(repo, {}).setdefault(tag_name, {"files": {}})
+
+	def is_frozen(self, repo: str, tag_name: str, max_age: Optional[datetime.timedelta]) -> bool:
+		"""
+		Returns whether the release for the tag is too old to be updated with the given update window,
+		and so need not be checked.
+
+		The release must have been frozen with :meth:`~.SyncState.freeze`, and created longer ago than ``max_age``.
+		Releases frozen without their creation time are frozen for any update window.
+
+		:param repo: The repository, in the form ``<username>/<repository>``.
+		:param tag_name:
+		:param max_age: The update window. If :py:obj:`None` no release is frozen.
+		"""
+
+		if max_age is None:
+			return False
+
+		with self._lock:
+			frozen = self._tag(repo, tag_name).get("frozen", False)
+
+		if isinstance(frozen, str):
+			created_at = datetime.datetime.fromisoformat(frozen)
+			return (datetime.datetime.now(datetime.timezone.utc) - max_age) > created_at
+
+		return bool(frozen)
+
+	def freeze(self, repo: str, tag_name: str, created_at: Optional[datetime.datetime] = None) -> None:
+		"""
+		Record that the release for the tag is too old to be updated.
+
+		:param repo: The repository, in the form ``<username>/<repository>``.
+		:param tag_name:
+		:param created_at: The time the release was created,
+			so it is checked again if a later run has a wider update window.
+		"""
+
+		with self._lock:
+			if created_at is None:
+				self._tag_for_update(repo, tag_name)["frozen"] = True
+			else:
+				frozen = created_at.astimezone(datetime.timezone.utc).isoformat()
+				self._tag_for_update(repo, tag_name)["frozen"] = frozen
+
+	def get_fingerprint(self, repo: str, tag_name: str) -> Optional[str]:
+		"""
+		Returns the fingerprint of the options the release message was last generated with.
+
+		:param repo: The repository, in the form ``<username>/<repository>``.
+		:param tag_name:
+		"""
+
+		with self._lock:
+			return self._tag(repo, tag_name).get("fingerprint")
+
+	def set_fingerprint(self, repo: str, tag_name: str, fingerprint: str) -> None:
+		"""
+		Record the fingerprint of the options the release message was generated with.
+
+		:param repo: The repository, in the form ``<username>/<repository>``.
+		:param tag_name:
+		:param fingerprint:
+		"""
+
+		with self._lock:
+			self._tag_for_update(repo, tag_name)["fingerprint"] = fingerprint
+
+	def record_file(self, repo: str, tag_name: str, filename: str, digest: Optional[str]) -> None:
+		"""
+		Record that the file is on GitHub.
+
+		:param repo: The repository, in the form ``<username>/<repository>``.
+		:param tag_name:
+		:param filename:
+		:param digest: The sha256 checksum of the file, if known.
+		"""
+
+		with self._lock:
+			self._tag_for_update(repo, tag_name)["files"][filename] = digest
+
+	def unsynced_files(self, repo: str, tag_name: str, file_urls: List[FileURL]) -> List[FileURL]:
+		"""
+		Returns the files from ``file_urls`` which are not known to be on GitHub with the same checksum.
+
+		:param repo: The repository, in the form ``<username>/<repository>``.
+		:param tag_name:
+		:param file_urls:
+		"""
+
+		with self._lock:
+			synced = self._tag(repo, tag_name).get("files", {})
+
+		return [
+				file_url for file_url in file_urls
+				if URL(file_url["url"]).name not in synced or synced[URL(file_url["url"]).name] != file_url["digest"]
+				]
+
+	def save(self) -> None:
+		"""
+		Save the state to :attr:`~.SyncState.filename`.
+
+		The file is replaced in one step, so an interrupted save does not leave a corrupt file behind.
+		"""
+
+		with self._save_lock:
+			with self._lock:
+				data = {"version": self.format_version, "repos": self._repos}
+				content = json.dumps(data, indent=2, sort_keys=True)
+
+			self.filename.parent.maybe_make(parents=True)
+			tmp_filename = self.filename.with_name(self.filename.name + ".tmp")
+			tmp_filename.write_clean(content)
+			os.replace(tmp_filename, self.filename)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#
+#  summary.py
+"""
+Record the outcome of a run of OctoCheese.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# 3rd party
+from domdf_python_tools.stringlist import StringList
+
+__all__ = ["SyncSummary", "RELEASE_OUTCOMES", "FILE_OUTCOMES"]
+
+#: The possible outcomes for a release, and their descriptions in the summary.
+RELEASE_OUTCOMES: Dict[str, str] = {
+		"created": "created",
+		"updated": "updated",
+		"unchanged": "unchanged",
+		"synced": "already synced",
+		"old": "older than the update window",
+		"no-pypi": "without a PyPI release",
+		}
+
+#: The possible outcomes for a file, and their descriptions in the summary.
+FILE_OUTCOMES: Dict[str, str] = {
+		"copied": "copied",
+		"replaced": "replaced",
+		"exists": "already on GitHub",
+		"failed": "failed",
+		}
+
+
+class SyncSummary:
+	"""
+	Collects the outcome of each release and file processed by :func:`~.copy_pypi_2_github`.
+
+	The methods of this class may be called from several threads at once.
+	"""
+
+	#: Mapping of tag names to the outcome for that release.
+	releases: Dict[str, str]
+
+	#: Mapping of ``(tag_name, filename)`` to the outcome for that file.
+	files: Dict[Tuple[str, str], str]
+
+	#: Mapping of ``(tag_name, filename)`` to the size of that file in bytes, for files whose size is known.
+	sizes: Dict[Tuple[str, str], int]
+
+	#: The versions on PyPI which had no tag on GitHub yet.
+	#: Their releases will be created once the tags are pushed.
+	untagged: List[str]
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self.releases = {}
+		self.files = {}
+		self.sizes = {}
+		self.untagged = []
+
+	def record_release(self, tag_name: str, outcome: str) -> None:
+		"""
+		Record the outcome for a release.
+
+		:param tag_name:
+		:param outcome: One of the keys of :py:data:`~.RELEASE_OUTCOMES`.
+		"""
+
+		if outcome not in RELEASE_OUTCOMES:
+			raise ValueError(f"Unknown outcome {outcome!r}")
+
+		with self._lock:
+			self.releases[tag_name] = outcome
+
+	def record_file(self, tag_name: str, filename: str, outcome: str, size: Optional[int] = None) -> None:
+		"""
+		Record the outcome for a file.
+
+		:param tag_name:
+		:param filename:
+		:param outcome: One of the keys of :py:data:`~.FILE_OUTCOMES`.
+		:param size: The size of the file in bytes, if known.
+		"""
+
+		if outcome not in FILE_OUTCOMES:
+			raise ValueError(f"Unknown outcome {outcome!r}")
+
+		with self._lock:
+			self.files[(tag_name, filename)] = outcome
+			if size is not None:
+				self.sizes[(tag_name, filename)] = size
+
+	@property
+	def failed_files(self) -> List[Tuple[str, str]]:
+		"""
+		The ``(tag_name, filename)`` pairs of the files which could not be copied, in sorted order.
+		"""
+
+		return sorted(key for key, outcome in self.files.items() if outcome == "failed")
+
+	@property
+	def skipped_edits(self) -> int:
+		"""
+		The number of existing releases which were not edited because nothing would have changed.
+		"""
+
+		return sum(outcome == "unchanged" for outcome in self.releases.values())
+
+	def format(self) -> str:  # noqa: A003  # pylint: disable=redefined-builtin
+		"""
+		Returns the summary as text.
+
+		The text is the same regardless of the order in which releases and files were processed.
+		"""
+
+		release_counts = Counter(self.releases.values())
+		file_counts = Counter(self.files.values())
+
+		buf = StringList(["Summary:"])
+		buf.indent_type = "  "
+
+		with buf.with_indent_size(1):
+			buf.append(f"Releases: {_format_counts(release_counts, RELEASE_OUTCOMES)}")
+			buf.append(f"Files: {_format_counts(file_counts, FILE_OUTCOMES)}")
+
+			for tag_name, filename in self.failed_files:
+				buf.append(f"Failed: {filename} ({tag_name})")
+
+		return str(buf)
+
+
+def _format_counts(counts: Counter, outcomes: Dict[str, str]) -> str:
+	parts = [f"{counts[outcome]} {description}" for outcome, description in outcomes.items() if counts[outcome]]
+	return ", ".join(parts) or "none"
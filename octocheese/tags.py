@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+#
+#  tags.py
+"""
+Match the tags of a GitHub repository to releases on PyPI.
+
+Each tag pattern is a regular expression which must match the whole tag name,
+with a group named ``version`` capturing the version number. For example:
+
+* ``v?(?P<version>.+)`` -- the default, matching ``1.2.3`` and ``v1.2.3``.
+* ``release-(?P<version>.+)`` -- matching ``release-1.2.3``.
+* ``octocheese-v?(?P<version>.+)`` -- matching ``octocheese-v1.2.3`` in a repository containing several projects.
+  This pattern can be created with :func:`~.prefix_pattern`.
+
+Versions are compared after normalisation, so the tag ``v1.2`` matches the release ``1.2.0``,
+and ``1.0-post1`` matches ``1.0.post1``.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Union
+
+# 3rd party
+from packaging.version import InvalidVersion, Version
+
+__all__ = ["DEFAULT_TAG_PATTERN", "VersionIndex", "prefix_pattern"]
+
+#: The default tag pattern, matching tags which are a version number with an optional leading ``v``.
+DEFAULT_TAG_PATTERN = r"v?(?P<version>.+)"
+
+
+def prefix_pattern(prefix: str) -> str:
+	"""
+	Returns a tag pattern matching tags which are the given prefix followed by a version number.
+
+	The version number may have a leading ``v``.
+
+	:param prefix: For example ``'octocheese-'``.
+	"""
+
+	return re.escape(prefix) + DEFAULT_TAG_PATTERN
+
+
+class VersionIndex:
+	"""
+	An index of a project's releases on PyPI, keyed by their normalised version numbers.
+
+	The index is built once, so each tag is matched to a release with a single dictionary lookup
+	for each tag pattern.
+
+	:param versions: The versions of the project on PyPI.
+	:param tag_patterns: Regular expressions matching the repository's tags. See :mod:`octocheese.tags`.
+		Defaults to :py:data:`~.DEFAULT_TAG_PATTERN`.
+
+	:raises ValueError: If a tag pattern is invalid, or has no ``version`` group.
+	"""
+
+	#: The compiled tag patterns, in the order they are tried.
+	patterns: List[Pattern]
+
+	def __init__(self, versions: Iterable[str], tag_patterns: Optional[Sequence[str]] = None):
+		self.patterns = []
+
+		for pattern in tag_patterns or [DEFAULT_TAG_PATTERN]:
+			try:
+				compiled = re.compile(pattern)
+			except re.error as e:
+				raise ValueError(f"Invalid tag pattern {pattern!r}: {e}") from None
+
+			if "version" not in compiled.groupindex:
+				raise ValueError(f"The tag pattern {pattern!r} has no 'version' group.")
+
+			self.patterns.append(compiled)
+
+		self._index: Dict[Union[Version, str], str] = {}
+
+		for version in versions:
+			self._index[_normalise(version)] = version
+
+	def parse_tag(self, tag_name: str) -> Optional[str]:
+		"""
+		Returns the version number in the given tag name, or :py:obj:`None` if the tag matches none of the patterns.
+
+		:param tag_name:
+		"""
+
+		for pattern in self.patterns:
+			match = pattern.fullmatch(tag_name)
+			if match:
+				return match.group("version")
+
+		return None
+
+	def lookup(self, version: str) -> Optional[str]:
+		"""
+		Returns the version on PyPI equal to the given version once normalised,
+		or :py:obj:`None` if there is no such release.
+
+		:param version:
+		"""
+
+		return self._index.get(_normalise(version))
+
+	def match(self, tag_name: str) -> Optional[str]:
+		"""
+		Returns the version on PyPI corresponding to the given tag,
+		or :py:obj:`None` if the tag matches none of the patterns or there is no such release.
+
+		:param tag_name:
+		"""
+
+		for pattern in self.patterns:
+			match = pattern.fullmatch(tag_name)
+			if match:
+				version = self.lookup(match.group("version"))
+				if version is not None:
+					return version
+
+		return None
+
+
+def _normalise(version: str) -> Union[Version, str]:
+	"""
+	Returns the normalised form of the version, or the version itself if it is not a valid :pep:`440` version.
+
+	:param version:
+	"""
+
+	try:
+		return Version(version)
+	except InvalidVersion:
+		return version
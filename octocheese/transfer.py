@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+#
+#  transfer.py
+"""
+Functions for moving files from PyPI to GitHub.
+
+.. versionadded:: 0.8.0
+"""
+#
+#  Copyright (c) 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU Lesser General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+# stdlib
+import hashlib
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, suppress
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, Mapping, NamedTuple, Optional, Union
+
+# 3rd party
+import requests
+from apeye_core import URL
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+from github3.exceptions import ServerError, TransportError, UnprocessableEntity
+from github3.repos.release import Asset, Release
+from pypi_json import PyPIJSON
+
+# this package
+from octocheese.colours import warning
+from octocheese.metrics import Metrics
+
+__all__ = [
+		"CHUNK_SIZE",
+		"SUPPORTED_DIGESTS",
+		"RetryPolicy",
+		"DEFAULT_RETRY",
+		"download_file",
+		"upload_file",
+		"FileCache",
+		]
+
+#: The size of the chunks files are read and written in, in bytes.
+CHUNK_SIZE: int = 1024 * 1024
+
+#: Mapping of the names PyPI gives its file digests to functions returning a new hash object for that digest.
+#:
+#: .. versionadded:: 0.8.0
+SUPPORTED_DIGESTS: Dict[str, Callable[[], "hashlib._Hash"]] = {
+		"sha256": hashlib.sha256,
+		"blake2b_256": partial(hashlib.blake2b, digest_size=32),
+		}
+
+#: The number of chunks which may be waiting to be hashed before the download waits for the hashing thread.
+_HASH_QUEUE_SIZE = 8
+
+#: HTTP status codes which indicate a temporary failure, after which a download is retried.
+_RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RetryPolicy(NamedTuple):
+	"""
+	How often, and how quickly, a failed transfer is retried.
+
+	The delay before each retry is chosen at random between zero and ``backoff * 2 ** attempt`` seconds
+	(up to ``max_backoff`` seconds), so that several failed transfers do not all retry at the same moment.
+
+	.. versionadded:: 0.8.0
+	"""
+
+	#: The number of times to retry a failed transfer.
+	retries: int = 3
+
+	#: The base delay between attempts, in seconds.
+	backoff: float = 1.0
+
+	#: The longest delay between attempts, in seconds.
+	max_backoff: float = 60.0
+
+	def delay(self, attempt: int) -> float:
+		"""
+		Returns the time to wait, in seconds, before retrying after the given attempt.
+
+		:param attempt: The number of the failed attempt, starting from zero.
+		"""
+
+		return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+
+#: The default :class:`~.RetryPolicy`.
+DEFAULT_RETRY = RetryPolicy()
+
+
+class _RetryableResponse(Exception):
+	pass
+
+
+#: Exceptions raised while downloading a file after which the download is retried.
+_RETRY_EXCEPTIONS = (
+		requests.ConnectionError,
+		requests.Timeout,
+		requests.exceptions.ChunkedEncodingError,
+		_RetryableResponse,
+		)
+
+
+_RESET = object()
+_STOP = object()
+
+
+class _Hasher:
+	"""
+	Calculates the digests of data in a background thread, while the caller carries on receiving the next chunk.
+
+	:mod:`hashlib` releases the GIL while hashing large chunks, so hashing overlaps with network and disk I/O.
+	At most :py:data:`~._HASH_QUEUE_SIZE` chunks are held in memory waiting to be hashed.
+
+	Use as a context manager; the digests are available from :meth:`~._Hasher.hexdigests` once the block is exited.
+
+	:param algorithms: The names of the digests to calculate, from :py:data:`~.SUPPORTED_DIGESTS`.
+	:param clock: Function returning the current time, used to time the hashing.
+	"""
+
+	#: The time spent hashing, in seconds.
+	seconds: float
+
+	def __init__(self, algorithms: Iterable[str], clock: Callable[[], float] = time.perf_counter):
+		self._algorithms = list(algorithms)
+		self._hashes = self._new_hashes()
+		self._clock = clock
+		self._queue: "queue.Queue[object]" = queue.Queue(maxsize=_HASH_QUEUE_SIZE)
+		self._thread = threading.Thread(target=self._run, name="octocheese-hasher", daemon=True)
+		self.seconds = 0.0
+
+	def _new_hashes(self) -> Dict[str, "hashlib._Hash"]:
+		return {name: SUPPORTED_DIGESTS[name]() for name in self._algorithms}
+
+	def _run(self) -> None:
+		while True:
+			chunk = self._queue.get()
+
+			if chunk is _STOP:
+				return
+			elif chunk is _RESET:
+				self._hashes = self._new_hashes()
+				continue
+
+			start = self._clock()
+			for hash_obj in self._hashes.values():
+				hash_obj.update(chunk)  # type: ignore[arg-type]
+			self.seconds += self._clock() - start
+
+	def __enter__(self) -> "_Hasher":
+		self._thread.start()
+		return self
+
+	def __exit__(self, *args) -> None:
+		self._queue.put(_STOP)
+		self._thread.join()
+
+	def update(self, chunk: bytes) -> None:
+		"""
+		Add the chunk to the data being hashed.
+
+		:param chunk:
+		"""
+
+		self._queue.put(chunk)
+
+	def reset(self) -> None:
+		"""
+		Discard the data hashed so far.
+		"""
+
+		self._queue.put(_RESET)
+
+	def hexdigests(self) -> Dict[str, str]:
+		"""
+		Returns a mapping of digest names to the hexadecimal digests of the data.
+		"""
+
+		if self._thread.is_alive():
+			raise RuntimeError("The digests are not available until hashing has finished.")
+
+		return {name: hash_obj.hexdigest() for name, hash_obj in self._hashes.items()}
+
+
+def download_file(
+		client: PyPIJSON,
+		url: Union[str, URL],
+		destination: PathPlus,
+		checksum: Optional[str] = None,
+		retry: RetryPolicy = DEFAULT_RETRY,
+		metrics: Optional[Metrics] = None,
+		digests: Optional[Mapping[str, str]] = None,
+		) -> str:
+	"""
+	Download the file with the given URL from PyPI.
+
+	The file is written to disk as it is received, and its digests calculated at the same time
+	in a background thread, so hashing does not hold up the download
+	and only a few chunks of the file are held in memory at once.
+
+	If the connection fails, or PyPI responds with a temporary error, the download is retried.
+	Where the server supports it, the download resumes from the end of the data already received.
+
+	:param client:
+	:param url:
+	:param destination: The file to write to.
+	:param checksum: The expected sha256 checksum of the file.
+		If given, and the checksum of the downloaded file differs, a :exc:`ValueError` is raised.
+	:param retry: How to retry the download if it fails.
+	:param metrics: Records the time taken, bytes received and retries
+		in the ``download`` phase, and the time spent and bytes hashed in the ``hash`` phase.
+	:param digests: Mapping of digest names to the expected digests of the file, as given by PyPI.
+		Each digest named in :py:data:`~.SUPPORTED_DIGESTS` is verified, and others are ignored.
+
+	:returns: The sha256 checksum of the downloaded file.
+
+	:raises:
+
+		* :exc:`OSError` if the file cannot be downloaded.
+		* :exc:`ValueError` if a digest of the downloaded file does not match.
+
+	.. versionchanged:: 0.8.0
+
+		* Added the ``retry``, ``metrics`` and ``digests`` arguments.
+		* The file is hashed in a background thread.
+	"""
+
+	if metrics is None:
+		metrics = Metrics()
+
+	expected = {name: value.lower() for name, value in (digests or {}).items() if name in SUPPORTED_DIGESTS}
+	if checksum is not None:
+		expected["sha256"] = checksum.lower()
+
+	filename = URL(url).name
+	received = 0
+	attempt = 0
+	transferred = 0
+	hashed = 0
+	start = metrics.clock()
+	hasher = _Hasher({"sha256", *expected}, clock=metrics.clock)
+
+	try:
+		with hasher, destination.open("wb") as fp:
+			while True:
+				headers = {"Range": f"bytes={received}-"} if received else {}
+
+				try:
+					with client.endpoint.session.get(
+							str(url),
+							stream=True,
+							timeout=client.timeout,
+							headers=headers,
+							) as response:
+
+						if received and response.status_code in {200, 416}:
+							# The server ignored or rejected the Range header, so start again from the beginning.
+							fp.seek(0)
+							fp.truncate()
+							hasher.reset()
+							received = 0
+
+						if response.status_code in _RETRY_STATUSES or response.status_code == 416:
+							raise _RetryableResponse(f"HTTP {response.status_code}")
+						elif response.status_code not in {200, 206}:
+							raise OSError(f"Unable to download '{filename}' from PyPI.")
+
+						for chunk in response.iter_content(CHUNK_SIZE):
+							hasher.update(chunk)
+							hashed += len(chunk)
+							fp.write(chunk)
+							received += len(chunk)
+							transferred += len(chunk)
+
+					break
+
+				except _RETRY_EXCEPTIONS as e:
+					if attempt >= retry.retries:
+						raise OSError(f"Unable to download '{filename}' from PyPI.") from e
+
+					warning(f"Download of '{filename}' failed ({e or type(e).__name__}). Retrying.")
+					metrics.add_retry("download")
+					time.sleep(retry.delay(attempt))
+					attempt += 1
+
+	finally:
+		metrics.add_time("download", metrics.clock() - start)
+		metrics.add_bytes("download", transferred)
+		metrics.add_time("hash", hasher.seconds)
+		metrics.add_bytes("hash", hashed)
+
+	actual = hasher.hexdigests()
+
+	for name, value in expected.items():
+		if actual[name] != value:
+			raise ValueError(f"The checksums for {filename} do not match!")
+
+	return actual["sha256"]
+
+
+def _remove_starter_asset(release: Release, name: str) -> bool:
+	"""
+	Delete the asset with the given name if GitHub still lists it in the ``starter`` state,
+	which is left behind by an upload which was interrupted.
+
+	:param release:
+	:param name:
+
+	:returns: Whether an asset was deleted.
+	"""
+
+	for asset in release.assets():
+		if asset.name == name and getattr(asset, "state", None) == "starter":
+			asset.delete()
+			return True
+
+	return False
+
+
+def upload_file(
+		release: Release,
+		filename: PathPlus,
+		name: Optional[str] = None,
+		retry: RetryPolicy = DEFAULT_RETRY,
+		metrics: Optional[Metrics] = None,
+		) -> Asset:
+	"""
+	Upload the given file to the release on GitHub.
+
+	The request body is streamed from the file rather than being read into memory first.
+
+	If the upload fails it is retried, after removing any partially uploaded asset from the release.
+
+	:param release:
+	:param filename: The file to upload.
+	:param name: The name of the asset. Defaults to the name of the file.
+	:param retry: How to retry the upload if it fails.
+	:param metrics: Records the time taken, bytes sent and retries in the ``upload`` phase.
+
+	.. versionchanged:: 0.8.0  Added the ``retry`` and ``metrics`` arguments.
+	"""
+
+	if metrics is None:
+		metrics = Metrics()
+
+	name = name or filename.name
+	attempt = 0
+
+	while True:
+		try:
+			with metrics.time("upload"), filename.open("rb") as fp:
+				asset = release.upload_asset(content_type="application/binary", name=name, asset=fp)
+
+			metrics.add_bytes("upload", filename.stat().st_size)
+			return asset
+
+		except (TransportError, ServerError, UnprocessableEntity) as e:
+			# A 422 response means an asset with that name already exists.
+			# That is only worth retrying if it is the remains of an interrupted upload.
+			removed = _remove_starter_asset(release, name)
+
+			if attempt >= retry.retries or (isinstance(e, UnprocessableEntity) and not removed):
+				raise
+
+			warning(f"Upload of '{name}' failed ({e}). Retrying.")
+			metrics.add_retry("upload")
+			time.sleep(retry.delay(attempt))
+			attempt += 1
+
+
+def _file_digest(filename: PathPlus) -> str:
+	sha256 = hashlib.sha256()
+
+	with filename.open("rb") as fp:
+		for chunk in iter(lambda: fp.read(CHUNK_SIZE), b''):
+			sha256.update(chunk)
+
+	return sha256.hexdigest()
+
+
+class FileCache:
+	"""
+	Content-addressed cache of files downloaded from PyPI, keyed by their sha256 checksums.
+
+	A file is downloaded at most once, even when it is copied to several repositories
+	or a run is repeated after failing part way through.
+	Cached files are verified against their checksum before being reused.
+
+	When the cache grows beyond ``max_size`` the least recently used files are removed.
+
+	The methods of this class may be called from several threads at once.
+
+	:param directory: The directory to store the files in.
+	:param max_size: The maximum total size of the cached files, in bytes.
+		If :py:obj:`None` the size is not limited.
+	"""
+
+	#: The number of files which were found in the cache.
+	hits: int
+
+	#: The number of files which had to be downloaded.
+	misses: int
+
+	def __init__(self, directory: PathLike, max_size: Optional[int] = None):
+		self.directory = PathPlus(directory)
+		self.max_size = max_size
+		self.hits = 0
+		self.misses = 0
+		self._lock = threading.Lock()
+		self._digest_locks: Dict[str, threading.Lock] = {}
+		self._pinned: Counter = Counter()
+
+	def _path(self, digest: str) -> PathPlus:
+		return self.directory / digest[:2] / digest
+
+	def _digest_lock(self, digest: str) -> threading.Lock:
+		with self._lock:
+			return self._digest_locks.setdefault(digest, threading.Lock())
+
+	def get(self, digest: str) -> Optional[PathPlus]:
+		"""
+		Returns the cached file with the given sha256 checksum,
+		or :py:obj:`None` if it is not in the cache or has been corrupted.
+
+		:param digest:
+		"""
+
+		digest = digest.lower()
+		filename = self._path(digest)
+
+		if not filename.is_file():
+			return None
+
+		if _file_digest(filename) != digest:
+			with suppress(OSError):
+				filename.unlink()
+			return None
+
+		# Mark as recently used
+		with suppress(OSError):
+			os.utime(filename)
+
+		return filename
+
+	@contextmanager
+	def use(
+			self,
+			client: PyPIJSON,
+			url: Union[str, URL],
+			checksum: str,
+			retry: RetryPolicy = DEFAULT_RETRY,
+			metrics: Optional[Metrics] = None,
+			digests: Optional[Mapping[str, str]] = None,
+			) -> Iterator[PathPlus]:
+		"""
+		Context manager giving the path to the file with the given URL and sha256 checksum,
+		downloading it into the cache first if necessary.
+
+		The file will not be evicted from the cache until the ``with`` block is exited.
+
+		:param client:
+		:param url:
+		:param checksum: The sha256 checksum of the file.
+		:param retry: How to retry the download if it fails.
+		:param metrics: Records the download, if the file is not already in the cache.
+		:param digests: Mapping of digest names to the expected digests of the file,
+			which are verified if the file is downloaded.
+
+		:raises:
+
+			* :exc:`OSError` if the file cannot be downloaded.
+			* :exc:`ValueError` if a digest of the downloaded file does not match.
+
+		.. versionchanged:: 0.8.0  Added the ``digests`` argument.
+		"""
+
+		digest = checksum.lower()
+
+		with self._lock:
+			self._pinned[digest] += 1
+
+		try:
+			# Only one thread downloads each file; the others wait and then use the cached copy
+			with self._digest_lock(digest):
+				filename = self.get(digest)
+
+				if filename is None:
+					filename = self._path(digest)
+					filename.parent.maybe_make(parents=True)
+					tmp_filename = filename.with_name(f"{digest}.{threading.get_ident()}.tmp")
+
+					try:
+						download_file(client, url, tmp_filename, digest, retry, metrics, digests)
+						os.replace(tmp_filename, filename)
+					finally:
+						if tmp_filename.exists():
+							tmp_filename.unlink()
+
+					with self._lock:
+						self.misses += 1
+
+					self.evict()
+				else:
+					with self._lock:
+						self.hits += 1
+
+			yield filename
+
+		finally:
+			with self._lock:
+				self._pinned[digest] -= 1
+				if not self._pinned[digest]:
+					del self._pinned[digest]
+
+	def evict(self) -> None:
+		"""
+		Remove the least recently used files until the cache is no larger than :attr:`~.FileCache.max_size`.
+
+		Files which are in use are not removed.
+		"""
+
+		if self.max_size is None or not self.directory.is_dir():
+			return
+
+		entries = []
+		for filename in self.directory.glob("*/*"):
+			if filename.suffix == ".tmp":
+				continue
+			with suppress(OSError):
+				stat = filename.stat()
+				entries.append((stat.st_mtime, stat.st_size, filename))
+
+		total_size = sum(size for _, size, _ in entries)
+
+		for _, size, filename in sorted(entries):
+			if total_size <= self.max_size:
+				break
+
+			with self._lock:
+				if self._pinned[filename.name]:
+					continue
+
+			with suppress(OSError):
+				filename.unlink()
+				total_size -= size
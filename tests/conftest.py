@@ -1,10 +1,25 @@
 # stdlib
-from typing import Tuple
+import datetime
+import hashlib
+import io
+import itertools
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 # 3rd party
 import pytest
+import requests
 from betamax import Betamax  # type: ignore[import-untyped]
 from domdf_python_tools.paths import PathPlus
+from github3.exceptions import NotFoundError
+from pypi_json import PyPIJSON
+
+# this package
+from tests.servers import FakePyPIServer, graphql_page
 
 try:
 	# 3rd party
@@ -25,3 +40,302 @@ def fake_token(monkeypatch) -> None:
 @pytest.fixture()
 def repo_root() -> PathPlus:
 	return PathPlus(__file__).parent.parent
+
+
+class FakeAsset:
+
+	def __init__(self, name: str, content: bytes, state: str = "uploaded"):
+		self.name = name
+		self.content = content
+		self.size = len(content)
+		self.state = state
+		self.deleted = False
+
+	def delete(self) -> bool:
+		self.deleted = True
+		return True
+
+
+class FakeRelease:
+	"""
+	Stand-in for :class:`github3.repos.release.Release`.
+	"""
+
+	_ids = itertools.count(1)
+
+	def __init__(self, tag_name: str, name: str = '', body: str = '', prerelease: bool = False, created_at=None):
+		self.id = next(self._ids)
+		self.tag_name = tag_name
+		self.name = name
+		self.body = body
+		self.prerelease = prerelease
+		self.draft = False
+		self.created_at = created_at or datetime.datetime.now(datetime.timezone.utc)
+		self.original_assets: List[FakeAsset] = []
+		self.edits = 0
+		self._lock = threading.Lock()
+		self.active_uploads = 0
+		self.max_active_uploads = 0
+
+	def edit(self, name=None, body=None, prerelease=None) -> bool:
+		self.edits += 1
+		self.name, self.body, self.prerelease = name, body, prerelease
+		return True
+
+	def assets(self):
+		return iter([asset for asset in self.original_assets if not asset.deleted])
+
+	def upload_asset(self, content_type: str, name: str, asset, label=None) -> FakeAsset:
+		with self._lock:
+			self.active_uploads += 1
+			self.max_active_uploads = max(self.max_active_uploads, self.active_uploads)
+
+		try:
+			time.sleep(0.01)
+			content = asset if isinstance(asset, bytes) else asset.read()
+			new_asset = FakeAsset(name, content)
+			with self._lock:
+				self.original_assets.append(new_asset)
+			return new_asset
+		finally:
+			with self._lock:
+				self.active_uploads -= 1
+
+
+class FakeTag:
+
+	def __init__(self, name: str):
+		self.name = name
+
+
+class FakeRepo:
+	"""
+	Stand-in for :class:`github3.repos.Repository`.
+	"""
+
+	def __init__(self, tags: List[str] = ()):
+		self.owner = SimpleNamespace(login="octocat")
+		self.name = "hello_world"
+		self._tags = list(tags)
+		self.releases_by_tag: Dict[str, FakeRelease] = {}
+		self.calls: List[str] = []
+		self.tags_listed = 0
+
+	def releases(self, number: int = -1):
+		self.calls.append("releases")
+		return iter(list(self.releases_by_tag.values()))
+
+	def tags(self, number: int = -1):
+		tags = [FakeTag(name) for name in reversed(self._tags)]
+		if number != -1:
+			tags = tags[:number]
+
+		for tag in tags:
+			self.tags_listed += 1
+			yield tag
+
+	def release_from_tag(self, tag_name: str) -> FakeRelease:
+		self.calls.append(f"release_from_tag {tag_name}")
+
+		if tag_name not in self.releases_by_tag:
+			response = requests.Response()
+			response.status_code = 404
+			response._content = b'{"message": "Not Found"}'
+			raise NotFoundError(response)
+
+		return self.releases_by_tag[tag_name]
+
+	def release(self, id: int) -> FakeRelease:  # noqa: A002  # pylint: disable=redefined-builtin
+		self.calls.append(f"release {id}")
+		return next(release for release in self.releases_by_tag.values() if release.id == id)
+
+	def create_release(self, tag_name: str, name=None, body=None, prerelease=False) -> FakeRelease:
+		release = FakeRelease(tag_name, name=name, body=body, prerelease=prerelease)
+		self.releases_by_tag[tag_name] = release
+		return release
+
+
+class _InterruptedStream(io.BytesIO):
+	"""
+	Response body which fails part way through, as if the connection was dropped.
+	"""
+
+	def __init__(self, content: bytes, limit: int):
+		super().__init__(content)
+		self.limit = limit
+
+	def read(self, size: Optional[int] = -1) -> bytes:
+		if self.tell() >= self.limit:
+			raise requests.exceptions.ChunkedEncodingError("Connection broken")
+
+		if size is None or size < 0:
+			size = self.limit
+		return super().read(min(size, self.limit - self.tell()))
+
+
+class FakePyPI(FakePyPIServer, requests.adapters.BaseAdapter):
+	"""
+	Transport adapter answering requests to PyPI and ``files.pythonhosted.org`` with :class:`~.FakePyPIServer`,
+	without starting the server.
+	"""
+
+	def __init__(self):
+		super().__init__()
+		self.urls: List[str] = []
+		self.interrupt_after: Optional[int] = None  # Drop the next file download after this many bytes.
+
+	@property
+	def url(self) -> str:
+		return "https://files.pythonhosted.org"
+
+	def add(
+			self,
+			filename: str,
+			content: bytes,
+			version: Optional[str] = None,
+			upload_time: Optional[datetime.datetime] = None,
+			) -> Dict[str, str]:
+		"""
+		Add a file to the project named at the start of the filename.
+
+		If ``version`` is :py:obj:`None` the file can be downloaded but is not part of any release.
+		"""
+
+		if version is None:
+			self.files[filename] = content
+		else:
+			self.add_file(filename.split('-')[0], version, filename, content, upload_time)
+
+		return {"url": f"{self.url}/packages/{filename}", "digest": hashlib.sha256(content).hexdigest()}
+
+	def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+		self.urls.append(request.url)
+		url = urlsplit(request.url)
+		path = f"{url.path}?{url.query}" if url.query else url.path
+		body = request.body.encode("UTF-8") if isinstance(request.body, str) else request.body or b''
+
+		with self._lock:
+			self.requests[request.method] += 1
+			self.bytes_received += len(body)
+
+		status, headers, chunks = self.respond(request.method, path, request.headers, body)
+		content = b''.join(chunks)
+
+		response = requests.Response()
+		response.url = request.url
+		response.request = request
+		response.status_code = status
+		response.headers.update(headers)
+		response.headers["Content-Length"] = str(len(content))
+
+		if self.interrupt_after is not None and url.path.startswith("/packages/") and status < 300:
+			response.raw = _InterruptedStream(content, self.interrupt_after)
+			self.interrupt_after = None
+		else:
+			response.raw = io.BytesIO(content)
+
+		return response
+
+	def close(self):
+		pass
+
+	def client(self) -> PyPIJSON:  # type: ignore[override]
+		"""
+		Returns a PyPI client whose requests are answered by this adapter.
+		"""
+
+		session = requests.Session()
+		session.mount("https://", self)
+		return PyPIJSON(session=session)
+
+
+class FakeGraphQL(requests.adapters.BaseAdapter):
+	"""
+	Transport adapter standing in for the GitHub GraphQL API, listing the tags and releases of a :class:`~.FakeRepo`.
+	"""
+
+	def __init__(self, repo: FakeRepo):
+		super().__init__()
+		self.repo = repo
+		self.queries: List[dict] = []
+
+	def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+		variables = json.loads(request.body)["variables"]
+		self.queries.append(variables)
+
+		tags = [{"name": name} for name in reversed(self.repo._tags)]
+		releases = [{
+				"databaseId": release.id,
+				"tagName": release.tag_name,
+				"name": release.name,
+				"description": release.body,
+				"isPrerelease": release.prerelease,
+				"isDraft": release.draft,
+				"createdAt": release.created_at.isoformat().replace("+00:00", 'Z'),
+				"releaseAssets": graphql_page([{"name": a.name, "size": a.size} for a in release.original_assets], 100),
+				} for release in self.repo.releases_by_tag.values()]
+
+		data = {
+				"repository": {
+						"refs": graphql_page(tags, variables["tagsPage"], variables["tagsCursor"]),
+						"releases": graphql_page(releases, variables["releasesPage"], variables["releasesCursor"]),
+						}
+				}
+
+		content = json.dumps({"data": data}).encode("UTF-8")
+
+		response = requests.Response()
+		response.url = request.url
+		response.request = request
+		response.status_code = 200
+		response.raw = io.BytesIO(content)
+		return response
+
+	def close(self):
+		pass
+
+
+class FakeGitHub:
+	"""
+	Stand-in for :class:`github3.GitHub`.
+	"""
+
+	def __init__(self, repo: FakeRepo):
+		self.repo = repo
+		self.graphql = FakeGraphQL(repo)
+		self.session = requests.Session()
+		self.session.mount("https://", self.graphql)
+
+	def _build_url(self, *args: str) -> str:
+		return '/'.join(("https://api.github.com", *args))
+
+	def repository(self, owner: str, repository: str) -> FakeRepo:
+		return self.repo
+
+
+class FakeFleet(FakeGitHub):
+	"""
+	Stand-in for :class:`github3.GitHub` with several repositories, keyed by name.
+	"""
+
+	def __init__(self, repos: Dict[str, FakeRepo]):
+		super().__init__(FakeRepo())
+		self.repos = repos
+
+	def repository(self, owner: str, repository: str) -> FakeRepo:
+		return self.repos[repository]
+
+
+@pytest.fixture()
+def fake_pypi() -> FakePyPI:
+	return FakePyPI()
+
+
+@pytest.fixture()
+def fake_repo() -> FakeRepo:
+	return FakeRepo()
+
+
+@pytest.fixture()
+def fake_github(fake_repo: FakeRepo) -> FakeGitHub:
+	return FakeGitHub(fake_repo)
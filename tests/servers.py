@@ -0,0 +1,770 @@
+"""
+Local stand-ins for PyPI and the GitHub API, for testing and benchmarking OctoCheese without a network connection.
+
+Each server runs in a background thread on ``127.0.0.1``, and can be made to respond slowly
+with the ``latency`` and ``bandwidth`` options.
+
+.. code-block:: python
+
+	with FakePyPIServer() as pypi, FakeGitHubServer() as github:
+		pypi.add_project("octocat", ["0.1.0", "0.2.0"], files_per_version=2)
+		github.add_repo("octocat", "octocat", tags=["v0.1.0", "v0.2.0"])
+
+		with pypi.client() as client:
+			copy_pypi_2_github(github.github(), "octocat", "octocat", client=client)
+
+Files on the fake PyPI are generated from their names when they are requested,
+so projects with many large files use little memory.
+Files uploaded to the fake GitHub are read and counted, but not kept.
+
+These servers are used by ``benchmarks/benchmark.py``, and :class:`tests.conftest.FakePyPI`
+answers the unit tests' requests with :class:`~.FakePyPIServer` without opening a socket.
+"""
+
+# stdlib
+import datetime
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+import xmlrpc.client
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# 3rd party
+from github3 import GitHubEnterprise
+from packaging.utils import canonicalize_name
+from pypi_json import PyPIJSON
+
+# this package
+from octocheese.pypi import make_pypi_client
+
+__all__ = ["FakeServer", "FakePyPIServer", "FakeGitHubServer", "generate_content", "graphql_page"]
+
+#: The size of the chunks response bodies are written in, in bytes.
+_CHUNK_SIZE = 64 * 1024
+
+_Response = Tuple[int, Dict[str, str], Iterable[bytes]]
+
+
+def generate_content(filename: str, size: int) -> Iterator[bytes]:
+	"""
+	Generate the content of a file on the fake PyPI, in chunks.
+
+	The content is the name of the file repeated up to the given size,
+	so the same name and size always give the same content.
+
+	:param filename:
+	:param size: The size of the file in bytes.
+	"""
+
+	pattern = (filename.encode("UTF-8") + b'\n') * (_CHUNK_SIZE // (len(filename) + 1) + 1)
+	remaining = size
+
+	while remaining > 0:
+		chunk = pattern[:min(remaining, _CHUNK_SIZE)]
+		remaining -= len(chunk)
+		yield chunk
+
+
+def graphql_page(nodes: List[Any], first: int, after: Optional[str] = None) -> Dict[str, Any]:
+	"""
+	Returns a page of a GraphQL connection, as for the ``first`` and ``after`` arguments.
+
+	The cursor of each page is the index of the node after it.
+
+	:param nodes: All nodes in the connection.
+	:param first: The number of nodes in the page.
+	:param after: The cursor of the previous page, or :py:obj:`None` for the first page.
+	"""
+
+	start = int(after or 0)
+	end = start + first
+	return {"pageInfo": {"hasNextPage": end < len(nodes), "endCursor": str(end)}, "nodes": nodes[start:end]}
+
+
+def _json_response(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> _Response:
+	return status, {"Content-Type": "application/json", **(headers or {})}, [json.dumps(data).encode("UTF-8")]
+
+
+def _not_found() -> _Response:
+	return _json_response({"message": "Not Found"}, 404)
+
+
+class FakeServer:
+	"""
+	Base class for a local HTTP server run in a background thread.
+
+	The server is started when the ``with`` block is entered, and stopped when it is exited.
+
+	:param latency: The time to wait before responding to each request, in seconds.
+	:param bandwidth: The maximum number of bytes per second sent or received for each request.
+		If :py:obj:`None` the speed is not limited.
+	"""
+
+	#: Mapping of HTTP methods to the number of requests received with that method.
+	requests: Counter
+
+	#: The total number of bytes received in request bodies.
+	bytes_received: int
+
+	#: The total number of bytes sent in response bodies.
+	bytes_sent: int
+
+	def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None):
+		self.latency = latency
+		self.bandwidth = bandwidth
+		self.requests = Counter()
+		self.bytes_received = 0
+		self.bytes_sent = 0
+		self._lock = threading.Lock()
+		self._server: Optional[ThreadingHTTPServer] = None
+		self._thread: Optional[threading.Thread] = None
+
+	@property
+	def url(self) -> str:
+		"""
+		The URL of the server, without a trailing slash.
+		"""
+
+		if self._server is None:
+			raise RuntimeError("The server is not running.")
+
+		host, port = self._server.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def start(self) -> None:
+		"""
+		Start the server.
+		"""
+
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"
+			disable_nagle_algorithm = True
+
+			def handle_method(self) -> None:
+				server._handle(self)
+
+			do_GET = do_POST = do_PATCH = do_DELETE = handle_method
+
+			def log_message(self, format: str, *args: Any) -> None:  # noqa: A002  # pylint: disable=redefined-builtin
+				pass
+
+		self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+		self._server.daemon_threads = True
+		self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05, ), daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		"""
+		Stop the server.
+		"""
+
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+			self._server = None
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.stop()
+
+	def _throttle(self, size: int) -> None:
+		if self.bandwidth:
+			time.sleep(size / self.bandwidth)
+
+	def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+		if self.latency:
+			time.sleep(self.latency)
+
+		length = int(handler.headers.get("Content-Length") or 0)
+		body = bytearray()
+
+		while len(body) < length:
+			chunk = handler.rfile.read(min(_CHUNK_SIZE, length - len(body)))
+			if not chunk:
+				break
+			self._throttle(len(chunk))
+			body.extend(chunk)
+
+		with self._lock:
+			self.requests[handler.command] += 1
+			self.bytes_received += len(body)
+
+		try:
+			status, headers, chunks = self.respond(handler.command, handler.path, dict(handler.headers), bytes(body))
+		except Exception as e:  # pragma: no cover
+			status, headers, chunks = _json_response({"message": str(e)}, 500)
+
+		if "Content-Length" not in headers:
+			chunks = list(chunks)
+			headers["Content-Length"] = str(sum(len(chunk) for chunk in chunks))
+
+		handler.send_response(status)
+		for key, value in headers.items():
+			handler.send_header(key, value)
+		handler.end_headers()
+
+		for chunk in chunks:
+			self._throttle(len(chunk))
+			handler.wfile.write(chunk)
+
+			with self._lock:
+				self.bytes_sent += len(chunk)
+
+	def respond(self, method: str, path: str, headers: Mapping[str, str], body: bytes) -> _Response:
+		"""
+		Returns the response to a request, as the status code, headers, and chunks of the body.
+
+		:param method:
+		:param path: The path of the request, including the query string.
+		:param headers:
+		:param body:
+		"""
+
+		raise NotImplementedError  # pragma: no cover
+
+
+class FakePyPIServer(FakeServer):
+	"""
+	Stand-in for the PyPI JSON API, the changelog methods of the XML-RPC API, and ``files.pythonhosted.org``.
+
+	:param latency: The time to wait before responding to each request, in seconds.
+	:param bandwidth: The maximum number of bytes per second sent for each request.
+		If :py:obj:`None` the speed is not limited.
+	"""
+
+	#: Mapping of filenames to their content, or to their size for files generated by :meth:`~.add_project`.
+	files: Dict[str, Union[int, bytes]]
+
+	#: Status codes to respond to the next requests for files with.
+	failures: List[int]
+
+	#: Whether requests for files honour the ``Range`` header.
+	support_ranges: bool
+
+	#: The ``Range`` headers of requests for files.
+	ranges: List[str]
+
+	def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None):
+		super().__init__(latency, bandwidth)
+		self.files = {}
+		self.failures = []
+		self.support_ranges = True
+		self.ranges = []
+		self._projects: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+		self._changelog: List[Tuple[str, str, int, str, int]] = []
+		self._serials: Dict[str, int] = {}
+
+	@property
+	def serial(self) -> int:
+		"""
+		The serial number of the most recent event on the server.
+		"""
+
+		return self._changelog[-1][4] if self._changelog else 0
+
+	def _add_file(
+			self,
+			name: str,
+			version: str,
+			filename: str,
+			chunks: Iterable[bytes],
+			upload_time: Optional[datetime.datetime],
+			) -> Dict[str, Any]:
+		upload_time = upload_time or datetime.datetime.now(datetime.timezone.utc)
+		sha256 = hashlib.sha256()
+		blake2b = hashlib.blake2b(digest_size=32)
+		size = 0
+
+		for chunk in chunks:
+			sha256.update(chunk)
+			blake2b.update(chunk)
+			size += len(chunk)
+
+		file = {
+				"filename": filename,
+				"url": f"{{url}}/packages/{filename}",
+				"digests": {"sha256": sha256.hexdigest(), "blake2b_256": blake2b.hexdigest()},
+				"size": size,
+				"upload_time_iso_8601": upload_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+				}
+		self._projects.setdefault(name, {}).setdefault(version, []).append(file)
+
+		event = (name, version, int(upload_time.timestamp()), f"add source file {filename}", self.serial + 1)
+		self._changelog.append(event)
+		self._serials[name] = self.serial
+
+		return file
+
+	def add_project(
+			self,
+			name: str,
+			versions: Iterable[str],
+			files_per_version: int = 1,
+			file_size: int = 1024,
+			upload_time: Optional[datetime.datetime] = None,
+			) -> None:
+		"""
+		Add a project to the server, or add versions to an existing project.
+
+		Each version has an sdist and ``files_per_version - 1`` wheels.
+		The upload of each file is recorded in the server's changelog.
+
+		:param name: The name of the project.
+		:param versions:
+		:param files_per_version:
+		:param file_size: The size of each file in bytes.
+		:param upload_time: The time the files were uploaded. Defaults to now.
+		"""
+
+		for version in versions:
+			filenames = [f"{name}-{version}.tar.gz"]
+			filenames.extend(f"{name}-{version}-{idx}-py3-none-any.whl" for idx in range(1, files_per_version))
+			self._projects.setdefault(name, {})[version] = []
+
+			for filename in filenames:
+				self.files[filename] = file_size
+				self._add_file(name, version, filename, generate_content(filename, file_size), upload_time)
+
+	def add_file(
+			self,
+			name: str,
+			version: str,
+			filename: str,
+			content: bytes,
+			upload_time: Optional[datetime.datetime] = None,
+			) -> Dict[str, Any]:
+		"""
+		Add a file with the given content to a version of a project.
+
+		The upload is recorded in the server's changelog.
+
+		:param name: The name of the project.
+		:param version:
+		:param filename:
+		:param content:
+		:param upload_time: The time the file was uploaded. Defaults to now.
+
+		:returns: The file's entry in the project's JSON metadata.
+		"""
+
+		self.files[filename] = content
+		return self._add_file(name, version, filename, [content], upload_time)
+
+	def release_files(self, name: str, version: str) -> List[Dict[str, Any]]:
+		"""
+		Returns the entries for the files of the given version of a project in its JSON metadata.
+
+		Changes to the entries are reflected in the metadata served.
+
+		:param name: The name of the project.
+		:param version:
+		"""
+
+		return self._projects[name][version]
+
+	def filenames(self, name: str, version: str) -> List[str]:
+		"""
+		Returns the names of the files for the given version of a project.
+
+		:param name: The name of the project.
+		:param version:
+		"""
+
+		return [file["filename"] for file in self.release_files(name, version)]
+
+	def client(self, pool_size: int = 10) -> PyPIJSON:
+		"""
+		Returns a PyPI client for this server.
+
+		:param pool_size: The maximum number of connections to keep open.
+		"""
+
+		session = make_pypi_client(pool_size).endpoint.session
+		return PyPIJSON(endpoint=f"{self.url}/pypi", session=session)
+
+	def _file(self, filename: str, headers: Mapping[str, str]) -> _Response:
+		if self.failures:
+			return self.failures.pop(0), {}, []
+
+		content = self.files[filename]
+		size = content if isinstance(content, int) else len(content)
+		chunks: Iterable[bytes] = generate_content(filename, content) if isinstance(content, int) else [content]
+		status = 200
+
+		if "Range" in headers:
+			self.ranges.append(headers["Range"])
+
+			if self.support_ranges:
+				start = int(headers["Range"][6:-1])
+				status, size = 206, size - start
+				chunks = [b''.join(chunks)[start:]]
+
+		return status, {"Content-Length": str(size), "Content-Type": "application/octet-stream"}, chunks
+
+	def respond(self, method: str, path: str, headers: Mapping[str, str], body: bytes) -> _Response:
+		path = urlsplit(path).path
+
+		if method == "POST" and path == "/pypi":
+			params, rpc_method = xmlrpc.client.loads(body)
+			if rpc_method == "changelog_last_serial":
+				result: Any = self.serial
+			elif rpc_method == "changelog_since_serial":
+				result = [event for event in self._changelog if event[4] > params[0]]
+			else:
+				fault = xmlrpc.client.Fault(1, f"Unknown method {rpc_method!r}")
+				return 200, {"Content-Type": "text/xml"}, [xmlrpc.client.dumps(fault).encode("UTF-8")]
+
+			content = xmlrpc.client.dumps((result, ), methodresponse=True).encode("UTF-8")
+			return 200, {"Content-Type": "text/xml"}, [content]
+
+		match = re.fullmatch(r"/pypi/([^/]+)/json/?", path)
+		if method == "GET" and match:
+			projects = {canonicalize_name(name): name for name in self._projects}
+			project = projects.get(canonicalize_name(match.group(1)))
+			if project is None:
+				return _not_found()
+
+			serial = self._serials[project]
+			response_headers = {"ETag": f'"{serial}"', "X-PyPI-Last-Serial": str(serial)}
+			if headers.get("If-None-Match") == response_headers["ETag"]:
+				return 304, response_headers, []
+
+			releases = json.loads(json.dumps(self._projects[project]).replace("{url}", self.url))
+			return _json_response(
+					{"info": {"name": project, "version": '0'}, "last_serial": serial, "releases": releases},
+					headers=response_headers,
+					)
+
+		match = re.fullmatch(r"/packages/([^/]+)", path)
+		if method == "GET" and match and match.group(1) in self.files:
+			return self._file(match.group(1), headers)
+
+		return _not_found()
+
+
+class FakeGitHubServer(FakeServer):
+	"""
+	Stand-in for the parts of the GitHub REST and GraphQL APIs used by OctoCheese.
+
+	The API is served as for GitHub Enterprise, under ``/api/v3`` and ``/api/graphql``.
+
+	:param latency: The time to wait before responding to each request, in seconds.
+	:param bandwidth: The maximum number of bytes per second sent or received for each request.
+		If :py:obj:`None` the speed is not limited.
+	"""
+
+	def __init__(self, latency: float = 0.0, bandwidth: Optional[float] = None):
+		super().__init__(latency, bandwidth)
+		self._ids = itertools.count(1)
+		self._tags: Dict[str, List[str]] = {}
+		self._releases: Dict[str, Dict[int, Dict[str, Any]]] = {}
+
+	def add_repo(self, owner: str, name: str, tags: Iterable[str] = ()) -> None:
+		"""
+		Add a repository to the server.
+
+		:param owner:
+		:param name:
+		:param tags: The repository's tags, oldest first.
+		"""
+
+		self._tags[f"{owner}/{name}"] = list(tags)
+		self._releases[f"{owner}/{name}"] = {}
+
+	def add_release(
+			self,
+			owner: str,
+			name: str,
+			tag_name: str,
+			assets: Mapping[str, int] = {},  # noqa: B006
+			created_at: Optional[datetime.datetime] = None,
+			) -> Dict[str, Any]:
+		"""
+		Add a release to a repository.
+
+		:param owner:
+		:param name:
+		:param tag_name:
+		:param assets: Mapping of the names of the release's assets to their sizes in bytes.
+		:param created_at: The time the release was created. Defaults to now.
+		"""
+
+		repo = f"{owner}/{name}"
+		release = self._release_json(repo, {"tag_name": tag_name, "name": '', "body": ''}, created_at)
+
+		for asset_name, size in assets.items():
+			release["assets"].append(self._asset_json(repo, release["id"], asset_name, size))
+
+		return release
+
+	def releases(self, owner: str, name: str) -> Dict[str, Dict[str, Any]]:
+		"""
+		Returns a mapping of tag names to the JSON for the repository's releases.
+
+		:param owner:
+		:param name:
+		"""
+
+		return {release["tag_name"]: release for release in self._releases[f"{owner}/{name}"].values()}
+
+	def github(self, token: str = "1234") -> GitHubEnterprise:
+		"""
+		Returns a GitHub client for this server.
+
+		:param token:
+		"""
+
+		return GitHubEnterprise(self.url, token=token)
+
+	def _user_json(self, login: str) -> Dict[str, Any]:
+		url = f"{self.url}/api/v3/users/{login}"
+		user: Dict[str, Any] = {
+				key: f"{url}/{key[:-4]}"
+				for key in [
+						"events_url",
+						"followers_url",
+						"following_url",
+						"gists_url",
+						"organizations_url",
+						"received_events_url",
+						"repos_url",
+						"starred_url",
+						"subscriptions_url",
+						]
+				}
+		user.update(avatar_url='', gravatar_id='', html_url=url, id=1, login=login, type="User", url=url)
+		return user
+
+	def _repo_json(self, repo: str) -> Dict[str, Any]:
+		owner, name = repo.split('/')
+		url = f"{self.url}/api/v3/repos/{repo}"
+		url_keys = [
+				"archive", "assignees", "blobs", "branches", "collaborators", "comments", "commits", "compare",
+				"contents", "contributors", "deployments", "downloads", "events", "forks", "git_commits", "git_refs",
+				"git_tags", "hooks", "issue_comment", "issue_events", "issues", "keys", "labels", "languages",
+				"merges", "milestones", "notifications", "pulls", "releases", "stargazers", "statuses",
+				"subscribers", "subscription", "tags", "teams", "trees",
+				]
+		data: Dict[str, Any] = {f"{key}_url": f"{url}/{key}" for key in url_keys}
+		data.update({
+				"url": url,
+				"html_url": url,
+				"clone_url": url,
+				"git_url": url,
+				"ssh_url": url,
+				"svn_url": url,
+				"mirror_url": None,
+				"homepage": None,
+				"id": 1,
+				"name": name,
+				"full_name": repo,
+				"owner": self._user_json(owner),
+				"description": '',
+				"fork": False,
+				"private": False,
+				"archived": False,
+				"default_branch": "master",
+				"language": "Python",
+				"created_at": "2020-01-01T00:00:00Z",
+				"updated_at": "2020-01-01T00:00:00Z",
+				"pushed_at": "2020-01-01T00:00:00Z",
+				"has_downloads": True,
+				"has_issues": True,
+				"has_pages": False,
+				"has_projects": False,
+				"has_wiki": False,
+				})
+		data.update(dict.fromkeys([
+				"forks_count",
+				"network_count",
+				"open_issues_count",
+				"size",
+				"stargazers_count",
+				"subscribers_count",
+				"watchers_count",
+				], 0))
+		return data
+
+	def _release_json(
+			self,
+			repo: str,
+			data: Mapping[str, Any],
+			created_at: Optional[datetime.datetime] = None,
+			) -> Dict[str, Any]:
+		release_id = next(self._ids)
+		url = f"{self.url}/api/v3/repos/{repo}/releases/{release_id}"
+		created_at = created_at or datetime.datetime.now(datetime.timezone.utc)
+		timestamp = created_at.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+		release = {
+				"id": release_id,
+				"url": url,
+				"html_url": url,
+				"assets_url": f"{url}/assets",
+				"upload_url": f"{self.url}/uploads/repos/{repo}/releases/{release_id}/assets{{?name,label}}",
+				"tarball_url": None,
+				"zipball_url": None,
+				"tag_name": data["tag_name"],
+				"target_commitish": "master",
+				"name": data.get("name"),
+				"body": data.get("body"),
+				"draft": data.get("draft", False),
+				"prerelease": data.get("prerelease", False),
+				"created_at": timestamp,
+				"published_at": timestamp,
+				"author": self._user_json(repo.split('/')[0]),
+				"assets": [],
+				}
+
+		with self._lock:
+			self._releases[repo][release_id] = release
+
+		return release
+
+	def _asset_json(self, repo: str, release_id: int, name: str, size: int) -> Dict[str, Any]:
+		asset_id = next(self._ids)
+		url = f"{self.url}/api/v3/repos/{repo}/releases/assets/{asset_id}"
+		return {
+				"id": asset_id,
+				"url": url,
+				"browser_download_url": url,
+				"name": name,
+				"label": None,
+				"state": "uploaded",
+				"content_type": "application/binary",
+				"size": size,
+				"download_count": 0,
+				"created_at": "2020-01-01T00:00:00Z",
+				"updated_at": "2020-01-01T00:00:00Z",
+				"release_id": release_id,
+				}
+
+	def _page(self, path: str, query: Dict[str, List[str]], items: List[Any]) -> _Response:
+		per_page = int(query.get("per_page", ["30"])[0])
+		page = int(query.get("page", ["1"])[0])
+		headers = {}
+
+		if page * per_page < len(items):
+			next_url = f"{self.url}{path}?{urlencode({'per_page': per_page, 'page': page + 1})}"
+			headers["Link"] = f'<{next_url}>; rel="next"'
+
+		return _json_response(items[(page - 1) * per_page:page * per_page], headers=headers)
+
+	def _graphql(self, body: bytes) -> _Response:
+		variables = json.loads(body)["variables"]
+		repo = f"{variables['owner']}/{variables['name']}"
+
+		if repo not in self._tags:
+			return _json_response({"data": {"repository": None}, "errors": [{"message": "Not Found"}]})
+
+		with self._lock:
+			releases = list(self._releases[repo].values())
+
+		release_nodes = [{
+				"databaseId": release["id"],
+				"tagName": release["tag_name"],
+				"name": release["name"],
+				"description": release["body"],
+				"isPrerelease": release["prerelease"],
+				"isDraft": release["draft"],
+				"createdAt": release["created_at"],
+				"releaseAssets": graphql_page([{"name": a["name"], "size": a["size"]} for a in release["assets"]], 100),
+				} for release in releases]
+
+		tags = [{"name": tag} for tag in reversed(self._tags[repo])]
+
+		return _json_response({
+				"data": {
+						"repository": {
+								"refs": graphql_page(tags, variables["tagsPage"], variables["tagsCursor"]),
+								"releases": graphql_page(
+										release_nodes,
+										variables["releasesPage"],
+										variables["releasesCursor"],
+										),
+								}
+						}
+				})
+
+	def respond(self, method: str, path: str, headers: Mapping[str, str], body: bytes) -> _Response:
+		split = urlsplit(path)
+		path, query = split.path, parse_qs(split.query)
+
+		if method == "POST" and path == "/api/graphql":
+			return self._graphql(body)
+
+		match = re.fullmatch(r"/(api/v3|uploads)/repos/([^/]+/[^/]+)(/.*)?", path)
+		if not match or match.group(2) not in self._tags:
+			return _not_found()
+
+		prefix, repo, rest = match.group(1), match.group(2), match.group(3) or ''
+
+		with self._lock:
+			releases = self._releases[repo]
+
+		if prefix == "uploads":
+			match = re.fullmatch(r"/releases/(\d+)/assets", rest)
+			if method == "POST" and match and int(match.group(1)) in releases:
+				release = releases[int(match.group(1))]
+				asset = self._asset_json(repo, release["id"], query["name"][0], len(body))
+				with self._lock:
+					release["assets"].append(asset)
+				return _json_response(asset, 201)
+
+		elif method == "GET" and rest == '':
+			return _json_response(self._repo_json(repo))
+
+		elif method == "GET" and rest == "/tags":
+			tags = [{
+					"name": tag,
+					"commit": {"sha": '0' * 40, "url": ''},
+					"tarball_url": '',
+					"zipball_url": '',
+					} for tag in reversed(self._tags[repo])]
+			return self._page(path, query, tags)
+
+		elif method == "GET" and rest == "/releases":
+			return self._page(path, query, list(releases.values()))
+
+		elif method == "POST" and rest == "/releases":
+			return _json_response(self._release_json(repo, json.loads(body)), 201)
+
+		elif method == "GET" and rest.startswith("/releases/tags/"):
+			tag_name = rest[len("/releases/tags/"):]
+			for release in releases.values():
+				if release["tag_name"] == tag_name:
+					return _json_response(release)
+
+		elif re.fullmatch(r"/releases/\d+", rest) and int(rest.split('/')[-1]) in releases:
+			release = releases[int(rest.split('/')[-1])]
+			if method == "GET":
+				return _json_response(release)
+			elif method == "PATCH":
+				with self._lock:
+					release.update(json.loads(body))
+				return _json_response(release)
+
+		elif method == "GET" and re.fullmatch(r"/releases/\d+/assets", rest):
+			release = releases.get(int(rest.split('/')[2]))
+			if release is not None:
+				return self._page(path, query, release["assets"])
+
+		elif method == "DELETE" and re.fullmatch(r"/releases/assets/\d+", rest):
+			asset_id = int(rest.split('/')[-1])
+			with self._lock:
+				for release in releases.values():
+					release["assets"] = [asset for asset in release["assets"] if asset["id"] != asset_id]
+			return 204, {}, []
+
+		return _not_found()
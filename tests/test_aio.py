@@ -0,0 +1,317 @@
+# stdlib
+import asyncio
+import datetime
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# 3rd party
+import httpx
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from octocheese.aio import AsyncGitHub, copy_pypi_2_github_async, download_file_async, make_async_client
+from octocheese.state import SyncState
+
+
+class FakeService:
+	"""
+	Serves the parts of the GitHub REST API and PyPI used by :mod:`octocheese.aio`.
+	"""
+
+	def __init__(self, tags: List[str]):
+		self.tags = list(tags)  # Oldest first
+		self.releases: Dict[str, Dict[str, Any]] = {}
+		self.pypi_releases: Dict[str, List[Dict[str, Any]]] = {}
+		self.files: Dict[str, bytes] = {}
+		self.asset_content: Dict[str, bytes] = {}
+		self.requests: List[str] = []
+		self.responses: List[httpx.Response] = []
+
+	def add_release(self, tag_name: str, created_at: Optional[datetime.datetime] = None, **kwargs) -> Dict[str, Any]:
+		release_id = len(self.releases) + 1
+		created_at = created_at or datetime.datetime.now(datetime.timezone.utc)
+		self.releases[tag_name] = release = {
+				"id": release_id,
+				"url": f"https://api.github.com/repos/octocat/octocat/releases/{release_id}",
+				"upload_url": f"https://uploads.github.com/repos/octocat/octocat/releases/{release_id}/assets{{?name,label}}",
+				"tag_name": tag_name,
+				"name": kwargs.get("name", ''),
+				"body": kwargs.get("body", ''),
+				"prerelease": kwargs.get("prerelease", False),
+				"draft": False,
+				"created_at": created_at.isoformat().replace("+00:00", 'Z'),
+				"assets": [],
+				}
+		return release
+
+	def add_asset(self, release: Dict[str, Any], name: str, content: bytes) -> Dict[str, Any]:
+		asset_id = sum(len(release["assets"]) for release in self.releases.values()) + 1
+		url = f"https://api.github.com/repos/octocat/octocat/releases/assets/{asset_id}"
+		self.asset_content[url] = content
+		release["assets"].append({"name": name, "size": len(content), "url": url})
+		return release["assets"][-1]
+
+	def add_file(self, version: str, filename: str, content: bytes) -> None:
+		url = f"https://files.pythonhosted.org/packages/{filename}"
+		self.files[url] = content
+		self.pypi_releases.setdefault(version, []).append({
+				"filename": filename,
+				"url": url,
+				"digests": {"sha256": hashlib.sha256(content).hexdigest()},
+				"size": len(content),
+				"upload_time_iso_8601": "2020-07-04T12:00:00.000000Z",
+				})
+
+	def _page(self, request: httpx.Request, items: list) -> httpx.Response:
+		per_page = int(request.url.params.get("per_page", 30))
+		page = int(request.url.params.get("page", 1))
+		headers = {}
+
+		if page * per_page < len(items):
+			headers["Link"] = f'<{request.url.copy_merge_params({"page": page + 1, "per_page": per_page})}>; rel="next"'
+
+		return httpx.Response(200, json=items[(page - 1) * per_page:page * per_page], headers=headers)
+
+	async def __call__(self, request: httpx.Request) -> httpx.Response:
+		await request.aread()
+		self.requests.append(f"{request.method} {request.url.copy_with(query=None)}")
+
+		if self.responses:
+			return self.responses.pop(0)
+
+		url = str(request.url.copy_with(query=None))
+		repo_url = "https://api.github.com/repos/octocat/octocat"
+
+		if url == "https://pypi.org/pypi/octocat/json":
+			return httpx.Response(
+					200,
+					json={"info": {"name": "octocat", "version": '0'}, "last_serial": 1, "releases": self.pypi_releases},
+					)
+		elif url in self.files:
+			return httpx.Response(200, content=self.files[url])
+		elif url == f"{repo_url}/tags":
+			return self._page(request, [{"name": tag} for tag in reversed(self.tags)])
+		elif url == f"{repo_url}/releases" and request.method == "GET":
+			return self._page(request, list(self.releases.values()))
+		elif url == f"{repo_url}/releases" and request.method == "POST":
+			data = json.loads(request.content)
+			return httpx.Response(201, json=self.add_release(data.pop("tag_name"), **data))
+		elif url.startswith(f"{repo_url}/releases/tags/"):
+			tag_name = url.rsplit('/', 1)[-1]
+			if tag_name in self.releases:
+				return httpx.Response(200, json=self.releases[tag_name])
+			return httpx.Response(404, json={"message": "Not Found"})
+
+		for release in self.releases.values():
+			if request.method == "PATCH" and url == release["url"]:
+				release.update(json.loads(request.content))
+				return httpx.Response(200, json=release)
+			elif request.method == "POST" and url == release["upload_url"].split('{')[0]:
+				self.add_asset(release, request.url.params["name"], request.content)
+				return httpx.Response(201, json=release["assets"][-1])
+			elif request.method == "DELETE" and url in {asset["url"] for asset in release["assets"]}:
+				release["assets"] = [asset for asset in release["assets"] if asset["url"] != url]
+				return httpx.Response(204)
+
+		return httpx.Response(404, json={"message": "Not Found"})
+
+
+def make_clients(service: FakeService):
+	transport = httpx.MockTransport(service)
+	github = AsyncGitHub("1234", client=make_async_client(transport=transport))
+	pypi_client = make_async_client(transport=transport)
+	return github, pypi_client
+
+
+def test_copy_pypi_2_github_async(capsys):
+	service = FakeService(["v0.1.0", "v0.2.0", "v0.3.0", "v0.4.0"])
+	service.add_release("v0.1.0", created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+	existing = service.add_release("v0.2.0")
+	service.add_asset(existing, "octocat-0.2.0.tar.gz", b"sdist")
+
+	for version in ["0.1.0", "0.2.0", "0.3.0"]:
+		service.add_file(version, f"octocat-{version}.tar.gz", b"sdist")
+		service.add_file(version, f"octocat-{version}-py3-none-any.whl", b"wheel")
+
+	async def run():
+		github, pypi_client = make_clients(service)
+		async with github, pypi_client:
+			return await copy_pypi_2_github_async(github, "octocat", "octocat", pypi_client=pypi_client, max_writes=1)
+
+	summary = asyncio.run(run())
+
+	assert summary.releases == {"v0.1.0": "old", "v0.2.0": "updated", "v0.3.0": "created", "v0.4.0": "no-pypi"}
+	assert summary.files == {
+			("v0.2.0", "octocat-0.2.0-py3-none-any.whl"): "copied",
+			("v0.2.0", "octocat-0.2.0.tar.gz"): "exists",
+			("v0.3.0", "octocat-0.3.0-py3-none-any.whl"): "copied",
+			("v0.3.0", "octocat-0.3.0.tar.gz"): "copied",
+			}
+	assert sorted(asset["name"] for asset in service.releases["v0.3.0"]["assets"]) == [
+			"octocat-0.3.0-py3-none-any.whl",
+			"octocat-0.3.0.tar.gz",
+			]
+	assert service.releases["v0.2.0"]["name"] == "Version 0.2.0"
+
+	# The output for each release is printed in tag order
+	stdout = capsys.readouterr().out
+	assert stdout.index("Skipping tag v0.1.0") < stdout.index("Processing release for 0.2.0")
+	assert stdout.index("Processing release for 0.2.0") < stdout.index("Processing release for 0.3.0")
+
+
+def test_copy_pypi_2_github_async_max_tags():
+	service = FakeService([f"v0.{minor}.0" for minor in range(250)])
+
+	async def run():
+		github, pypi_client = make_clients(service)
+		async with github, pypi_client:
+			return await copy_pypi_2_github_async(
+					github,
+					"octocat",
+					"octocat",
+					pypi_client=pypi_client,
+					max_tags=150,
+					)
+
+	summary = asyncio.run(run())
+
+	assert len(summary.releases) == 150
+	assert "v0.249.0" in summary.releases
+	assert "v0.99.0" not in summary.releases
+	assert service.requests.count("GET https://api.github.com/repos/octocat/octocat/tags") == 2
+
+
+def test_copy_pypi_2_github_async_replaces_mismatched_assets():
+	service = FakeService(["v0.1"])
+	release = service.add_release("v0.1")
+	service.add_asset(release, "octocat-0.1.0.tar.gz", b"sdist")
+	service.add_asset(release, "octocat-0.1.0-py3-none-any.whl", b"whe")
+	service.add_file("0.1.0", "octocat-0.1.0.tar.gz", b"sdist")
+	service.add_file("0.1.0", "octocat-0.1.0-py3-none-any.whl", b"wheel")
+
+	async def run():
+		github, pypi_client = make_clients(service)
+		async with github, pypi_client:
+			return await copy_pypi_2_github_async(github, "octocat", "octocat", pypi_client=pypi_client)
+
+	summary = asyncio.run(run())
+
+	# The tag is matched to the release after normalising its version number
+	assert summary.releases == {"v0.1": "updated"}
+	assert summary.files == {
+			("v0.1", "octocat-0.1.0.tar.gz"): "exists",
+			("v0.1", "octocat-0.1.0-py3-none-any.whl"): "replaced",
+			}
+	assert sorted((asset["name"], service.asset_content[asset["url"]]) for asset in release["assets"]) == [
+			("octocat-0.1.0-py3-none-any.whl", b"wheel"),
+			("octocat-0.1.0.tar.gz", b"sdist"),
+			]
+	assert release["name"] == "Version 0.1.0"
+
+
+@pytest.mark.parametrize(
+		"max_age, recent_only, expected",
+		[
+				pytest.param(datetime.timedelta(days=7), False, {"v0.1.0": "old", "v0.2.0": "created"}, id="default"),
+				pytest.param(datetime.timedelta(days=7), True, {}, id="recent_only"),
+				pytest.param(None, True, {"v0.1.0": "updated", "v0.2.0": "created"}, id="no_window"),
+				],
+		)
+def test_copy_pypi_2_github_async_max_age(max_age, recent_only: bool, expected: Dict[str, str]):
+	service = FakeService(["v0.1.0", "v0.2.0", "v0.3.0"])
+	service.add_release("v0.1.0", created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+
+	for version in ["0.1.0", "0.2.0", "0.3.0"]:
+		service.add_file(version, f"octocat-{version}.tar.gz", b"sdist")
+
+	# Only 0.3.0 was uploaded within the update window
+	service.pypi_releases["0.3.0"][0]["upload_time_iso_8601"] = datetime.datetime.now(
+			datetime.timezone.utc
+			).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+	async def run():
+		github, pypi_client = make_clients(service)
+		async with github, pypi_client:
+			return await copy_pypi_2_github_async(
+					github,
+					"octocat",
+					"octocat",
+					pypi_client=pypi_client,
+					max_age=max_age,
+					recent_only=recent_only,
+					)
+
+	summary = asyncio.run(run())
+
+	# With recent_only, tags are only listed until the releases in the window are found
+	assert summary.releases == {**expected, "v0.3.0": "created"}
+
+
+def test_copy_pypi_2_github_async_state_wider_window(tmp_pathplus: PathPlus):
+	service = FakeService(["v0.1.0"])
+	release = service.add_release("v0.1.0", created_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+	service.add_file("0.1.0", "octocat-0.1.0.tar.gz", b"sdist")
+	state = SyncState(tmp_pathplus / "state.json")
+
+	async def run(**kwargs):
+		github, pypi_client = make_clients(service)
+		async with github, pypi_client:
+			return await copy_pypi_2_github_async(
+					github,
+					"octocat",
+					"octocat",
+					pypi_client=pypi_client,
+					state=state,
+					**kwargs,
+					)
+
+	assert asyncio.run(run()).releases == {"v0.1.0": "old"}
+
+	# A release frozen with the default window is backfilled once the window is widened
+	summary = asyncio.run(run(max_age=None))
+	assert summary.releases == {"v0.1.0": "updated"}
+	assert summary.files == {("v0.1.0", "octocat-0.1.0.tar.gz"): "copied"}
+	assert [asset["name"] for asset in release["assets"]] == ["octocat-0.1.0.tar.gz"]
+
+	assert asyncio.run(run()).releases == {"v0.1.0": "old"}
+
+
+def test_retry_after(monkeypatch):
+	service = FakeService([])
+	service.responses.append(httpx.Response(429, headers={"Retry-After": '3'}))
+	sleeps = []
+
+	async def sleep(seconds: float) -> None:
+		sleeps.append(seconds)
+
+	monkeypatch.setattr(asyncio, "sleep", sleep)
+
+	async def run():
+		github, _ = make_clients(service)
+		async with github:
+			return await github.tags("octocat", "octocat")
+
+	assert asyncio.run(run()) == []
+	assert sleeps == [3]
+	assert len(service.requests) == 2
+
+
+def test_download_file_async(tmp_pathplus: PathPlus):
+	service = FakeService([])
+	service.add_file("0.1.0", "octocat-0.1.0.tar.gz", b"sdist")
+	url = "https://files.pythonhosted.org/packages/octocat-0.1.0.tar.gz"
+
+	async def run(url: str, checksum: Optional[str] = None):
+		async with make_async_client(transport=httpx.MockTransport(service)) as client:
+			return await download_file_async(client, url, tmp_pathplus / "download.tar.gz", checksum)
+
+	assert asyncio.run(run(url, hashlib.sha256(b"sdist").hexdigest())) == hashlib.sha256(b"sdist").hexdigest()
+	assert (tmp_pathplus / "download.tar.gz").read_bytes() == b"sdist"
+
+	with pytest.raises(ValueError, match="The checksums for octocat-0.1.0.tar.gz do not match!"):
+		asyncio.run(run(url, '0' * 64))
+
+	with pytest.raises(OSError, match="Unable to download 'missing.tar.gz' from PyPI."):
+		asyncio.run(run("https://files.pythonhosted.org/packages/missing.tar.gz"))
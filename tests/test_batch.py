@@ -0,0 +1,214 @@
+# stdlib
+from datetime import timedelta
+
+# 3rd party
+import pytest
+import requests
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import octocheese.pypi
+from octocheese.batch import BatchProject, load_manifest, main, run_batch
+from octocheese.pypi import ChangeDetector
+from tests.conftest import FakeFleet, FakeRepo
+
+
+def test_load_manifest_toml(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "manifest.toml").write_lines([
+			"[defaults]",
+			"max_tags = 5",
+			"max_age = 14",
+			"recent_only = true",
+			'',
+			"[projects]",
+			'octocheese = "domdfcoding/octocheese"',
+			'',
+			"[projects.consolekit]",
+			'repo = "domdfcoding/consolekit"',
+			"self_promotion = false",
+			"max_tags = 2",
+			"max_age = -1",
+			'tag_prefix = "consolekit-"',
+			])
+
+	assert load_manifest(tmp_pathplus / "manifest.toml") == [
+			BatchProject(
+					"octocheese",
+					"domdfcoding",
+					"octocheese",
+					{"max_tags": 5, "max_age": timedelta(days=14), "recent_only": True},
+					),
+			BatchProject(
+					"consolekit",
+					"domdfcoding",
+					"consolekit",
+					{
+							"max_tags": 2,
+							"max_age": None,
+							"recent_only": True,
+							"self_promotion": False,
+							"tag_patterns": [r"consolekit\-v?(?P<version>.+)"],
+							},
+					),
+			]
+
+
+def test_load_manifest_json(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "manifest.json").dump_json({
+			"projects": {"octocheese": {"repo": "domdfcoding/octocheese", "jobs": 4}},
+			})
+
+	assert load_manifest(tmp_pathplus / "manifest.json") == [
+			BatchProject("octocheese", "domdfcoding", "octocheese", {"jobs": 4}),
+			]
+
+
+@pytest.mark.parametrize(
+		"manifest, message",
+		[
+				pytest.param({}, "The manifest must contain a 'projects' table.", id="no_projects"),
+				pytest.param({"projects": {"octocheese": 1}}, "must be a string or a table", id="bad_entry"),
+				pytest.param({"projects": {"octocheese": "octocheese"}}, "in the form", id="bad_repo"),
+				pytest.param(
+						{"projects": {"octocheese": {"repo": "a/b", "colour": "blue"}}},
+						"Unknown option 'colour' for octocheese.",
+						id="unknown_option",
+						),
+				pytest.param(
+						{"defaults": {"max_tags": True}, "projects": {}},
+						r"Option 'max_tags' for \[defaults\] must be of type int.",
+						id="bad_type",
+						),
+				pytest.param(
+						{"defaults": {"tag_patterns": ["v(?P<version>.+)", 1]}, "projects": {}},
+						r"Option 'tag_patterns' for \[defaults\] must be a list of strings.",
+						id="bad_list",
+						),
+				],
+		)
+def test_load_manifest_errors(tmp_pathplus: PathPlus, manifest, message: str):
+	(tmp_pathplus / "manifest.json").dump_json(manifest)
+
+	with pytest.raises(ValueError, match=message):
+		load_manifest(tmp_pathplus / "manifest.json")
+
+
+def test_load_manifest_unsupported(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "manifest.ini").touch()
+
+	with pytest.raises(ValueError, match="Unsupported manifest format '.ini'"):
+		load_manifest(tmp_pathplus / "manifest.ini")
+
+
+def test_main_invalid_manifest(tmp_pathplus: PathPlus, fake_token):
+	(tmp_pathplus / "manifest.json").dump_json({"projects": []})
+
+	runner = CliRunner()
+	result: Result = runner.invoke(main, args=[str(tmp_pathplus / "manifest.json")])
+
+	assert result.exit_code == 2
+	assert "The manifest must contain a 'projects' table." in result.stdout
+
+
+@pytest.mark.parametrize("project_jobs", [1, 3])
+def test_run_batch(fake_pypi, capsys, project_jobs: int):
+	fleet = FakeFleet({"alpha": FakeRepo(["v1.0.0"]), "beta": FakeRepo(["v2.0.0"])})
+	fake_pypi.add("alpha-1.0.0.tar.gz", b"alpha", version="1.0.0")
+	fake_pypi.add("beta-2.0.0.tar.gz", b"beta", version="2.0.0")
+
+	projects = [
+			BatchProject("alpha", "octocat", "alpha", {}),
+			BatchProject("missing", "octocat", "missing", {}),
+			BatchProject("beta", "octocat", "beta", {"self_promotion": False}),
+			]
+
+	client = fake_pypi.client()
+	report = run_batch(fleet, projects, project_jobs=project_jobs, max_writes=1, client=client)
+
+	assert set(report.summaries) == {"alpha", "beta"}
+	assert report.summaries["alpha"].releases == {"v1.0.0": "created"}
+	assert report.summaries["beta"].files == {("v2.0.0", "beta-2.0.0.tar.gz"): "copied"}
+	assert list(report.errors) == ["missing"]
+	assert "Powered by OctoCheese" not in fleet.repos["beta"].releases_by_tag["v2.0.0"].body
+
+	output = capsys.readouterr().out
+	assert output.index("Running for alpha") < output.index("Running for missing") < output.index("Running for beta")
+
+	formatted = report.format().splitlines()
+	assert formatted[0] == "alpha (octocat/alpha):"
+	assert formatted[-1] == "Projects: 2 completed, 1 failed"
+	assert "missing (octocat/missing):" in formatted
+	assert any(line.startswith("  Error: ") for line in formatted)
+
+
+def test_run_batch_changelog(fake_pypi, tmp_pathplus: PathPlus, capsys, monkeypatch):
+	fleet = FakeFleet({"alpha": FakeRepo(["v1.0.0", "v1.1.0"]), "beta": FakeRepo(["v2.0.0"])})
+	fake_pypi.add("alpha-1.0.0.tar.gz", b"alpha", version="1.0.0")
+	fake_pypi.add("beta-2.0.0.tar.gz", b"beta", version="2.0.0")
+	detector = ChangeDetector(tmp_pathplus / "changelog.json")
+
+	projects = [BatchProject("alpha", "octocat", "alpha", {}), BatchProject("beta", "octocat", "beta", {})]
+	client = fake_pypi.client()
+
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert set(report.summaries) == {"alpha", "beta"}
+
+	fake_pypi.urls.clear()
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert report.summaries == {}
+	assert report.unchanged == ["alpha", "beta"]
+	assert report.format().splitlines() == [
+			"alpha (octocat/alpha):",
+			"  Unchanged on PyPI",
+			"beta (octocat/beta):",
+			"  Unchanged on PyPI",
+			"Projects: 0 completed, 0 failed, 2 unchanged",
+			]
+	assert fake_pypi.urls == ["https://pypi.org/pypi"]
+
+	fake_pypi.add("alpha-1.1.0.tar.gz", b"alpha", version="1.1.0")
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert report.summaries["alpha"].releases == {"v1.1.0": "created", "v1.0.0": "unchanged"}
+	assert report.unchanged == ["beta"]
+
+	# A file could not be copied, so the project is processed again even though PyPI is unchanged
+	fake_pypi.add("beta-2.1.0.tar.gz", b"beta", version="2.1.0")
+	del fake_pypi.files["beta-2.1.0.tar.gz"]
+	fleet.repos["beta"]._tags.append("v2.1.0")
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert report.summaries["beta"].failed_files == [("v2.1.0", "beta-2.1.0.tar.gz")]
+	assert detector.load()["retry"] == ["beta"]
+
+	fake_pypi.files["beta-2.1.0.tar.gz"] = b"beta"
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert report.summaries["beta"].files[("v2.1.0", "beta-2.1.0.tar.gz")] == "copied"
+	assert report.unchanged == ["alpha"]
+	assert detector.load()["retry"] == []
+
+	# The release is on PyPI before its tag is pushed, so the project is processed again until the tag exists
+	fake_pypi.add("beta-2.2.0.tar.gz", b"beta", version="2.2.0")
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert report.summaries["beta"].untagged == ["2.2.0"]
+	assert detector.load()["retry"] == ["beta"]
+
+	fleet.repos["beta"]._tags.append("v2.2.0")
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert report.unchanged == ["alpha"]
+	assert report.summaries["beta"].releases["v2.2.0"] == "created"
+	assert report.summaries["beta"].untagged == []
+	assert detector.load()["retry"] == []
+
+	# The changelog cannot be obtained, so every project is processed
+	(tmp_pathplus / "changelog.json").dump_json({"serial": 1, "projects": ["alpha", "beta"]})
+	capsys.readouterr()
+
+	def get_changelog(client, since_serial: int):
+		raise requests.HTTPError("503 Server Error: Service Unavailable")
+
+	monkeypatch.setattr(octocheese.pypi, "get_changelog", get_changelog)
+
+	report = run_batch(fleet, projects, client=client, change_detector=detector)
+	assert set(report.summaries) == {"alpha", "beta"}
+	assert "Unable to obtain the changelog from PyPI" in capsys.readouterr().err
+	assert detector.load() == {"serial": 1, "projects": ["alpha", "beta"]}
@@ -1,3 +1,6 @@
+# stdlib
+import threading
+
 # this package
 from octocheese import colours
 
@@ -54,3 +57,54 @@ def test_error(capsys):
 
 	captured = capsys.readouterr()
 	assert captured.err == "\033[31m1234\033[39m\n"
+
+
+def test_info(capsys):
+	colours.info("hello world")
+
+	captured = capsys.readouterr()
+	assert captured.out == "hello world\n"
+
+
+def test_output_buffer(capsys):
+	with colours.OutputBuffer() as buffer:
+		colours.success("hello world")
+		colours.error("something else")
+		colours.info("1234")
+
+	captured = capsys.readouterr()
+	assert captured.out == ''
+	assert captured.err == ''
+	assert len(buffer) == 3
+
+	buffer.flush()
+	assert not buffer
+
+	captured = capsys.readouterr()
+	assert captured.out == "\033[32mhello world\033[39m\n1234\n"
+	assert captured.err == "\033[31msomething else\033[39m\n"
+
+
+def test_output_buffer_nested(capsys):
+	with colours.OutputBuffer() as outer:
+		with colours.OutputBuffer() as inner:
+			colours.warning("hello world")
+
+		colours.warning("something else")
+		inner.flush()
+
+	assert outer == [
+			(colours.stderr_writer, "\033[33msomething else\033[39m"),
+			(colours.stderr_writer, "\033[33mhello world\033[39m"),
+			]
+
+
+def test_output_buffer_thread_local(capsys):
+	with colours.OutputBuffer() as buffer:
+		thread = threading.Thread(target=colours.success, args=("from another thread", ))
+		thread.start()
+		thread.join()
+
+	assert not buffer
+	captured = capsys.readouterr()
+	assert captured.out == "\033[32mfrom another thread\033[39m\n"
@@ -1,18 +1,26 @@
 # stdlib
+import datetime as dt
 import gzip
+import hashlib
 import pathlib
 import tarfile
 import tempfile
 import zipfile
-from datetime import date
+from datetime import date, datetime, timezone
 
 # 3rd party
 import pytest
+from apeye_core import URL
 from coincidence.regressions import AdvancedDataRegressionFixture, AdvancedFileRegressionFixture
 from pypi_json import PyPIJSON
 
 # this package
 import octocheese.core
+from octocheese.pypi import MetadataCache
+from octocheese.state import SyncState
+from octocheese.summary import SyncSummary
+from octocheese.transfer import FileCache
+from tests.conftest import FakeAsset, FakeGitHub, FakeRelease, FakeRepo
 
 
 def test_get_file_from_pypi(advanced_data_regression: AdvancedDataRegressionFixture):
@@ -100,3 +108,518 @@ def test_make_release_message(
 			)
 
 	advanced_file_regression.check(release_message, extension=".md")
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_update_github_release_jobs(fake_repo, fake_pypi, capsys, jobs: int):
+	file_urls = [fake_pypi.add(f"octocat-1.2.3-{idx}.whl", f"wheel {idx}".encode()) for idx in range(8)]
+	del fake_pypi.files["octocat-1.2.3-2.whl"]  # Missing; skipped
+	del fake_pypi.files["octocat-1.2.3-5.whl"]
+
+	release = octocheese.core.update_github_release(
+			fake_repo,
+			"v1.2.3",
+			"octocat",
+			self_promotion=False,
+			file_urls=file_urls,
+			jobs=jobs,
+			client=fake_pypi.client(),
+			)
+
+	assert sorted(asset.name for asset in release.original_assets) == [
+			"octocat-1.2.3-0.whl",
+			"octocat-1.2.3-1.whl",
+			"octocat-1.2.3-3.whl",
+			"octocat-1.2.3-4.whl",
+			"octocat-1.2.3-6.whl",
+			"octocat-1.2.3-7.whl",
+			]
+
+	if jobs == 1:
+		assert release.max_active_uploads == 1
+	else:
+		assert release.max_active_uploads > 1
+
+	# Output is in the same order regardless of the number of jobs
+	captured = capsys.readouterr()
+	assert captured.out.splitlines() == [
+			f"\033[32mCopying {URL(url['url']).name} from PyPI to GitHub Releases.\033[39m"
+			for idx, url in enumerate(file_urls)
+			if idx not in {2, 5}
+			]
+	assert captured.err.splitlines() == [
+			"\033[31mUnable to download 'octocat-1.2.3-2.whl' from PyPI. Skipping.\033[39m",
+			"\033[31mUnable to download 'octocat-1.2.3-5.whl' from PyPI. Skipping.\033[39m",
+			]
+
+
+def test_update_github_release_jobs_traceback(fake_repo, fake_pypi):
+	file_urls = [fake_pypi.add(f"octocat-1.2.3-{idx}.whl", b"wheel") for idx in range(4)]
+	del fake_pypi.files["octocat-1.2.3-1.whl"]
+
+	with pytest.raises(OSError, match="Unable to download 'octocat-1.2.3-1.whl' from PyPI."):
+		octocheese.core.update_github_release(
+				fake_repo,
+				"v1.2.3",
+				"octocat",
+				file_urls=file_urls,
+				traceback=True,
+				jobs=2,
+				client=fake_pypi.client(),
+				)
+
+
+def test_update_github_release_mismatched_assets(fake_repo, fake_pypi):
+	fake_repo.releases_by_tag["v1.2.3"] = existing = FakeRelease("v1.2.3")
+	existing.original_assets = [
+			FakeAsset("octocat-1.2.3.tar.gz", b"sdist"),
+			FakeAsset("octocat-1.2.3-py3-none-any.whl", b"whe"),
+			FakeAsset("octocat-1.2.3-py2-none-any.whl", b"wheel", state="starter"),
+			]
+	file_urls = [
+			fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist", version="1.2.3"),
+			fake_pypi.add("octocat-1.2.3-py3-none-any.whl", b"wheel", version="1.2.3"),
+			fake_pypi.add("octocat-1.2.3-py2-none-any.whl", b"wheel", version="1.2.3"),
+			]
+	for file_url, pypi_file in zip(file_urls, fake_pypi.release_files("octocat", "1.2.3")):
+		file_url["size"] = pypi_file["size"]
+
+	summary = SyncSummary()
+
+	octocheese.core.update_github_release(
+			fake_repo,
+			"v1.2.3",
+			"octocat",
+			file_urls=file_urls,
+			summary=summary,
+			client=fake_pypi.client(),
+			)
+
+	# The truncated and incomplete uploads are replaced; the matching asset is not downloaded
+	assert summary.files == {
+			("v1.2.3", "octocat-1.2.3.tar.gz"): "exists",
+			("v1.2.3", "octocat-1.2.3-py3-none-any.whl"): "replaced",
+			("v1.2.3", "octocat-1.2.3-py2-none-any.whl"): "replaced",
+			}
+	assert sorted((asset.name, asset.content) for asset in existing.assets()) == [
+			("octocat-1.2.3-py2-none-any.whl", b"wheel"),
+			("octocat-1.2.3-py3-none-any.whl", b"wheel"),
+			("octocat-1.2.3.tar.gz", b"sdist"),
+			]
+	assert "octocat-1.2.3.tar.gz" not in ' '.join(fake_pypi.urls)
+
+
+def test_asset_matches():
+	asset = FakeAsset("octocat-1.2.3.tar.gz", b"sdist")
+	digest = hashlib.sha256(b"sdist").hexdigest()
+
+	assert octocheese.core._asset_matches(asset, 5, digest)
+	assert octocheese.core._asset_matches(asset, None, None)
+	assert not octocheese.core._asset_matches(asset, 4, digest)
+
+	asset.digest = f"sha256:{digest}"
+	assert octocheese.core._asset_matches(asset, None, digest)
+	assert not octocheese.core._asset_matches(asset, None, '0' * 64)
+
+
+@pytest.mark.parametrize("release_jobs", [1, 3])
+def test_copy_pypi_2_github_release_jobs(fake_github, fake_pypi, capsys, release_jobs: int):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0", "v0.4.0", "v0.5.0"]
+	fake_github.repo.releases_by_tag["v0.2.0"] = existing = FakeRelease("v0.2.0")
+	existing.original_assets.append(FakeAsset("octocat-0.2.0.tar.gz", b"sdist"))
+
+	for version in ["0.1.0", "0.2.0", "0.3.0", "0.5.0"]:
+		fake_pypi.add(f"octocat-{version}.tar.gz", b"sdist", version=version)
+		fake_pypi.add(f"octocat-{version}-py3-none-any.whl", b"wheel", version=version)
+
+	summary = octocheese.core.copy_pypi_2_github(
+			fake_github,
+			"octocat",
+			"octocat",
+			self_promotion=False,
+			jobs=2,
+			release_jobs=release_jobs,
+			max_writes=1,
+			client=fake_pypi.client(),
+			)
+
+	assert summary.releases == {
+			"v0.1.0": "created",
+			"v0.2.0": "updated",
+			"v0.3.0": "created",
+			"v0.4.0": "no-pypi",
+			"v0.5.0": "created",
+			}
+	assert summary.format() == """Summary:
+  Releases: 3 created, 1 updated, 1 without a PyPI release
+  Files: 7 copied, 1 already on GitHub"""
+
+	assert max(release.max_active_uploads for release in fake_github.repo.releases_by_tag.values()) == 1
+
+	captured = capsys.readouterr()
+	assert [line for line in captured.out.splitlines() if line.startswith("Processing")] == [
+			"Processing release for 0.1.0",
+			"Processing release for 0.2.0",
+			"Processing release for 0.3.0",
+			"Processing release for 0.5.0",
+			]
+
+
+def test_copy_pypi_2_github_shared_client(fake_github, fake_pypi, monkeypatch):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0"]
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist", version="0.2.0")
+	fake_pypi.add("octocat-0.2.0-py3-none-any.whl", b"wheel", version="0.2.0")
+
+	clients = []
+
+	def make_pypi_client(pool_size: int):
+		clients.append(pool_size)
+		return fake_pypi.client()
+
+	monkeypatch.setattr(octocheese.core, "make_pypi_client", make_pypi_client)
+
+	summary = octocheese.core.copy_pypi_2_github(
+			fake_github,
+			"octocat",
+			"octocat",
+			self_promotion=False,
+			jobs=4,
+			release_jobs=4,
+			)
+
+	assert summary.format() == "Summary:\n  Releases: 2 created\n  Files: 3 copied"
+	assert clients == [16]
+	assert len(fake_pypi.urls) == 4
+
+
+def test_update_github_release_unchanged(fake_repo, monkeypatch):
+	created_at = datetime.now(timezone.utc)
+
+	monkeypatch.setattr(octocheese.core, "TODAY", date(2020, 7, 4))
+	body = octocheese.core.make_release_message("octocat", "1.2.3", created_at).replace("\n", "\r\n")
+	fake_repo.releases_by_tag["v1.2.3"] = release = FakeRelease(
+			"v1.2.3", name="Version 1.2.3", body=body, created_at=created_at
+			)
+
+	monkeypatch.setattr(octocheese.core, "TODAY", date(2020, 7, 5))
+	summary = SyncSummary()
+
+	octocheese.core.update_github_release(fake_repo, "v1.2.3", "octocat", summary=summary)
+	assert release.edits == 0
+	assert summary.releases == {"v1.2.3": "unchanged"}
+	assert summary.skipped_edits == 1
+
+	octocheese.core.update_github_release(fake_repo, "v1.2.3", "octocat", summary=summary, force_edit=True)
+	assert release.edits == 1
+	assert "Last Updated 2020-07-05" in release.body
+	assert summary.releases == {"v1.2.3": "updated"}
+
+	octocheese.core.update_github_release(fake_repo, "v1.2.3", "octocat", summary=summary, changelog="* Fixed")
+	assert release.edits == 2
+	assert "* Fixed" in release.body
+
+	release.prerelease = True
+	octocheese.core.update_github_release(fake_repo, "v1.2.3", "octocat", summary=summary, changelog="* Fixed")
+	assert release.edits == 3
+	assert release.prerelease is False
+
+
+def test_copy_pypi_2_github_metadata_cache(fake_github, fake_pypi, tmp_pathplus, capsys):
+	fake_github.repo._tags = ["v0.1.0"]
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	metadata_cache = MetadataCache(tmp_pathplus)
+
+	def run():
+		return octocheese.core.copy_pypi_2_github(
+				fake_github,
+				"octocat",
+				"octocat",
+				self_promotion=False,
+				client=fake_pypi.client(),
+				metadata_cache=metadata_cache,
+				)
+
+	assert run().releases == {"v0.1.0": "created"}
+	capsys.readouterr()
+
+	assert run().releases == {}
+	assert capsys.readouterr().out == "Nothing has changed on PyPI for 'octocat' since the last run. Skipping.\n"
+
+	fake_github.repo._tags.append("v0.2.0")
+	fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist", version="0.2.0")
+	assert run().releases == {"v0.1.0": "unchanged", "v0.2.0": "created"}
+
+	# The release is uploaded before its tag is pushed
+	fake_pypi.add("octocat-0.3.0.tar.gz", b"sdist", version="0.3.0")
+	capsys.readouterr()
+	assert run().releases == {"v0.1.0": "unchanged", "v0.2.0": "unchanged"}
+	assert "some releases have no tag yet: 0.3.0" in capsys.readouterr().out
+	assert run().releases == {"v0.1.0": "unchanged", "v0.2.0": "unchanged"}
+
+	fake_github.repo._tags.append("v0.3.0")
+	assert run().releases == {"v0.1.0": "unchanged", "v0.2.0": "unchanged", "v0.3.0": "created"}
+	assert run().releases == {}
+
+
+def test_copy_pypi_2_github_state_wider_window(fake_github, fake_pypi, tmp_pathplus):
+	fake_github.repo._tags = ["v0.1.0"]
+	fake_github.repo.releases_by_tag["v0.1.0"] = release = FakeRelease(
+			"v0.1.0", created_at=datetime(2020, 1, 1, tzinfo=timezone.utc)
+			)
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	state = SyncState(tmp_pathplus / "state.json")
+
+	def run(**kwargs):
+		return octocheese.core.copy_pypi_2_github(
+				fake_github,
+				"octocat",
+				"octocat",
+				client=fake_pypi.client(),
+				state=state,
+				**kwargs,
+				)
+
+	assert run().releases == {"v0.1.0": "old"}
+
+	# A release frozen with the default window is backfilled once the window is widened
+	summary = run(max_age=None)
+	assert summary.releases == {"v0.1.0": "updated"}
+	assert summary.files == {("v0.1.0", "octocat-0.1.0.tar.gz"): "copied"}
+	assert [asset.name for asset in release.assets()] == ["octocat-0.1.0.tar.gz"]
+
+	assert run(max_age=dt.timedelta(days=365 * 50)).releases == {"v0.1.0": "synced"}
+	assert run().releases == {"v0.1.0": "old"}
+
+
+def test_copy_pypi_2_github_state(fake_github, fake_pypi, tmp_pathplus):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0"]
+	fake_github.repo.releases_by_tag["v0.1.0"] = FakeRelease(
+			"v0.1.0", created_at=datetime(2020, 1, 1, tzinfo=timezone.utc)
+			)
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist", version="0.2.0")
+	fake_pypi.add("octocat-0.3.0.tar.gz", b"sdist", version="0.3.0")
+	fake_pypi.add("octocat-0.3.0-py3-none-any.whl", b"wheel", version="0.3.0")
+	del fake_pypi.files["octocat-0.3.0-py3-none-any.whl"]
+
+	def run(**kwargs):
+		return octocheese.core.copy_pypi_2_github(
+				fake_github,
+				"octocat",
+				"octocat",
+				client=fake_pypi.client(),
+				state=SyncState(tmp_pathplus / "state.json"),
+				**kwargs,
+				)
+
+	summary = run()
+	assert summary.releases == {"v0.1.0": "old", "v0.2.0": "created", "v0.3.0": "created"}
+	assert summary.failed_files == [("v0.3.0", "octocat-0.3.0-py3-none-any.whl")]
+	assert fake_github.repo.calls == ["releases"]
+
+	# Only the failed file is retried
+	fake_pypi.files["octocat-0.3.0-py3-none-any.whl"] = b"wheel"
+	summary = run()
+	assert summary.releases == {"v0.1.0": "old", "v0.2.0": "synced", "v0.3.0": "unchanged"}
+	assert summary.files == {("v0.3.0", "octocat-0.3.0-py3-none-any.whl"): "copied"}
+	assert fake_github.repo.calls[1:] == ["releases"]
+
+	summary = run()
+	assert summary.releases == {"v0.1.0": "old", "v0.2.0": "synced", "v0.3.0": "synced"}
+	assert fake_github.repo.calls[2:] == []
+
+	# Changing the message options revisits the releases
+	summary = run(self_promotion=False)
+	assert summary.releases == {"v0.1.0": "old", "v0.2.0": "updated", "v0.3.0": "updated"}
+	assert summary.files == {}
+
+
+def test_copy_pypi_2_github_release_index(fake_github, fake_pypi):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0"]
+	fake_github.repo.releases_by_tag["v0.1.0"] = existing = FakeRelease("v0.1.0")
+	existing.original_assets.append(FakeAsset("octocat-0.1.0.tar.gz", b"sdist"))
+	fake_github.repo.releases_by_tag["v0.2.0"] = draft = FakeRelease("v0.2.0")
+	draft.draft = True
+
+	for version in ["0.1.0", "0.2.0", "0.3.0"]:
+		fake_pypi.add(f"octocat-{version}.tar.gz", b"sdist", version=version)
+
+	summary = octocheese.core.copy_pypi_2_github(fake_github, "octocat", "octocat", client=fake_pypi.client())
+
+	assert summary.releases == {"v0.1.0": "updated", "v0.2.0": "created", "v0.3.0": "created"}
+	assert summary.files == {
+			("v0.1.0", "octocat-0.1.0.tar.gz"): "exists",
+			("v0.2.0", "octocat-0.2.0.tar.gz"): "copied",
+			("v0.3.0", "octocat-0.3.0.tar.gz"): "copied",
+			}
+	assert fake_github.repo.calls == ["releases"]
+
+
+def test_update_github_release_max_age(fake_repo, capsys):
+	created_at = datetime.now(timezone.utc) - dt.timedelta(days=10)
+	fake_repo.releases_by_tag["v0.1.0"] = release = FakeRelease("v0.1.0", created_at=created_at)
+
+	summary = SyncSummary()
+	octocheese.core.update_github_release(fake_repo, "v0.1.0", "octocat", summary=summary)
+	assert summary.releases == {"v0.1.0": "old"}
+	assert release.edits == 0
+	assert capsys.readouterr().out == "Skipping tag v0.1.0 as it is more than 7 days old.\n"
+
+	for max_age, outcome in [(dt.timedelta(days=30), "updated"), (None, "unchanged")]:
+		summary = SyncSummary()
+		octocheese.core.update_github_release(fake_repo, "v0.1.0", "octocat", summary=summary, max_age=max_age)
+		assert summary.releases == {"v0.1.0": outcome}
+
+
+def test_copy_pypi_2_github_max_age(fake_github, fake_pypi, capsys):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0", "v0.4.0"]
+	a_month_ago = datetime.now(timezone.utc) - dt.timedelta(days=30)
+
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0", upload_time=a_month_ago)
+	fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist", version="0.2.0", upload_time=a_month_ago)
+	fake_pypi.add("octocat-0.3.0.tar.gz", b"sdist", version="0.3.0")
+	fake_pypi.add("octocat-0.4.0.tar.gz", b"sdist", version="0.4.0", upload_time=a_month_ago)
+	fake_pypi.add("octocat-0.4.0-py3-none-any.whl", b"wheel", version="0.4.0")
+
+	def run(**kwargs):
+		return octocheese.core.copy_pypi_2_github(
+				fake_github,
+				"octocat",
+				"octocat",
+				client=fake_pypi.client(),
+				recent_only=True,
+				**kwargs,
+				)
+
+	# The tags are listed until one has been found for each recent release on PyPI
+	assert run().releases == {"v0.3.0": "created", "v0.4.0": "created"}
+	assert fake_github.repo.tags_listed == 2
+
+	summary = run(max_age=dt.timedelta(days=60))
+	assert summary.releases == {"v0.1.0": "created", "v0.2.0": "created", "v0.3.0": "unchanged", "v0.4.0": "unchanged"}
+
+
+def test_copy_pypi_2_github_max_age_backfill(fake_github, fake_pypi):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0"]
+	fake_github.repo.releases_by_tag["v0.1.0"] = FakeRelease(
+			"v0.1.0", created_at=datetime(2020, 1, 1, tzinfo=timezone.utc)
+			)
+	a_month_ago = datetime.now(timezone.utc) - dt.timedelta(days=30)
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0", upload_time=a_month_ago)
+	fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist", version="0.2.0", upload_time=a_month_ago)
+
+	summary = octocheese.core.copy_pypi_2_github(fake_github, "octocat", "octocat", client=fake_pypi.client())
+
+	# Missing releases are created however old they are, but old existing releases are left unchanged
+	assert summary.releases == {"v0.1.0": "old", "v0.2.0": "created"}
+	assert fake_github.repo.releases_by_tag["v0.1.0"].edits == 0
+
+
+def test_copy_pypi_2_github_max_age_old_tags(fake_github, fake_pypi, capsys):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0"]
+	a_month_ago = datetime.now(timezone.utc) - dt.timedelta(days=30)
+
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0", upload_time=a_month_ago)
+	fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist", version="0.2.0")
+
+	summary = octocheese.core.copy_pypi_2_github(
+			fake_github,
+			"octocat",
+			"octocat",
+			client=fake_pypi.client(),
+			recent_only=True,
+			)
+
+	# Tags listed before the last recent release is found are still reported
+	assert summary.releases == {"v0.2.0": "created", "v0.3.0": "no-pypi"}
+	assert fake_github.repo.tags_listed == 2
+
+
+@pytest.mark.parametrize("backend", ["rest", "graphql"])
+def test_copy_pypi_2_github_max_age_nothing_recent(fake_github, fake_pypi, capsys, backend: str):
+	fake_github.repo._tags = ["v0.1.0"]
+	a_month_ago = datetime.now(timezone.utc) - dt.timedelta(days=30)
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0", upload_time=a_month_ago)
+
+	summary = octocheese.core.copy_pypi_2_github(
+			fake_github,
+			"octocat",
+			"octocat",
+			client=fake_pypi.client(),
+			backend=backend,
+			recent_only=True,
+			)
+
+	assert summary.releases == {}
+	assert fake_github.repo.tags_listed == 0
+	assert fake_github.graphql.queries == []
+	assert fake_github.repo.calls == []
+	assert capsys.readouterr().out == "No releases of 'octocat' were uploaded to PyPI in the last 7 days.\n"
+
+
+def test_copy_pypi_2_github_tag_patterns(fake_github, fake_pypi, capsys):
+	fake_github.repo._tags = ["consolekit-v0.1.0", "octocat-v0.1", "octocat-0.2.0-post1", "octocat-v0.3.0"]
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	fake_pypi.add("octocat-0.2.0.post1.tar.gz", b"sdist", version="0.2.0.post1")
+
+	summary = octocheese.core.copy_pypi_2_github(
+			fake_github,
+			"octocat",
+			"octocat",
+			client=fake_pypi.client(),
+			tag_patterns=[r"octocat-v?(?P<version>.+)"],
+			)
+
+	# Tags for other projects in the repository are ignored
+	assert summary.releases == {
+			"octocat-v0.1": "created",
+			"octocat-0.2.0-post1": "created",
+			"octocat-v0.3.0": "no-pypi",
+			}
+	assert summary.files == {
+			("octocat-v0.1", "octocat-0.1.0.tar.gz"): "copied",
+			("octocat-0.2.0-post1", "octocat-0.2.0.post1.tar.gz"): "copied",
+			}
+
+	# The release is named after the version on PyPI
+	assert fake_github.repo.releases_by_tag["octocat-v0.1"].name == "Version 0.1.0"
+	assert fake_github.repo.releases_by_tag["octocat-0.2.0-post1"].name == "Version 0.2.0.post1"
+
+	assert "consolekit" not in capsys.readouterr().err
+
+
+def test_copy_pypi_2_github_file_cache(fake_pypi, tmp_pathplus):
+	file_cache = FileCache(tmp_pathplus / "files")
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	fake_pypi.add("octocat-0.1.0-py3-none-any.whl", b"wheel", version="0.1.0")
+	client = fake_pypi.client()
+
+	# The same project mirrored to two repositories
+	mirrors = [FakeGitHub(FakeRepo(["v0.1.0"])), FakeGitHub(FakeRepo(["v0.1.0"]))]
+
+	for mirror in mirrors:
+		summary = octocheese.core.copy_pypi_2_github(mirror, "octocat", "octocat", client=client, file_cache=file_cache)
+		assert summary.format() == "Summary:\n  Releases: 1 created\n  Files: 2 copied"
+
+	for mirror in mirrors:
+		assets = mirror.repo.releases_by_tag["v0.1.0"].original_assets
+		assert sorted((asset.name, asset.content) for asset in assets) == [
+				("octocat-0.1.0-py3-none-any.whl", b"wheel"),
+				("octocat-0.1.0.tar.gz", b"sdist"),
+				]
+
+	# Metadata twice, each file once
+	assert len(fake_pypi.urls) == 4
+	assert (file_cache.hits, file_cache.misses) == (2, 2)
+
+
+def test_copy_pypi_2_github_verifies_digests(fake_pypi):
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	fake_pypi.release_files("octocat", "0.1.0")[0]["digests"]["blake2b_256"] = '0' * 64
+	github = FakeGitHub(FakeRepo(["v0.1.0"]))
+
+	with pytest.raises(ValueError, match="The checksums for octocat-0.1.0.tar.gz do not match!"):
+		octocheese.core.copy_pypi_2_github(github, "octocat", "octocat", client=fake_pypi.client())
+
+	assert github.repo.releases_by_tag["v0.1.0"].original_assets == []
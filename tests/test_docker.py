@@ -23,3 +23,11 @@ def test_building(repo_root: PathPlus, docker_client):  # noqa: MAN001  # TODO
 		sys.stdout.flush()
 
 	print()
+
+	# The bytecode is compiled when the image is built, so it is not compiled each time the action starts.
+	output = docker_client.containers.run(
+			image,
+			entrypoint=["python3", "-c", "import os, octocheese.runner as m; print(os.path.isfile(m.__cached__))"],
+			remove=True,
+			)
+	assert output == b"True\n"
@@ -0,0 +1,107 @@
+# 3rd party
+import pytest
+
+# this package
+import octocheese.core
+from octocheese.graphql import GraphQLAsset, fetch_inventory, graphql_url
+from tests.conftest import FakeAsset, FakeRelease
+
+
+def test_graphql_url(fake_github, monkeypatch):
+	assert graphql_url(fake_github) == "https://api.github.com/graphql"
+
+	monkeypatch.setattr(fake_github, "_build_url", lambda *args: '/'.join(("https://ghe.example.com/api/v3", *args)))
+	assert graphql_url(fake_github) == "https://ghe.example.com/api/graphql"
+
+
+def test_fetch_inventory(fake_github):
+	repo = fake_github.repo
+	repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0", "v0.4.0", "v0.5.0"]
+
+	for tag in repo._tags[:3]:
+		repo.releases_by_tag[tag] = FakeRelease(tag, name=tag)
+
+	repo.releases_by_tag["v0.1.0"].original_assets.append(FakeAsset("octocat-0.1.0.tar.gz", b"sdist"))
+	repo.releases_by_tag["v0.2.0"].draft = True
+
+	inventory = fetch_inventory(fake_github, repo, page_size=2)
+
+	assert inventory.tags == ["v0.5.0", "v0.4.0", "v0.3.0", "v0.2.0", "v0.1.0"]
+	assert list(inventory.releases) == ["v0.1.0", "v0.3.0"]
+	assert inventory.releases["v0.1.0"].original_assets == [GraphQLAsset("octocat-0.1.0.tar.gz", 5)]
+	assert inventory.releases["v0.3.0"].name == "v0.3.0"
+
+	# Both connections are paged through together
+	assert len(fake_github.graphql.queries) == 3
+	assert repo.calls == []
+
+
+@pytest.mark.parametrize("max_tags, queries", [(1, 2), (2, 2), (3, 2)])
+def test_fetch_inventory_max_tags(fake_github, max_tags: int, queries: int):
+	repo = fake_github.repo
+	repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0", "v0.4.0", "v0.5.0"]
+
+	for tag in repo._tags:
+		repo.releases_by_tag[tag] = FakeRelease(tag)
+
+	inventory = fetch_inventory(fake_github, repo, max_tags=max_tags, page_size=3)
+
+	assert inventory.tags == ["v0.5.0", "v0.4.0", "v0.3.0"][:max_tags]
+	assert len(inventory.releases) == 5
+	assert len(fake_github.graphql.queries) == queries
+
+
+def test_fetch_inventory_stop(fake_github):
+	repo = fake_github.repo
+	repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0", "v0.4.0", "v0.5.0"]
+	listed = []
+
+	def stop(tag_name: str) -> bool:
+		listed.append(tag_name)
+		return tag_name == "v0.4.0"
+
+	inventory = fetch_inventory(fake_github, repo, page_size=1, stop=stop)
+
+	assert inventory.tags == ["v0.5.0", "v0.4.0"]
+	assert listed == ["v0.5.0", "v0.4.0"]
+	assert len(fake_github.graphql.queries) == 2
+
+
+def test_copy_pypi_2_github_graphql(fake_github, fake_pypi):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0", "v0.3.0"]
+	fake_github.repo.releases_by_tag["v0.1.0"] = existing = FakeRelease("v0.1.0")
+	existing.original_assets.append(FakeAsset("octocat-0.1.0.tar.gz", b"sdist"))
+
+	for version in ["0.1.0", "0.2.0", "0.3.0"]:
+		fake_pypi.add(f"octocat-{version}.tar.gz", b"sdist", version=version)
+
+	summary = octocheese.core.copy_pypi_2_github(
+			fake_github,
+			"octocat",
+			"octocat",
+			client=fake_pypi.client(),
+			backend="graphql",
+			)
+
+	assert summary.releases == {"v0.1.0": "updated", "v0.2.0": "created", "v0.3.0": "created"}
+	assert summary.files == {
+			("v0.1.0", "octocat-0.1.0.tar.gz"): "exists",
+			("v0.2.0", "octocat-0.2.0.tar.gz"): "copied",
+			("v0.3.0", "octocat-0.3.0.tar.gz"): "copied",
+			}
+
+	# Only the release which was edited is requested from the REST API
+	assert fake_github.repo.calls == [f"release {existing.id}"]
+	assert len(fake_github.graphql.queries) == 1
+	assert existing.edits == 1
+
+
+def test_copy_pypi_2_github_unknown_backend(fake_github, fake_pypi):
+	with pytest.raises(ValueError, match="Unknown backend 'soap'"):
+		octocheese.core.copy_pypi_2_github(
+				fake_github,
+				"octocat",
+				"octocat",
+				client=fake_pypi.client(),
+				backend="soap",  # type: ignore[arg-type]
+				)
@@ -0,0 +1,59 @@
+# stdlib
+import re
+import subprocess
+import sys
+from typing import Set
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import octocheese
+
+#: Modules which take a long time to import, and are only needed once copying starts.
+HEAVY_MODULES = {"github3", "github3_utils", "pypi_json", "requests", "dulwich", "octocheese.core"}
+
+
+def imported_modules(*args: str) -> Set[str]:
+	process = subprocess.run(
+			[sys.executable, "-X", "importtime", *args],
+			capture_output=True,
+			text=True,
+			cwd=str(PathPlus(__file__).parent.parent),
+			)
+	assert process.returncode == 0, process.stderr
+
+	modules = set()
+
+	for match in re.finditer(r"^import time:.*\| *(\S+)$", process.stderr, flags=re.MULTILINE):
+		name = match.group(1)
+		modules.add(name)
+		modules.add(name.split('.')[0])
+
+	return modules
+
+
+@pytest.mark.parametrize(
+		"statement, forbidden",
+		[
+				pytest.param("import octocheese", HEAVY_MODULES | {"consolekit"}, id="package"),
+				pytest.param("import octocheese.runner", HEAVY_MODULES | {"consolekit"}, id="action"),
+				pytest.param("import octocheese.__main__", HEAVY_MODULES, id="cli"),
+				pytest.param("import octocheese.core", {"consolekit", "mistletoe"}, id="core"),
+				],
+		)
+def test_import_time(statement: str, forbidden: Set[str]):
+	assert not imported_modules("-c", statement) & forbidden
+
+
+def test_version_import_time():
+	assert not imported_modules("-m", "octocheese", "--version") & HEAVY_MODULES
+
+
+def test_lazy_attributes():
+	assert octocheese.copy_pypi_2_github.__module__ == "octocheese.core"
+	assert "update_github_release" in dir(octocheese)
+
+	with pytest.raises(AttributeError, match="module 'octocheese' has no attribute 'missing'"):
+		octocheese.missing  # pylint: disable=pointless-statement
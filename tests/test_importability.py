@@ -9,8 +9,21 @@ import pytest
 				"octocheese.__main__",
 				"octocheese.__init__",
 				"octocheese.action",
+				"octocheese.aio",
+				"octocheese.batch",
 				"octocheese.colours",
 				"octocheese.core",
+				"octocheese.graphql",
+				"octocheese.metrics",
+				"octocheese.plan",
+				"octocheese.pypi",
+				"octocheese.ratelimit",
+				"octocheese.runner",
+				"octocheese.service",
+				"octocheese.state",
+				"octocheese.summary",
+				"octocheese.tags",
+				"octocheese.transfer",
 				],
 		)
 def test_importability(module_or_package: str):
@@ -0,0 +1,120 @@
+# stdlib
+import itertools
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import octocheese.core
+from octocheese.metrics import Metrics
+from octocheese.transfer import RetryPolicy, download_file
+from tests.conftest import FakeGitHub, FakeRepo
+
+
+def make_metrics() -> Metrics:
+	clock = itertools.count(step=0.5)
+	return Metrics(clock=lambda: next(clock))
+
+
+def test_metrics():
+	metrics = make_metrics()
+
+	with metrics.time("download"):
+		pass
+	with metrics.time("download"):
+		pass
+
+	metrics.add_bytes("download", 3 * 1024 * 1024)
+	metrics.add_retry("download")
+	metrics.add_time("upload", 2.25)
+	metrics.requests["github"] += 3
+
+	assert metrics.as_dict() == {
+			"phases": {
+					"download": {"count": 2, "seconds": 1.0, "bytes": 3 * 1024 * 1024, "retries": 1},
+					"upload": {"count": 1, "seconds": 2.25, "bytes": 0, "retries": 0},
+					},
+			"requests": {"github": 3},
+			}
+
+	assert metrics.format().splitlines() == [
+			"Metrics:",
+			"  Phase     Count  Seconds    Bytes  MiB/s  Retries",
+			"  download      2     1.00  3145728   3.00        1",
+			"  upload        1     2.25        0      -        0",
+			"  Requests: github 3",
+			]
+
+
+def test_metrics_openmetrics(tmp_pathplus: PathPlus):
+	metrics = make_metrics()
+	metrics.add_time("upload", 2.25)
+	metrics.add_bytes("upload", 100)
+	metrics.requests["pypi"] += 1
+
+	expected = [
+			"# TYPE octocheese_phase_runs counter",
+			'octocheese_phase_runs_total{phase="upload"} 1',
+			"# TYPE octocheese_phase_seconds counter",
+			"# UNIT octocheese_phase_seconds seconds",
+			'octocheese_phase_seconds_total{phase="upload"} 2.25',
+			"# TYPE octocheese_phase_bytes counter",
+			"# UNIT octocheese_phase_bytes bytes",
+			'octocheese_phase_bytes_total{phase="upload"} 100',
+			"# TYPE octocheese_phase_retries counter",
+			'octocheese_phase_retries_total{phase="upload"} 0',
+			"# TYPE octocheese_requests counter",
+			'octocheese_requests_total{service="pypi"} 1',
+			"# EOF",
+			]
+
+	assert metrics.to_openmetrics().splitlines() == expected
+
+	metrics.dump(tmp_pathplus / "metrics.txt")
+	assert (tmp_pathplus / "metrics.txt").read_lines() == [*expected, '']
+
+	metrics.dump(tmp_pathplus / "metrics.json")
+	assert (tmp_pathplus / "metrics.json").load_json() == metrics.as_dict()
+
+
+def test_download_metrics(fake_pypi, tmp_pathplus: PathPlus):
+	metrics = make_metrics()
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+	fake_pypi.failures = [503]
+
+	with fake_pypi.client() as client:
+		metrics.count_requests(client.endpoint.session, "pypi")
+		metrics.count_requests(client.endpoint.session, "pypi")
+
+		download_file(
+				client,
+				file_url["url"],
+				tmp_pathplus / "file.tar.gz",
+				retry=RetryPolicy(backoff=0),
+				metrics=metrics,
+				)
+
+	assert metrics.phases["download"].as_dict() == {"count": 1, "seconds": 1.5, "bytes": 5, "retries": 1}
+	assert metrics.phases["hash"].as_dict() == {"count": 1, "seconds": 0.5, "bytes": 5, "retries": 0}
+	assert metrics.requests == {"pypi": 2}
+
+
+def test_copy_pypi_2_github_metrics(fake_pypi):
+	metrics = Metrics()
+	github = FakeGitHub(FakeRepo(["v0.1.0"]))
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+
+	octocheese.core.copy_pypi_2_github(github, "octocat", "octocat", client=fake_pypi.client(), metrics=metrics)
+
+	assert list(metrics.phases) == [
+			"metadata",
+			"list-tags",
+			"list-releases",
+			"write-release",
+			"download",
+			"hash",
+			"upload",
+			]
+	assert metrics.phases["download"].bytes == 5
+	assert metrics.phases["upload"].bytes == 5
+	assert metrics.requests == {"pypi": 2}
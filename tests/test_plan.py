@@ -0,0 +1,106 @@
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import octocheese.core
+from octocheese.plan import SyncPlan
+from octocheese.pypi import MetadataCache
+from octocheese.state import SyncState
+from tests.conftest import FakeAsset, FakeRelease
+
+
+def test_plan_format():
+	plan = SyncPlan()
+	assert plan.format().splitlines() == [
+			"Plan:",
+			"  Releases: none",
+			"  Files: none",
+			"  Upload size: 0 bytes",
+			"  Estimated read requests: 1",
+			"  Estimated write requests: 0",
+			"  Estimated API requests: 1",
+			]
+
+	plan.record_release("v1.0.0", "old")
+	plan.record_release("v1.1.0", "updated")
+	plan.record_release("v1.2.0", "created")
+	plan.record_file("v1.2.0", "octocat-1.2.0.tar.gz", "copied", 100)
+	plan.record_file("v1.2.0", "octocat-1.2.0-py3-none-any.whl", "copied")
+	plan.record_file("v1.1.0", "octocat-1.1.0.tar.gz", "replaced", 20)
+	plan.record_file("v1.1.0", "octocat-1.1.0-py3-none-any.whl", "exists", 10)
+	plan.tags_listed = 150
+	plan.releases_listed = 2
+
+	assert plan.upload_bytes == 120
+	assert plan.write_requests == 6
+	assert plan.read_requests == 5
+	assert plan.api_requests == 11
+	assert plan.format() == """Plan:
+  Releases: 1 to create, 1 to edit, 1 older than the update window
+  Files: 2 to upload, 1 to replace, 1 already on GitHub
+  Upload size: 120 bytes
+  Estimated read requests: 5
+  Estimated write requests: 6
+  Estimated API requests: 11"""
+
+	assert plan.as_dict() == {
+			"releases": {"v1.0.0": "old", "v1.1.0": "edit", "v1.2.0": "create"},
+			"files": [
+					{"tag": "v1.1.0", "filename": "octocat-1.1.0-py3-none-any.whl", "action": "exists", "size": 10},
+					{"tag": "v1.1.0", "filename": "octocat-1.1.0.tar.gz", "action": "replace", "size": 20},
+					{"tag": "v1.2.0", "filename": "octocat-1.2.0-py3-none-any.whl", "action": "upload", "size": None},
+					{"tag": "v1.2.0", "filename": "octocat-1.2.0.tar.gz", "action": "upload", "size": 100},
+					],
+			"totals": {
+					"releases_to_create": 1,
+					"releases_to_edit": 1,
+					"files_to_upload": 2,
+					"files_to_replace": 1,
+					"upload_bytes": 120,
+					"read_requests": 5,
+					"write_requests": 6,
+					"api_requests": 11,
+					},
+			}
+
+	# The GraphQL API lists tags and releases in the same requests
+	plan.graphql = True
+	assert plan.read_requests == 4
+
+
+def test_copy_pypi_2_github_dry_run(fake_github, fake_pypi, tmp_pathplus: PathPlus):
+	fake_github.repo._tags = ["v0.1.0", "v0.2.0"]
+	fake_github.repo.releases_by_tag["v0.1.0"] = existing = FakeRelease("v0.1.0")
+	existing.original_assets.append(FakeAsset("octocat-0.1.0.tar.gz", b"sdist"))
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	fake_pypi.add("octocat-0.1.0-py3-none-any.whl", b"wheel", version="0.1.0")
+	fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist!", version="0.2.0")
+
+	metadata_cache = MetadataCache(tmp_pathplus / "metadata")
+	state = SyncState(tmp_pathplus / "state.json")
+
+	plan = octocheese.core.copy_pypi_2_github(
+			fake_github,
+			"octocat",
+			"octocat",
+			client=fake_pypi.client(),
+			metadata_cache=metadata_cache,
+			state=state,
+			dry_run=True,
+			)
+
+	assert isinstance(plan, SyncPlan)
+	assert plan.as_dict()["releases"] == {"v0.1.0": "edit", "v0.2.0": "create"}
+	assert plan.upload_bytes == 11
+	assert plan.write_requests == 4
+	assert (plan.tags_listed, plan.releases_listed) == (2, 1)
+	assert plan.read_requests == 4
+	assert plan.as_dict()["totals"]["api_requests"] == 8
+
+	# Nothing was downloaded or changed
+	assert len(fake_pypi.urls) == 1
+	assert list(fake_github.repo.releases_by_tag) == ["v0.1.0"]
+	assert existing.edits == 0
+	assert len(existing.original_assets) == 1
+	assert metadata_cache.load("octocat") is None
+	assert not (tmp_pathplus / "state.json").exists()
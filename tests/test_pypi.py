@@ -0,0 +1,141 @@
+# stdlib
+import datetime
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from pypi_json import ProjectMetadata
+
+# this package
+from octocheese.pypi import (
+		ChangeDetector,
+		MetadataCache,
+		get_changelog,
+		get_last_serial,
+		get_release_files,
+		get_release_times,
+		make_pypi_client
+		)
+
+
+def test_make_pypi_client():
+	with make_pypi_client(pool_size=25) as client:
+		session = client.endpoint.session
+		adapter = session.get_adapter("https://files.pythonhosted.org/packages/")
+
+		assert adapter is session.get_adapter("https://pypi.org/pypi/")
+		assert adapter._pool_connections == 25
+		assert adapter._pool_maxsize == 25
+		assert session.headers["User-Agent"].startswith("pypi-json/")
+
+
+def test_metadata_cache(fake_pypi, tmp_pathplus: PathPlus):
+	fake_pypi.add("octocat-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	cache = MetadataCache(tmp_pathplus / "metadata")
+
+	with fake_pypi.client() as client:
+		metadata, changed = cache.fetch(client, "Octocat")
+		assert changed
+		assert list(metadata.get_releases_with_digests()) == ["0.1.0"]
+
+		# Not committed, so still reported as changed
+		assert cache.load("octocat") is None
+		assert cache.fetch(client, "octocat")[1]
+
+		cache.commit("octocat")
+		assert cache.load("octocat")["etag"] == '"1"'
+
+		metadata, changed = cache.fetch(client, "octocat")
+		assert not changed
+		assert list(metadata.get_releases_with_digests()) == ["0.1.0"]
+
+		fake_pypi.add("octocat-0.2.0.tar.gz", b"sdist", version="0.2.0")
+		metadata, changed = cache.fetch(client, "octocat")
+		assert changed
+		assert list(metadata.get_releases_with_digests()) == ["0.1.0", "0.2.0"]
+
+		cache.commit("octocat")
+		cache.invalidate("Octocat")
+		assert cache.load("octocat") is None
+		assert cache.fetch(client, "octocat")[1]
+		cache.invalidate("missing")
+
+	assert len(fake_pypi.urls) == 5
+
+
+def test_change_detector(fake_pypi, tmp_pathplus: PathPlus):
+	fake_pypi.add("alpha-0.1.0.tar.gz", b"sdist", version="0.1.0")
+	detector = ChangeDetector(tmp_pathplus / "changelog.json")
+
+	with fake_pypi.client() as client:
+		assert get_last_serial(client) == 1
+		assert [event[::4] for event in get_changelog(client, 0)] == [("alpha", 1)]
+
+		# No previous run
+		assert detector.fetch(client, ["alpha", "Beta"]) == ["alpha", "Beta"]
+		assert detector.fetch(client, ["alpha", "Beta"]) == ["alpha", "Beta"]
+		detector.commit()
+		assert detector.load() == {"serial": 1, "projects": ["alpha", "beta"], "retry": []}
+
+		assert detector.fetch(client, ["alpha", "Beta"]) == []
+
+		fake_pypi.add("beta-0.2.0.tar.gz", b"sdist", version="0.2.0")
+		assert detector.fetch(client, ["alpha", "Beta", "gamma"]) == ["Beta", "gamma"]
+		detector.commit(retry=["Gamma"])
+		assert detector.load() == {"serial": 2, "projects": ["alpha", "beta", "gamma"], "retry": ["gamma"]}
+
+		assert detector.fetch(client, ["alpha", "Beta", "gamma"]) == ["gamma"]
+
+	assert fake_pypi.urls == ["https://pypi.org/pypi"] * 7
+
+
+def test_metadata_cache_corrupt(tmp_pathplus: PathPlus):
+	cache = MetadataCache(tmp_pathplus)
+	(tmp_pathplus / "octocat.json").write_text("{")
+	assert cache.load("octocat") is None
+	(tmp_pathplus / "octocat.json").write_text("[]")
+	assert cache.load("octocat") is None
+
+	detector = ChangeDetector(tmp_pathplus / "octocat.json")
+	assert detector.load() is None
+	(tmp_pathplus / "octocat.json").write_text('{"serial": "1"}')
+	assert detector.load() is None
+	detector.commit()
+	assert (tmp_pathplus / "octocat.json").read_text() == '{"serial": "1"}'
+
+
+def test_get_release_files():
+	files = [
+			{"url": "https://example.com/octocat-0.1.0.tar.gz", "digests": {"sha256": "abc"}, "size": 5},
+			{"url": "https://example.com/octocat-0.1.0.whl", "digests": {"sha256": "def", "blake2b_256": "123"}},
+			]
+	metadata = ProjectMetadata(info={"name": "octocat"}, last_serial=1, releases={"0.1.0": files}, urls=[])
+
+	assert get_release_files(metadata) == {
+			"0.1.0": [
+					{
+							"url": "https://example.com/octocat-0.1.0.tar.gz",
+							"digest": "abc",
+							"size": 5,
+							"digests": {"sha256": "abc"},
+							},
+					{
+							"url": "https://example.com/octocat-0.1.0.whl",
+							"digest": "def",
+							"digests": {"sha256": "def", "blake2b_256": "123"},
+							},
+					],
+			}
+
+
+def test_get_release_times():
+	files = [
+			{"upload_time_iso_8601": "2020-07-04T12:00:00.000000Z"},
+			{"upload_time_iso_8601": "2020-07-06T08:30:00.123456Z"},
+			]
+	releases = {"0.1.0": files, "0.2.0": [{"upload_time": "2021-01-01T00:00:00"}], "0.3.0": []}
+	metadata = ProjectMetadata(info={"name": "octocat"}, last_serial=1, releases=releases, urls=[])
+
+	assert get_release_times(metadata) == {
+			"0.1.0": datetime.datetime(2020, 7, 6, 8, 30, 0, 123456, tzinfo=datetime.timezone.utc),
+			"0.2.0": datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc),
+			}
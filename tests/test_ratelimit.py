@@ -0,0 +1,161 @@
+# stdlib
+import io
+from typing import Dict, List
+
+# 3rd party
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+# this package
+from octocheese.ratelimit import RateLimitedAdapter, TokenBucket
+
+
+class FakeClock:
+
+	def __init__(self, now: float = 1_000_000.0):
+		self.now = now
+		self.sleeps: List[float] = []
+
+	def __call__(self) -> float:
+		return self.now
+
+	def sleep(self, seconds: float) -> None:
+		self.sleeps.append(seconds)
+		self.now += seconds
+
+
+def make_response(status_code: int = 200, headers: Dict[str, str] = {}, content: bytes = b"{}") -> requests.Response:
+	response = requests.Response()
+	response.status_code = status_code
+	response.headers.update(headers)
+	response.raw = io.BytesIO(content)
+	return response
+
+
+@pytest.fixture()
+def clock() -> FakeClock:
+	return FakeClock()
+
+
+@pytest.fixture()
+def responses(monkeypatch) -> List[requests.Response]:
+	queue: List[requests.Response] = []
+
+	def send(self, request, **kwargs):
+		return queue.pop(0)
+
+	monkeypatch.setattr(HTTPAdapter, "send", send)
+	return queue
+
+
+def send(adapter: RateLimitedAdapter, body=None) -> requests.Response:
+	request = requests.Request("POST", "https://api.github.com/repos/octocat/hello_world", data=body).prepare()
+	return adapter.send(request)
+
+
+def test_token_bucket(clock: FakeClock):
+	bucket = TokenBucket(2, capacity=2, clock=clock, sleep=clock.sleep)
+
+	assert [bucket.acquire() for _ in range(5)] == [0, 0, 0.5, 0.5, 0.5]
+
+	clock.now += 10
+	assert bucket.acquire() == 0
+
+
+def test_token_bucket_invalid_rate():
+	with pytest.raises(ValueError, match="'rate' must be greater than zero."):
+		TokenBucket(0)
+
+
+def test_retry_after(clock: FakeClock, responses):
+	responses.extend([
+			make_response(403, {"Retry-After": "30"}, b'{"message": "You have exceeded a secondary rate limit."}'),
+			make_response(200),
+			])
+	adapter = RateLimitedAdapter(clock=clock, sleep=clock.sleep)
+
+	assert send(adapter, b"data").status_code == 200
+	assert clock.sleeps == [30]
+	assert adapter.throttled == 1
+	assert adapter.waited == 30
+
+
+def test_secondary_limit_backoff(clock: FakeClock, responses):
+	limited = b'{"message": "You have exceeded a secondary rate limit."}'
+	responses.extend([make_response(403, content=limited), make_response(429), make_response(200)])
+	adapter = RateLimitedAdapter(min_secondary_wait=10, clock=clock, sleep=clock.sleep)
+
+	assert send(adapter).status_code == 200
+	assert clock.sleeps == [10, 20]
+
+
+def test_primary_limit_exhausted(clock: FakeClock, responses):
+	reset = str(int(clock.now) + 100)
+	responses.extend([
+			make_response(200, {"X-RateLimit-Remaining": '0', "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": reset}),
+			make_response(200, {"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"}),
+			])
+	adapter = RateLimitedAdapter(clock=clock, sleep=clock.sleep)
+
+	send(adapter)
+	assert adapter.remaining == 0
+	assert clock.sleeps == []
+
+	# The next request waits for the limit to reset
+	send(adapter)
+	assert clock.sleeps == [101]
+	assert adapter.remaining == 4999
+
+
+def test_primary_limit_exhausted_without_reset(clock: FakeClock, responses):
+	responses.extend([
+			make_response(200, {"X-RateLimit-Remaining": '0', "X-RateLimit-Limit": "5000"}),
+			make_response(200, {"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"}),
+			])
+	adapter = RateLimitedAdapter(clock=clock, sleep=clock.sleep)
+
+	send(adapter)
+	assert adapter.remaining == 0
+
+	send(adapter)
+	assert clock.sleeps == []
+	assert adapter.remaining == 4999
+
+
+def test_pacing_when_low(clock: FakeClock, responses):
+	reset = str(int(clock.now) + 100)
+	headers = {"X-RateLimit-Remaining": "50", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": reset}
+	responses.extend([make_response(200, headers) for _ in range(3)])
+	adapter = RateLimitedAdapter(clock=clock, sleep=clock.sleep)
+
+	for _ in range(3):
+		send(adapter)
+
+	# The remaining 50 requests are spread over the 100 seconds until the reset
+	assert clock.sleeps == pytest.approx([2, 2], abs=0.1)
+
+
+def test_forbidden_not_retried(clock: FakeClock, responses):
+	responses.append(make_response(403, content=b'{"message": "Resource not accessible by integration"}'))
+	adapter = RateLimitedAdapter(clock=clock, sleep=clock.sleep)
+
+	assert send(adapter).status_code == 403
+	assert clock.sleeps == []
+	assert adapter.throttled == 0
+
+
+def test_gives_up(clock: FakeClock, responses):
+	responses.extend([make_response(429, {"Retry-After": '1'}) for _ in range(3)])
+	adapter = RateLimitedAdapter(max_retries_on_limit=2, clock=clock, sleep=clock.sleep)
+
+	assert send(adapter).status_code == 429
+	assert clock.sleeps == [1, 1]
+
+
+def test_unrewindable_body_not_retried(clock: FakeClock, responses):
+	responses.append(make_response(429, {"Retry-After": '1'}))
+	adapter = RateLimitedAdapter(clock=clock, sleep=clock.sleep)
+
+	assert send(adapter, iter([b"chunk"])).status_code == 429
+	assert clock.sleeps == []
@@ -0,0 +1,133 @@
+# stdlib
+import hashlib
+
+# 3rd party
+import pytest
+import requests
+
+# this package
+from octocheese.core import copy_pypi_2_github
+from octocheese.metrics import Metrics
+from octocheese.pypi import get_changelog, get_last_serial
+from tests.servers import FakeGitHubServer, FakePyPIServer, generate_content
+
+
+def test_generate_content():
+	content = b''.join(generate_content("octocat-0.1.0.tar.gz", 100_000))
+	assert len(content) == 100_000
+	assert content.startswith(b"octocat-0.1.0.tar.gz\noctocat-0.1.0.tar.gz\n")
+	assert b''.join(generate_content("octocat-0.1.0.tar.gz", 100_000)) == content
+	assert b''.join(generate_content("octocat-0.1.0.tar.gz", 0)) == b''
+
+
+def test_fake_pypi_server():
+	with FakePyPIServer() as pypi:
+		pypi.add_project("octocat", ["0.1.0"], files_per_version=2, file_size=1000)
+
+		with pypi.client() as client:
+			metadata = client.get_metadata("octocat")
+			files = metadata.releases["0.1.0"]
+			assert [file["filename"] for file in files] == pypi.filenames("octocat", "0.1.0")
+			assert pypi.filenames("octocat", "0.1.0") == [
+					"octocat-0.1.0.tar.gz",
+					"octocat-0.1.0-1-py3-none-any.whl",
+					]
+
+			response = client.endpoint.session.get(files[0]["url"])
+			assert len(response.content) == 1000
+			assert hashlib.sha256(response.content).hexdigest() == files[0]["digests"]["sha256"]
+
+			assert client.endpoint.session.get(f"{pypi.url}/pypi/missing/json").status_code == 404
+
+		assert pypi.requests == {"GET": 3}
+		assert pypi.bytes_sent > 1000
+
+
+def test_fake_pypi_server_changelog():
+	with FakePyPIServer() as pypi:
+		pypi.add_project("octocat", ["0.1.0"], files_per_version=2)
+		pypi.add_project("octodog", ["1.0.0"])
+
+		with pypi.client() as client:
+			assert get_last_serial(client) == 3
+			assert [event[::4] for event in get_changelog(client, 1)] == [("octocat", 2), ("octodog", 3)]
+			assert get_changelog(client, 3) == []
+
+			response = client.endpoint.session.get(f"{pypi.url}/pypi/octocat/json")
+			assert response.json()["last_serial"] == 2
+			assert response.headers["X-PyPI-Last-Serial"] == '2'
+
+
+def test_fake_server_not_running():
+	with pytest.raises(RuntimeError, match="The server is not running."):
+		FakePyPIServer().url
+
+
+@pytest.mark.parametrize("backend", ["rest", "graphql"])
+def test_copy_pypi_2_github(backend: str):
+	metrics = Metrics()
+
+	with FakePyPIServer() as pypi, FakeGitHubServer() as github:
+		pypi.add_project("octocat", ["0.1.0", "0.2.0", "0.3.0"], files_per_version=3, file_size=5000)
+		github.add_repo("octocat", "octocat", tags=["v0.1.0", "v0.2.0", "v0.3.0"])
+		github.add_release("octocat", "octocat", "v0.1.0", {"octocat-0.1.0.tar.gz": 5000})
+
+		with pypi.client() as client:
+			summary = copy_pypi_2_github(
+					github.github(),
+					"octocat",
+					"octocat",
+					client=client,
+					backend=backend,  # type: ignore[arg-type]
+					metrics=metrics,
+					)
+
+		assert summary.format().splitlines() == [
+				"Summary:",
+				"  Releases: 2 created, 1 updated",
+				"  Files: 8 copied, 1 already on GitHub",
+				]
+
+		releases = github.releases("octocat", "octocat")
+		assert list(releases) == ["v0.1.0", "v0.2.0", "v0.3.0"]
+		assert releases["v0.2.0"]["name"] == "Version 0.2.0"
+
+		for tag_name, release in releases.items():
+			version = tag_name[1:]
+			assert sorted(asset["name"] for asset in release["assets"]) == sorted(pypi.filenames("octocat", version))
+			assert {asset["size"] for asset in release["assets"]} == {5000}
+
+		assert github.requests["POST"] == 8 + (3 if backend == "graphql" else 2)
+		assert github.requests["PATCH"] == 1
+		assert pypi.requests == {"GET": 9}
+		assert metrics.requests == {"github": sum(github.requests.values()), "pypi": 9}
+		assert metrics.phases["upload"].bytes == 40_000
+
+
+def test_fake_github_server_not_found():
+	with FakeGitHubServer() as github:
+		github.add_repo("octocat", "octocat")
+		assert requests.get(f"{github.url}/api/v3/repos/octocat/missing").status_code == 404
+		assert requests.get(f"{github.url}/api/v3/repos/octocat/octocat/releases/tags/v1.0.0").status_code == 404
+		assert requests.get(f"{github.url}/api/v3/repos/octocat/octocat").json()["full_name"] == "octocat/octocat"
+
+
+def test_fake_pypi_server_files():
+	with FakePyPIServer() as pypi:
+		pypi.add_file("octocat", "0.1.0", "octocat-0.1.0.tar.gz", b"sdist")
+
+		with pypi.client() as client:
+			session = client.endpoint.session
+
+			response = session.get(f"{pypi.url}/pypi/Octocat/json")
+			assert response.json()["releases"]["0.1.0"][0]["size"] == 5
+			assert session.get(f"{pypi.url}/pypi/octocat/json", headers={"If-None-Match": '"1"'}).status_code == 304
+
+			url = f"{pypi.url}/packages/octocat-0.1.0.tar.gz"
+			response = session.get(url, headers={"Range": "bytes=2-"})
+			assert (response.status_code, response.content) == (206, b"ist")
+			assert pypi.ranges == ["bytes=2-"]
+
+			pypi.failures = [503]
+			assert session.get(url).status_code == 503
+			assert session.get(url).content == b"sdist"
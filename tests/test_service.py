@@ -0,0 +1,340 @@
+# stdlib
+import hashlib
+import hmac
+import http.client
+import json
+import threading
+from typing import Optional
+
+# 3rd party
+import pytest
+import requests
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import octocheese.pypi
+from octocheese.batch import BatchProject
+from octocheese.metrics import Metrics
+from octocheese.pypi import ChangeDetector, MetadataCache
+from octocheese.service import SyncQueue, SyncService, main, verify_signature
+from tests.conftest import FakeFleet, FakeRepo
+
+
+class FakeClock:
+
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def sign(secret: str, body: bytes) -> str:
+	return "sha256=" + hmac.new(secret.encode("UTF-8"), body, hashlib.sha256).hexdigest()
+
+
+def test_sync_queue():
+	clock = FakeClock()
+	queue = SyncQueue(delay=10, max_delay=25, clock=clock)
+
+	assert queue.add("alpha", "pypi")
+	clock.now = 5
+	assert queue.add("beta", "github")
+	assert not queue.add("alpha", "pypi")
+	assert queue.pending == ["alpha", "beta"]
+
+	clock.now = 14
+	assert queue.pop_due(timeout=0) == {}
+
+	clock.now = 15
+	assert not queue.add("alpha", "github")
+	assert queue.pop_due(timeout=0) == {"beta": {"github"}}
+
+	# A steady stream of events only postpones the project until max_delay after the first event
+	clock.now = 24
+	queue.add("alpha", "pypi")
+	clock.now = 25
+	assert queue.pop_due(timeout=0) == {"alpha": {"pypi", "github"}}
+	assert queue.pending == []
+
+
+def test_sync_queue_close():
+	queue = SyncQueue()
+	queue.add("alpha", "pypi")
+
+	thread = threading.Timer(0.05, queue.close)
+	thread.start()
+	assert queue.pop_due() == {}
+	assert queue.closed
+	thread.join()
+
+
+def test_verify_signature():
+	body = b'{"zen": "Keep it logically awesome."}'
+	assert verify_signature("s3cret", body, sign("s3cret", body))
+	assert not verify_signature("s3cret", body, sign("other", body))
+	assert not verify_signature("s3cret", body, None)
+	assert not verify_signature("s3cret", body, "sha1=abc")
+
+
+@pytest.fixture()
+def service() -> SyncService:
+	projects = [
+			BatchProject("Alpha.Lib", "octocat", "alpha", {}),
+			BatchProject("beta", "octocat", "mono", {}),
+			BatchProject("gamma", "octocat", "mono", {}),
+			]
+	return SyncService(FakeFleet({}), projects, ignore_sender="octocheese-bot")
+
+
+def test_handle_github_event(service: SyncService):
+	assert service.handle_github_event("create", {"ref_type": "tag", "repository": {"full_name": "OctoCat/Mono"}}) == [
+			"beta",
+			"gamma",
+			]
+	branch = {"ref_type": "branch", "repository": {"full_name": "octocat/alpha"}}
+	assert service.handle_github_event("create", branch) == []
+
+	release = {"action": "published", "repository": {"full_name": "octocat/alpha"}, "sender": {"login": "octocat"}}
+	assert service.handle_github_event("release", release) == ["Alpha.Lib"]
+	assert service.handle_github_event("release", {**release, "action": "deleted"}) == []
+	assert service.handle_github_event("release", {**release, "sender": {"login": "octocheese-bot"}}) == []
+	assert service.handle_github_event("push", release) == []
+	assert service.handle_github_event("create", {**branch, "ref_type": "tag", "repository": {"full_name": "a/b"}}) == []
+
+	assert service.queue.pending == ["beta", "gamma", "Alpha.Lib"]
+
+
+def test_handle_pypi_notification(service: SyncService):
+	assert service.handle_pypi_notification({"project": "alpha-lib"}) == ["Alpha.Lib"]
+	assert service.handle_pypi_notification({"project": "missing"}) == []
+	assert service.handle_pypi_notification({"project": 1}) == []
+	assert service.poll() == ["Alpha.Lib", "beta", "gamma"]
+	assert service.queue.pending == ["Alpha.Lib", "beta", "gamma"]
+
+
+def test_handle_request(service: SyncService):
+	body = json.dumps({"project": "beta"}).encode("UTF-8")
+
+	status, content_type, content = service.handle_request("POST", "/pypi", {}, body)
+	assert (status, content_type) == (202, "application/json")
+	assert json.loads(content) == {"queued": ["beta"]}
+
+	headers = {"X-GitHub-Event": "create"}
+	payload = json.dumps({"ref_type": "tag", "repository": {"full_name": "octocat/alpha"}}).encode("UTF-8")
+	status, _, content = service.handle_request("POST", "/github/", headers, payload)
+	assert status == 202
+	assert json.loads(content) == {"queued": ["Alpha.Lib"]}
+
+	status, _, content = service.handle_request("GET", "/health", {}, b'')
+	assert status == 200
+	assert json.loads(content) == {"pending": ["beta", "Alpha.Lib"], "runs": 0, "errors": []}
+
+	assert service.handle_request("POST", "/pypi", {}, b"{")[0] == 400
+	assert service.handle_request("POST", "/pypi", {}, b"[]")[0] == 400
+	assert service.handle_request("GET", "/pypi", {}, b'')[0] == 405
+	assert service.handle_request("POST", "/travis", {}, body)[0] == 404
+
+	status, content_type, content = service.handle_request("GET", "/metrics", {}, b'')
+	assert content_type.startswith("application/openmetrics-text")
+	assert content.decode("UTF-8").endswith("# EOF\n")
+
+
+def test_handle_request_signed(service: SyncService):
+	service.secret = "s3cret"
+	body = json.dumps({"project": "beta"}).encode("UTF-8")
+
+	assert service.handle_request("POST", "/pypi", {}, body)[0] == 401
+	assert service.handle_request("POST", "/pypi", {"X-Hub-Signature-256": sign("other", body)}, body)[0] == 401
+	assert service.handle_request("POST", "/pypi", {"x-hub-signature-256": sign("s3cret", body)}, body)[0] == 202
+	assert service.queue.pending == ["beta"]
+
+
+def test_run_pending(fake_pypi, tmp_pathplus: PathPlus):
+	fleet = FakeFleet({"alpha": FakeRepo(), "beta": FakeRepo(["v2.0.0"])})
+	fake_pypi.add("alpha-1.0.0.tar.gz", b"alpha", version="1.0.0")
+	projects = [BatchProject("alpha", "octocat", "alpha", {}), BatchProject("beta", "octocat", "beta", {})]
+
+	with fake_pypi.client() as client:
+		service = SyncService(
+				fleet,
+				projects,
+				delay=0,
+				client=client,
+				metadata_cache=MetadataCache(tmp_pathplus / "metadata"),
+				metrics=Metrics(),
+				)
+
+		assert service.run_pending(timeout=0) is None
+
+		service.handle_pypi_notification({"project": "alpha"})
+		report = service.run_pending(timeout=0)
+		assert report is not None
+		assert list(report.summaries) == ["alpha"]
+		assert fleet.repos["alpha"].releases_by_tag == {}
+
+		# The tag is pushed after the upload
+		fleet.repos["alpha"]._tags.append("v1.0.0")
+		service.handle_github_event("create", {"ref_type": "tag", "repository": {"full_name": "octocat/alpha"}})
+		report = service.run_pending(timeout=0)
+		assert report is not None
+		assert report.summaries["alpha"].releases == {"v1.0.0": "created"}
+		assert list(fleet.repos["alpha"].releases_by_tag) == ["v1.0.0"]
+
+		# The release is deleted on GitHub, so the metadata on PyPI is unchanged
+		del fleet.repos["alpha"].releases_by_tag["v1.0.0"]
+		service.handle_pypi_notification({"project": "alpha"})
+		service.run_pending(timeout=0)
+		assert fleet.repos["alpha"].releases_by_tag == {}
+
+		service.handle_github_event("create", {"ref_type": "tag", "repository": {"full_name": "octocat/alpha"}})
+		report = service.run_pending(timeout=0)
+		assert report is not None
+		assert report.summaries["alpha"].releases == {"v1.0.0": "created"}
+
+	assert service.runs == 4
+	assert service.last_report is report
+
+
+def test_poll_changelog(fake_pypi, tmp_pathplus: PathPlus, capsys, monkeypatch):
+	fleet = FakeFleet({"alpha": FakeRepo(["v1.0.0"]), "beta": FakeRepo(["v2.0.0"])})
+	fake_pypi.add("alpha-1.0.0.tar.gz", b"alpha", version="1.0.0")
+	fake_pypi.add("beta-2.0.0.tar.gz", b"beta", version="2.0.0")
+	detector = ChangeDetector(tmp_pathplus / "changelog.json")
+	projects = [BatchProject("alpha", "octocat", "alpha", {}), BatchProject("beta", "octocat", "beta", {})]
+
+	with fake_pypi.client() as client:
+		service = SyncService(fleet, projects, delay=0, change_detector=detector, client=client)
+
+		# With no previous poll every project is queued,
+		# and the serial number is only recorded once they have been copied.
+		assert service.poll() == ["alpha", "beta"]
+		assert detector.load() is None
+		service.run_pending(timeout=0)
+		assert detector.load() == {"serial": 2, "projects": ["alpha", "beta"], "retry": []}
+
+		# Projects which are unchanged on PyPI are not queued
+		assert service.poll() == []
+		assert service.queue.pending == []
+
+		fake_pypi.add("alpha-1.1.0.tar.gz", b"alpha", version="1.1.0")
+		assert service.poll() == ["alpha"]
+		report = service.run_pending(timeout=0)
+		assert report is not None
+		assert list(report.summaries) == ["alpha"]
+		assert report.summaries["alpha"].untagged == ["1.1.0"]
+
+		# The tag has not been pushed yet, so the project is queued again even though PyPI is unchanged
+		assert detector.load() == {"serial": 3, "projects": ["alpha", "beta"], "retry": ["alpha"]}
+		assert service.poll() == ["alpha"]
+
+		fleet.repos["alpha"]._tags.append("v1.1.0")
+		report = service.run_pending(timeout=0)
+		assert report is not None
+		assert report.summaries["alpha"].releases["v1.1.0"] == "created"
+		assert detector.load()["retry"] == []
+		assert service.poll() == []
+
+		# Every project is queued if the changelog cannot be obtained
+		def get_changelog(client, since_serial: int):
+			raise requests.HTTPError("503 Server Error: Service Unavailable")
+
+		monkeypatch.setattr(octocheese.pypi, "get_changelog", get_changelog)
+
+		assert service.poll() == ["alpha", "beta"]
+		assert "Unable to obtain the changelog from PyPI" in capsys.readouterr().err
+
+
+def test_serve(fake_pypi):
+	fleet = FakeFleet({"alpha": FakeRepo()})
+	service = SyncService(
+			fleet,
+			[BatchProject("alpha", "octocat", "alpha", {})],
+			delay=0,
+			client=fake_pypi.client(),
+			)
+
+	server = service.make_server(port=0)
+	thread = threading.Thread(target=server.serve_forever, args=(0.05, ), daemon=True)
+	thread.start()
+
+	try:
+		url = f"http://127.0.0.1:{server.server_address[1]}"
+		response = requests.post(f"{url}/pypi", json={"project": "alpha"})
+		assert response.status_code == 202
+		assert response.json() == {"queued": ["alpha"]}
+		assert requests.get(f"{url}/health").json()["pending"] == ["alpha"]
+		assert requests.get(f"{url}/missing").status_code == 404
+	finally:
+		server.shutdown()
+		server.server_close()
+
+
+@pytest.mark.parametrize(
+		"content_length, status",
+		[
+				pytest.param("abc", 400, id="not_a_number"),
+				pytest.param("-1", 400, id="negative"),
+				pytest.param("1_0", 400, id="underscore"),
+				pytest.param(None, 411, id="missing"),
+				pytest.param(str(2 * 1024 * 1024), 413, id="too_large"),
+				],
+		)
+def test_serve_content_length(content_length: Optional[str], status: int):
+	service = SyncService(FakeFleet({}), [BatchProject("alpha", "octocat", "alpha", {})])
+	server = service.make_server(port=0)
+	thread = threading.Thread(target=server.serve_forever, args=(0.05, ), daemon=True)
+	thread.start()
+
+	try:
+		connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+		connection.putrequest("POST", "/pypi")
+		if content_length is not None:
+			connection.putheader("Content-Length", content_length)
+		connection.endheaders()
+
+		response = connection.getresponse()
+		assert response.status == status
+		assert "message" in json.loads(response.read())
+		connection.close()
+	finally:
+		server.shutdown()
+		server.server_close()
+
+	assert service.queue.pending == []
+
+
+def test_serve_polls_on_start(fake_pypi):
+	fleet = FakeFleet({"alpha": FakeRepo(["v1.0.0"])})
+	fake_pypi.add("alpha-1.0.0.tar.gz", b"alpha", version="1.0.0")
+	service = SyncService(
+			fleet,
+			[BatchProject("alpha", "octocat", "alpha", {})],
+			delay=0,
+			client=fake_pypi.client(),
+			)
+
+	thread = threading.Thread(target=service.serve, kwargs={"port": 0}, daemon=True)
+	thread.start()
+
+	try:
+		while service.runs == 0 and thread.is_alive():
+			thread.join(0.01)
+	finally:
+		service.stop()
+		thread.join(5)
+
+	assert not thread.is_alive()
+	assert service.runs == 1
+	assert list(fleet.repos["alpha"].releases_by_tag) == ["v1.0.0"]
+
+
+def test_main_invalid_manifest(tmp_pathplus: PathPlus, fake_token):
+	(tmp_pathplus / "manifest.json").dump_json({"projects": []})
+
+	runner = CliRunner()
+	result: Result = runner.invoke(main, args=[str(tmp_pathplus / "manifest.json")])
+
+	assert result.exit_code == 2
+	assert "The manifest must contain a 'projects' table." in result.stdout
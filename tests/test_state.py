@@ -0,0 +1,46 @@
+# stdlib
+import datetime
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from octocheese.state import SyncState
+
+sdist = {"url": "https://files.pythonhosted.org/packages/ab/cd/octocat-1.2.3.tar.gz", "digest": "abcdef"}
+wheel = {"url": "https://files.pythonhosted.org/packages/ab/cd/octocat-1.2.3-py3-none-any.whl", "digest": "123456"}
+week = datetime.timedelta(days=7)
+
+
+def test_sync_state(tmp_pathplus: PathPlus):
+	state = SyncState(tmp_pathplus / "state" / "octocheese.json")
+
+	assert state.unsynced_files("octocat/hello", "v1.2.3", [sdist, wheel]) == [sdist, wheel]
+	assert state.get_fingerprint("octocat/hello", "v1.2.3") is None
+	assert not state.is_frozen("octocat/hello", "v1.2.3", week)
+
+	state.record_file("octocat/hello", "v1.2.3", "octocat-1.2.3.tar.gz", "abcdef")
+	state.record_file("octocat/hello", "v1.2.3", "octocat-1.2.3-py3-none-any.whl", "000000")
+	state.set_fingerprint("octocat/hello", "v1.2.3", "fingerprint")
+	state.freeze("octocat/hello", "v1.2.2")
+	state.freeze("octocat/hello", "v1.2.1", datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=30))
+	state.save()
+
+	state = SyncState(tmp_pathplus / "state" / "octocheese.json")
+	assert state.unsynced_files("octocat/hello", "v1.2.3", [sdist, wheel]) == [wheel]
+	assert state.unsynced_files("octocat/world", "v1.2.3", [sdist, wheel]) == [sdist, wheel]
+	assert state.get_fingerprint("octocat/hello", "v1.2.3") == "fingerprint"
+	assert state.is_frozen("octocat/hello", "v1.2.2", week)
+	assert not state.is_frozen("octocat/hello", "v1.2.3", week)
+
+	# Releases are only frozen for update windows no wider than the one they were frozen with
+	assert state.is_frozen("octocat/hello", "v1.2.1", week)
+	assert not state.is_frozen("octocat/hello", "v1.2.1", datetime.timedelta(days=60))
+	assert not state.is_frozen("octocat/hello", "v1.2.1", None)
+	assert not state.is_frozen("octocat/hello", "v1.2.2", None)
+	assert not (tmp_pathplus / "state" / "octocheese.json.tmp").exists()
+
+
+def test_sync_state_other_version(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "state.json").write_text('{"version": 0, "repos": {"octocat/hello": {"v1.2.3": {"frozen": true}}}}')
+	assert not SyncState(tmp_pathplus / "state.json").is_frozen("octocat/hello", "v1.2.3", week)
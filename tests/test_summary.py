@@ -0,0 +1,35 @@
+# 3rd party
+import pytest
+
+# this package
+from octocheese.summary import SyncSummary
+
+
+def test_summary_format():
+	summary = SyncSummary()
+	assert summary.format() == "Summary:\n  Releases: none\n  Files: none"
+
+	summary.record_release("v1.0.0", "old")
+	summary.record_release("v1.1.0", "updated")
+	summary.record_release("v1.2.0", "created")
+	summary.record_file("v1.2.0", "octocat-1.2.0.tar.gz", "failed")
+	summary.record_file("v1.2.0", "octocat-1.2.0-py3-none-any.whl", "copied")
+	summary.record_file("v1.1.0", "octocat-1.1.0.tar.gz", "failed")
+	summary.record_file("v1.1.0", "octocat-1.1.0-py3-none-any.whl", "exists")
+
+	assert summary.failed_files == [("v1.1.0", "octocat-1.1.0.tar.gz"), ("v1.2.0", "octocat-1.2.0.tar.gz")]
+	assert summary.format() == """Summary:
+  Releases: 1 created, 1 updated, 1 older than the update window
+  Files: 1 copied, 1 already on GitHub, 2 failed
+  Failed: octocat-1.1.0.tar.gz (v1.1.0)
+  Failed: octocat-1.2.0.tar.gz (v1.2.0)"""
+
+
+def test_summary_unknown_outcome():
+	summary = SyncSummary()
+
+	with pytest.raises(ValueError, match="Unknown outcome 'deleted'"):
+		summary.record_release("v1.0.0", "deleted")
+
+	with pytest.raises(ValueError, match="Unknown outcome 'deleted'"):
+		summary.record_file("v1.0.0", "octocat-1.0.0.tar.gz", "deleted")
@@ -0,0 +1,59 @@
+# 3rd party
+import pytest
+
+# this package
+from octocheese.tags import VersionIndex, prefix_pattern
+
+
+@pytest.mark.parametrize(
+		"tag_name, version",
+		[
+				("v1.2.0", "1.2.0"),
+				("1.2.0", "1.2.0"),
+				("v1.2", "1.2.0"),
+				("1.0-post1", "1.0.post1"),
+				("v2.0.0RC1", "2.0.0rc1"),
+				("2020.7", "2020.7"),
+				("not-a-version", "not-a-version"),
+				("v3.0.0", None),
+				("release-1.2.0", None),
+				]
+		)
+def test_version_index(tag_name: str, version: str):
+	index = VersionIndex(["1.0.post1", "1.2.0", "2.0.0rc1", "2020.7", "not-a-version"])
+	assert index.match(tag_name) == version
+
+
+def test_version_index_patterns():
+	index = VersionIndex(
+			["1.2.0", "1.3.0"],
+			tag_patterns=[r"release-(?P<version>.+)", prefix_pattern("octocheese-")],
+			)
+
+	assert index.match("release-1.2.0") == "1.2.0"
+	assert index.match("octocheese-v1.3") == "1.3.0"
+	assert index.match("octocheese-1.3.0") == "1.3.0"
+	assert index.match("consolekit-v1.3.0") is None
+	assert index.match("v1.2.0") is None
+
+	assert index.parse_tag("octocheese-v1.4.0") == "1.4.0"
+	assert index.parse_tag("consolekit-v1.3.0") is None
+	assert index.lookup("1.2") == "1.2.0"
+	assert index.lookup("1.4") is None
+
+
+def test_prefix_pattern():
+	assert prefix_pattern("octocheese-") == r"octocheese\-v?(?P<version>.+)"
+	assert prefix_pattern("a.b/") == r"a\.b/v?(?P<version>.+)"
+
+
+@pytest.mark.parametrize(
+		"pattern, message",
+		[
+				("release-(.+)", r"The tag pattern 'release-\(\.\+\)' has no 'version' group."),
+				("release-(?P<version>", r"Invalid tag pattern 'release-\(\?P<version>': missing \), .*"),
+				]
+		)
+def test_version_index_invalid_pattern(pattern: str, message: str):
+	with pytest.raises(ValueError, match=message):
+		VersionIndex([], tag_patterns=[pattern])
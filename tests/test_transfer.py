@@ -0,0 +1,309 @@
+# stdlib
+import hashlib
+import os
+import threading
+
+# 3rd party
+import pytest
+import requests
+from domdf_python_tools.paths import PathPlus
+from github3.exceptions import ServerError, UnprocessableEntity
+
+# this package
+import octocheese.transfer
+from octocheese.metrics import Metrics
+from octocheese.transfer import FileCache, RetryPolicy, download_file, upload_file
+from tests.conftest import FakeAsset, FakeRelease
+
+no_wait = RetryPolicy(retries=2, backoff=0)
+
+
+def error_response(status_code: int) -> requests.Response:
+	response = requests.Response()
+	response.status_code = status_code
+	response._content = b'{"message": "Something went wrong"}'
+	return response
+
+
+def test_download_file(fake_pypi, tmp_pathplus: PathPlus, monkeypatch):
+	monkeypatch.setattr(octocheese.transfer, "CHUNK_SIZE", 7)
+
+	content = b"This file is downloaded in several chunks." * 10
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", content)
+
+	with fake_pypi.client() as client:
+		digest = download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", file_url["digest"])
+
+	assert digest == hashlib.sha256(content).hexdigest()
+	assert (tmp_pathplus / "file.tar.gz").read_bytes() == content
+
+
+def test_download_file_errors(fake_pypi, tmp_pathplus: PathPlus):
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+
+	with fake_pypi.client() as client:
+		with pytest.raises(ValueError, match="The checksums for octocat-1.2.3.tar.gz do not match!"):
+			download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", '0' * 64)
+
+		with pytest.raises(OSError, match="Unable to download 'missing.whl' from PyPI."):
+			download_file(client, file_url["url"].replace("octocat-1.2.3.tar.gz", "missing.whl"), tmp_pathplus / "file.whl")
+
+
+def test_download_file_digests(fake_pypi, tmp_pathplus: PathPlus, monkeypatch):
+	monkeypatch.setattr(octocheese.transfer, "CHUNK_SIZE", 7)
+
+	content = b"This file is hashed in the background." * 10
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", content)
+	digests = {
+			"md5": "not checked",
+			"sha256": file_url["digest"].upper(),
+			"blake2b_256": hashlib.blake2b(content, digest_size=32).hexdigest(),
+			}
+	metrics = Metrics()
+
+	with fake_pypi.client() as client:
+		digest = download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", digests=digests, metrics=metrics)
+		assert digest == file_url["digest"]
+
+		with pytest.raises(ValueError, match="The checksums for octocat-1.2.3.tar.gz do not match!"):
+			download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", digests={"blake2b_256": '0' * 64})
+
+	assert metrics.phases["hash"].bytes == len(content)
+	assert metrics.phases["hash"].count == 1
+
+
+def test_download_file_hashes_in_background(fake_pypi, tmp_pathplus: PathPlus, monkeypatch):
+	threads = set()
+
+	class RecordingHash:
+
+		def __init__(self):
+			self._hash = hashlib.sha256()
+
+		def update(self, data: bytes) -> None:
+			threads.add(threading.current_thread())
+			self._hash.update(data)
+
+		def hexdigest(self) -> str:
+			return self._hash.hexdigest()
+
+	monkeypatch.setitem(octocheese.transfer.SUPPORTED_DIGESTS, "sha256", RecordingHash)
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+
+	with fake_pypi.client() as client:
+		assert download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz") == file_url["digest"]
+
+	assert len(threads) == 1
+	assert threading.current_thread() not in threads
+
+
+def test_download_file_resume(fake_pypi, tmp_pathplus: PathPlus, monkeypatch):
+	monkeypatch.setattr(octocheese.transfer, "CHUNK_SIZE", 7)
+
+	content = b"This download is interrupted part way through." * 5
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", content)
+	fake_pypi.interrupt_after = 100
+
+	with fake_pypi.client() as client:
+		download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", file_url["digest"], no_wait)
+
+	assert (tmp_pathplus / "file.tar.gz").read_bytes() == content
+	assert fake_pypi.ranges == ["bytes=100-"]
+
+
+def test_download_file_resume_unsupported(fake_pypi, tmp_pathplus: PathPlus):
+	content = b"This download is interrupted part way through." * 5
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", content)
+	fake_pypi.interrupt_after = 100
+	fake_pypi.support_ranges = False
+
+	with fake_pypi.client() as client:
+		download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", file_url["digest"], no_wait)
+
+	# The server sent the whole file again, so the first attempt was discarded
+	assert (tmp_pathplus / "file.tar.gz").read_bytes() == content
+	assert fake_pypi.ranges == ["bytes=100-"]
+
+	with fake_pypi.client() as client:
+		fake_pypi.interrupt_after = 100
+		digests = {"blake2b_256": hashlib.blake2b(content, digest_size=32).hexdigest()}
+		download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", retry=no_wait, digests=digests)
+
+
+def test_download_file_retry(fake_pypi, tmp_pathplus: PathPlus):
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+
+	with fake_pypi.client() as client:
+		fake_pypi.failures = [503, 429]
+		download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", file_url["digest"], no_wait)
+		assert (tmp_pathplus / "file.tar.gz").read_bytes() == b"sdist"
+		assert len(fake_pypi.urls) == 3
+
+		fake_pypi.failures = [503, 503, 503]
+		with pytest.raises(OSError, match="Unable to download 'octocat-1.2.3.tar.gz' from PyPI."):
+			download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", file_url["digest"], no_wait)
+
+		# Errors which are not temporary are not retried
+		fake_pypi.failures = [403]
+		with pytest.raises(OSError, match="Unable to download 'octocat-1.2.3.tar.gz' from PyPI."):
+			download_file(client, file_url["url"], tmp_pathplus / "file.tar.gz", file_url["digest"], no_wait)
+		assert len(fake_pypi.urls) == 7
+
+
+def test_retry_policy_delay():
+	policy = RetryPolicy(backoff=2, max_backoff=10)
+
+	for attempt, limit in enumerate([2, 4, 8, 10, 10]):
+		assert all(0 <= policy.delay(attempt) <= limit for _ in range(20))
+
+
+class FlakyRelease(FakeRelease):
+	"""
+	Release whose first upload fails part way through, leaving behind an asset in the "starter" state.
+	"""
+
+	def __init__(self, tag_name: str):
+		super().__init__(tag_name)
+		self.failures = [502]
+		self.deleted = []
+
+	def upload_asset(self, content_type: str, name: str, asset, label=None) -> FakeAsset:
+		if any(existing.name == name for existing in self.original_assets):
+			raise UnprocessableEntity(error_response(422))
+
+		if self.failures:
+			self.original_assets.append(FakeAsset(name, b'', state="starter"))
+			raise ServerError(error_response(self.failures.pop(0)))
+
+		return super().upload_asset(content_type, name, asset, label)
+
+	def assets(self):
+		for asset in super().assets():
+			asset.delete = lambda asset=asset: (self.original_assets.remove(asset), self.deleted.append(asset.name))
+			yield asset
+
+
+def test_upload_file_retry(tmp_pathplus: PathPlus):
+	release = FlakyRelease("v1.2.3")
+	(tmp_pathplus / "octocat-1.2.3.tar.gz").write_bytes(b"sdist")
+
+	upload_file(release, tmp_pathplus / "octocat-1.2.3.tar.gz", retry=no_wait)
+
+	assert release.deleted == ["octocat-1.2.3.tar.gz"]
+	assert [(asset.name, asset.content, asset.state) for asset in release.original_assets] == [
+			("octocat-1.2.3.tar.gz", b"sdist", "uploaded"),
+			]
+
+
+def test_upload_file_retry_starter_asset(tmp_pathplus: PathPlus):
+	# An asset left behind by a previous run is removed
+	release = FlakyRelease("v1.2.3")
+	release.failures = []
+	release.original_assets.append(FakeAsset("octocat-1.2.3.tar.gz", b'', state="starter"))
+	(tmp_pathplus / "octocat-1.2.3.tar.gz").write_bytes(b"sdist")
+
+	upload_file(release, tmp_pathplus / "octocat-1.2.3.tar.gz", retry=no_wait)
+
+	assert release.deleted == ["octocat-1.2.3.tar.gz"]
+	assert release.original_assets[0].content == b"sdist"
+
+	# But a complete asset is left alone
+	with pytest.raises(UnprocessableEntity):
+		upload_file(release, tmp_pathplus / "octocat-1.2.3.tar.gz", retry=no_wait)
+
+	assert release.deleted == ["octocat-1.2.3.tar.gz"]
+
+
+def test_upload_file_retries_exhausted(tmp_pathplus: PathPlus):
+	release = FlakyRelease("v1.2.3")
+	release.failures = [502, 502, 502]
+	(tmp_pathplus / "octocat-1.2.3.tar.gz").write_bytes(b"sdist")
+
+	with pytest.raises(ServerError):
+		upload_file(release, tmp_pathplus / "octocat-1.2.3.tar.gz", retry=no_wait)
+
+	assert release.deleted == ["octocat-1.2.3.tar.gz"] * 3
+
+
+def test_upload_file(tmp_pathplus: PathPlus):
+	release = FakeRelease("v1.2.3")
+	uploaded = []
+	release.upload_asset = lambda content_type, name, asset: uploaded.append((name, asset.read()))
+
+	(tmp_pathplus / "octocat-1.2.3.tar.gz").write_bytes(b"sdist")
+	upload_file(release, tmp_pathplus / "octocat-1.2.3.tar.gz")
+	upload_file(release, tmp_pathplus / "octocat-1.2.3.tar.gz", name="renamed.tar.gz")
+
+	assert uploaded == [("octocat-1.2.3.tar.gz", b"sdist"), ("renamed.tar.gz", b"sdist")]
+
+
+def test_file_cache(fake_pypi, tmp_pathplus: PathPlus):
+	cache = FileCache(tmp_pathplus / "cache")
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+
+	with fake_pypi.client() as client:
+		for _ in range(3):
+			with cache.use(client, file_url["url"], file_url["digest"]) as filename:
+				assert filename.read_bytes() == b"sdist"
+				assert filename == tmp_pathplus / "cache" / file_url["digest"][:2] / file_url["digest"]
+
+	assert len(fake_pypi.urls) == 1
+	assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_file_cache_corrupt(fake_pypi, tmp_pathplus: PathPlus):
+	cache = FileCache(tmp_pathplus / "cache")
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+
+	with fake_pypi.client() as client:
+		with cache.use(client, file_url["url"], file_url["digest"]) as filename:
+			pass
+
+		filename.write_bytes(b"corrupted")
+		assert cache.get(file_url["digest"]) is None
+		assert not filename.exists()
+
+		with cache.use(client, file_url["url"], file_url["digest"]) as filename:
+			assert filename.read_bytes() == b"sdist"
+
+	assert len(fake_pypi.urls) == 2
+
+
+def test_file_cache_checksum_mismatch(fake_pypi, tmp_pathplus: PathPlus):
+	cache = FileCache(tmp_pathplus / "cache")
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+
+	with fake_pypi.client() as client:
+		with pytest.raises(ValueError, match="The checksums for octocat-1.2.3.tar.gz do not match!"):
+			with cache.use(client, file_url["url"], '0' * 64):
+				pass
+
+	assert not list((tmp_pathplus / "cache").rglob("*.*"))
+
+
+def test_file_cache_eviction(fake_pypi, tmp_pathplus: PathPlus):
+	cache = FileCache(tmp_pathplus / "cache", max_size=12)
+	file_urls = [fake_pypi.add(f"octocat-{version}.tar.gz", f"sdist{version}".encode()) for version in "123"]
+
+	with fake_pypi.client() as client:
+		for mtime, file_url in enumerate(file_urls):
+			with cache.use(client, file_url["url"], file_url["digest"]) as filename:
+				os.utime(filename, (mtime, mtime))
+
+	# The least recently used file was evicted to make room for the last file
+	assert cache.get(file_urls[0]["digest"]) is None
+	assert cache.get(file_urls[1]["digest"]) is not None
+	assert cache.get(file_urls[2]["digest"]) is not None
+
+
+def test_file_cache_eviction_in_use(fake_pypi, tmp_pathplus: PathPlus):
+	cache = FileCache(tmp_pathplus / "cache", max_size=0)
+	file_url = fake_pypi.add("octocat-1.2.3.tar.gz", b"sdist")
+
+	with fake_pypi.client() as client:
+		with cache.use(client, file_url["url"], file_url["digest"]) as filename:
+			cache.evict()
+			assert filename.read_bytes() == b"sdist"
+
+	cache.evict()
+	assert not filename.exists()